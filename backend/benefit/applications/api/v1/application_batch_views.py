@@ -1,6 +1,10 @@
-from django.db import transaction
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from django.forms import ValidationError
-from django.http import HttpResponse, StreamingHttpResponse
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.utils.text import format_lazy
@@ -23,13 +27,17 @@ from applications.exceptions import (
     BatchCompletionRequiredFieldsError,
     BatchTooManyDraftsError,
 )
-from applications.models import Application, ApplicationBatch
-from applications.services.ahjo_integration import export_application_batch
+from applications.models import Application, ApplicationBatch, TalpaExportDelivery
+from applications.services.ahjo_integration import stream_application_batch_export
 from applications.services.applications_csv_report import ApplicationsCsvService
 from common.authentications import RobotBasicAuthentication
 from common.permissions import BFIsHandler
+from shared.audit_log import audit_logging
+from shared.audit_log.enums import Operation
 from shared.audit_log.viewsets import AuditLoggingModelViewSet
 
+TALPA_EXPORT_CURSOR_HEADER = "X-Talpa-Export-Cursor"
+
 
 class ApplicationBatchFilter(filters.FilterSet):
     status = filters.MultipleChoiceFilter(
@@ -128,12 +136,14 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        zip_file = export_application_batch(batch)
+        zip_stream = stream_application_batch_export(batch)
         file_name = format_lazy(
             _("Application batch {date}"),
             date=timezone.now().strftime("%d-%m-%Y %H.%M.%S"),
         )
-        response = HttpResponse(zip_file, content_type="application/x-zip-compressed")
+        response = StreamingHttpResponse(
+            zip_stream, content_type="application/x-zip-compressed"
+        )
         response["Content-Disposition"] = "attachment; filename={file_name}.zip".format(
             file_name=file_name
         )
@@ -148,9 +158,29 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
                 type=str,
                 enum=["0", "1"],
             ),
+            OpenApiParameter(
+                name="incremental",
+                description="Export only the batches modified after the cursor",
+                required=False,
+                type=str,
+                enum=["0", "1"],
+            ),
+            OpenApiParameter(
+                name="cursor",
+                description=(
+                    "The cursor of the last fully received incremental export, from the"
+                    f" {TALPA_EXPORT_CURSOR_HEADER} response header"
+                ),
+                required=False,
+                type=str,
+            ),
         ],
         description="""Get application batches for the TALPA robot.
-        Set skip_update=1 to skip updating the batch status to SENT_TO_TALPA""",
+        Set skip_update=1 to skip updating the batch status to SENT_TO_TALPA.
+        Set incremental=1 to get only the batches accepted or modified after the export
+        identified by the cursor parameter, or all of them if the cursor is not given. The
+        cursor of the export is returned in the response header, and repeating the request
+        with the same cursor returns the same applications.""",
         methods=["GET"],
     )
     @action(
@@ -167,10 +197,30 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
         """
         skip_update = request.query_params.get("skip_update") == "1"
 
-        approved_batches = ApplicationBatch.objects.filter(
-            status=ApplicationBatchStatus.DECIDED_ACCEPTED
-        )
-        if approved_batches.count() == 0:
+        delivery = None
+        if request.query_params.get("incremental") == "1":
+            try:
+                delivery = self.get_talpa_export_delivery(
+                    request.query_params.get("cursor")
+                )
+            except TalpaExportDelivery.DoesNotExist:
+                return Response(
+                    {"detail": _("Invalid cursor")},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            batch_ids = (
+                list(delivery.get_batches().values_list("id", flat=True))
+                if delivery
+                else []
+            )
+        else:
+            # the ids are fetched before the update, the CSV is generated after it
+            batch_ids = list(
+                ApplicationBatch.objects.filter(
+                    status=ApplicationBatchStatus.DECIDED_ACCEPTED
+                ).values_list("id", flat=True)
+            )
+        if not batch_ids:
             return Response(
                 {
                     "detail": _(
@@ -180,7 +230,7 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
                 },
                 status=status.HTTP_400_BAD_REQUEST,
             )
-        applications = Application.objects.filter(batch__in=approved_batches).order_by(
+        applications = Application.objects.filter(batch__in=batch_ids).order_by(
             "company__name", "application_number"
         )
         csv_service = ApplicationsCsvService(applications, True)
@@ -196,12 +246,70 @@ class ApplicationBatchViewSet(AuditLoggingModelViewSet):
         response["Content-Disposition"] = "attachment; filename={filename}.csv".format(
             filename=file_name
         )
+        if delivery:
+            response[TALPA_EXPORT_CURSOR_HEADER] = str(delivery.id)
         # for easier testing in the test environment do not update the batches as sent_to_talpa
         # remove this when TALPA integration is ready for production
         if not skip_update:
-            approved_batches.all().update(status=ApplicationBatchStatus.SENT_TO_TALPA)
+            ApplicationBatch.objects.filter(
+                id__in=batch_ids, status=ApplicationBatchStatus.DECIDED_ACCEPTED
+            ).update(status=ApplicationBatchStatus.SENT_TO_TALPA)
         return response
 
+    def get_talpa_export_delivery(
+        self, cursor: Optional[str]
+    ) -> Optional[TalpaExportDelivery]:
+        """
+        Return the delivery that follows the one identified by the cursor, or the first delivery
+        if the cursor is not given. The delivery is created and written to the audit log on the
+        first request, unless there are no batches to deliver yet. If a concurrent request
+        creates the delivery first, its delivery is returned. Raise
+        TalpaExportDelivery.DoesNotExist if the cursor is not valid.
+        """
+        previous = None
+        if cursor:
+            try:
+                previous = TalpaExportDelivery.objects.get(id=cursor)
+            except ValidationError:
+                raise TalpaExportDelivery.DoesNotExist
+        if delivery := self._get_next_talpa_export_delivery(previous):
+            return delivery
+
+        # The batches modified just now may belong to transactions that commit after the
+        # delivery, so they are left for the next delivery
+        delivery = TalpaExportDelivery(
+            previous=previous,
+            modified_until=timezone.now()
+            - timedelta(seconds=settings.TALPA_EXPORT_DELIVERY_DELAY),
+        )
+        if not delivery.get_batches().exists():
+            return None
+        try:
+            with transaction.atomic():
+                delivery.save()
+        except IntegrityError:
+            # created by a concurrent request with the same cursor
+            return self._get_next_talpa_export_delivery(previous)
+        audit_logging.log(
+            self._get_actor(),
+            self._get_actor_backend(),
+            Operation.READ,
+            delivery,
+            ip_address=self._get_ip_address(),
+            additional_information=f"sent to Talpa: {delivery}",
+        )
+        return delivery
+
+    @staticmethod
+    def _get_next_talpa_export_delivery(
+        previous: Optional[TalpaExportDelivery],
+    ) -> Optional[TalpaExportDelivery]:
+        return (
+            TalpaExportDelivery.objects.select_related("previous")
+            .filter(previous=previous)
+            .first()
+        )
+
     @action(methods=["PATCH"], detail=False)
     @transaction.atomic
     def assign_applications(self, request):
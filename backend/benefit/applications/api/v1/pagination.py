@@ -0,0 +1,208 @@
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+from uuid import UUID
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q, QuerySet
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import _positive_int
+from rest_framework.response import Response
+
+
+class ApplicationKeysetPagination:
+    """
+    Keyset (cursor) pagination for the application lists.
+
+    The list is only paginated if the page_size query parameter is given, otherwise the whole
+    list is returned as before. The next page is requested with the cursor returned with the
+    previous page. The cursor contains the ordering values of the last application of the previous
+    page, so the next page is found with a WHERE condition instead of an OFFSET, and the pages stay
+    consistent when applications are added to the list.
+
+    The queryset ordering is used with the primary key appended to make it unique. Only concrete
+    columns and the annotations of the queryset, like handled_at, can be used in the ordering, so
+    foreign keys are ordered by their key column. NULL values are sorted the PostgreSQL way: first
+    in descending and last in ascending order.
+    """
+
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    max_page_size = 500
+    invalid_cursor_message = _("Invalid cursor")
+    unsupported_ordering_message = _("Unsupported ordering")
+
+    page_size = None
+    has_next = False
+    next_cursor = None
+
+    def paginate_queryset(self, queryset: QuerySet, request) -> Optional[list]:
+        self.page_size = self.get_page_size(request)
+        if self.page_size is None:
+            return None
+
+        ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*ordering)
+        if cursor := request.query_params.get(self.cursor_query_param):
+            queryset = queryset.filter(
+                self._get_after_condition(
+                    ordering, self.decode_cursor(cursor, len(ordering))
+                )
+            )
+
+        # fetch one extra row to find out if there is a next page
+        results = list(queryset[: self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        results = results[: self.page_size]
+        if self.has_next:
+            self.next_cursor = self.encode_cursor(
+                [self._get_value(results[-1], field) for field in ordering]
+            )
+        else:
+            self.next_cursor = None
+        return results
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next_cursor": self.next_cursor,
+                "has_next": self.has_next,
+                "results": data,
+            }
+        )
+
+    def get_page_size(self, request) -> Optional[int]:
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return None
+
+    @classmethod
+    def get_ordering(cls, queryset: QuerySet) -> List[str]:
+        """
+        Return the ordering of the queryset as concrete columns and annotations, with the primary
+        key appended to make it unique. Relations are ordered by their key columns, because the
+        cursor values are compared column by column. Raises ValidationError for orderings that
+        can't be paginated.
+        """
+        ordering = [
+            cls._get_column_ordering(
+                queryset.model, field, queryset.query.annotations
+            )
+            for field in queryset.query.order_by or queryset.model._meta.ordering
+        ]
+        if not {"id", "-id", "pk", "-pk"} & set(ordering):
+            # make the ordering unique
+            ordering.append("id")
+        return ordering
+
+    @classmethod
+    def _get_column_ordering(cls, model, field, annotations: dict) -> str:
+        if not isinstance(field, str) or field.lstrip("-") in ("", "?"):
+            raise ValidationError(cls.unsupported_ordering_message)
+        prefix = "-" if field.startswith("-") else ""
+        names = field.lstrip("-").split("__")
+        if names == ["pk"] or field.lstrip("-") in annotations:
+            # the value of an annotation is read from the attribute of the same name
+            return field
+        for name in names[:-1]:
+            model_field = cls._get_model_field(model, name)
+            if not model_field.is_relation:
+                raise ValidationError(cls.unsupported_ordering_message)
+            model = model_field.related_model
+        model_field = cls._get_model_field(model, names[-1])
+        if model_field.is_relation:
+            if model_field.concrete:
+                # the foreign key column, e.g. company_id
+                names[-1] = model_field.attname
+            else:
+                # reverse one-to-one relation, ordered by the primary key of the related row
+                names.append(model_field.related_model._meta.pk.name)
+        return prefix + "__".join(names)
+
+    @classmethod
+    def _get_model_field(cls, model, name: str):
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise ValidationError(cls.unsupported_ordering_message)
+        if model_field.is_relation:
+            # ordering by a to-many relation would repeat the rows
+            supported = (
+                model_field.many_to_one or model_field.one_to_one
+            ) and model_field.related_model is not None
+        else:
+            supported = model_field.concrete
+        if not supported:
+            raise ValidationError(cls.unsupported_ordering_message)
+        return model_field
+
+    def encode_cursor(self, values: list) -> str:
+        return base64.urlsafe_b64encode(
+            json.dumps([self._to_json(value) for value in values]).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor: str, value_count: int) -> list:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (binascii.Error, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != value_count:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, date):
+            # isoformat() keeps the microseconds, which are needed for exact comparison
+            return value.isoformat()
+        if isinstance(value, (Decimal, UUID)):
+            return str(value)
+        return value
+
+    @staticmethod
+    def _get_value(obj, field: str):
+        value = obj
+        for name in field.lstrip("-").split("__"):
+            value = getattr(value, name, None)
+            if value is None:
+                return None
+        return value
+
+    @staticmethod
+    def _get_after_condition(ordering: List[str], values: list) -> Q:
+        """
+        Return the condition for the rows that come after the row with the given ordering values:
+        (a after x) OR (a = x AND b after y) OR (a = x AND b = y AND c after z) ...
+        """
+        condition = Q(pk__in=[])
+        equal = Q()
+        for field, value in zip(ordering, values):
+            descending = field.startswith("-")
+            name = field.lstrip("-")
+            if descending:
+                # NULLs are first in descending order
+                if value is None:
+                    after = Q(**{f"{name}__isnull": False})
+                else:
+                    after = Q(**{f"{name}__lt": value})
+            else:
+                # NULLs are last in ascending order
+                if value is None:
+                    after = Q(pk__in=[])
+                else:
+                    after = Q(**{f"{name}__gt": value}) | Q(**{f"{name}__isnull": True})
+            condition |= equal & after
+            if value is None:
+                equal &= Q(**{f"{name}__isnull": True})
+            else:
+                equal &= Q(**{name: value})
+        return condition
@@ -1,3 +1,4 @@
+import operator
 from datetime import date, timedelta
 from typing import Dict, List, Union
 
@@ -5,7 +6,7 @@ from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.db import transaction
+from django.db import models, transaction
 from django.utils import timezone
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
@@ -21,7 +22,7 @@ from applications.api.v1.status_transition_validator import (
     ApplicantApplicationStatusValidator,
     HandlerApplicationStatusValidator,
 )
-from applications.benefit_aggregation import get_former_benefit_info
+from applications.benefit_aggregation import get_former_benefit_info, PastBenefitIndex
 from applications.enums import (
     ApplicationActions,
     ApplicationOrigin,
@@ -66,6 +67,22 @@ from terms.models import ApplicantTermsApproval, Terms
 from users.utils import get_company_from_request, get_request_user_from_context
 
 
+class ApplicationListSerializer(serializers.ListSerializer):
+    """
+    Fetches the past benefits of all the listed applications at once, so that the former benefit
+    info and warnings don't need separate queries for every application.
+    """
+
+    past_benefit_index = None
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.Manager) else data
+        applications = list(iterable)
+        if {"former_benefit_info", "warnings"} & set(self.child.fields):
+            self.past_benefit_index = PastBenefitIndex(applications)
+        return super().to_representation(applications)
+
+
 class BaseApplicationSerializer(DynamicFieldsModelSerializer):
     """
     Fields in the Company model come from YTJ/other source and are not editable by user, and are listed
@@ -73,6 +90,37 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     """
 
+    # The related objects read by the fields. When applications are listed, only the relations
+    # of the requested fields are prefetched, so that the number of queries doesn't depend on the
+    # number of applications.
+    FIELD_PREFETCHES = {
+        "employee": ["employee"],
+        "company": ["company"],
+        "applicant_terms_approval": [
+            "applicant_terms_approval__terms__applicant_consents",
+            "applicant_terms_approval__selected_applicant_consents",
+        ],
+        "applicant_terms_approval_needed": ["applicant_terms_approval__terms"],
+        "bases": ["bases"],
+        "de_minimis_aid_set": ["de_minimis_aid_set"],
+        "total_deminimis_amount": ["de_minimis_aid_set"],
+        "attachments": ["attachments"],
+        "status_last_changed_at": ["log_entries"],
+        "ahjo_status": ["ahjo_status"],
+        "former_benefit_info": ["employee", "calculation"],
+        "warnings": ["employee"],
+    }
+
+    @classmethod
+    def get_prefetch_lookups(cls, context) -> List[str]:
+        """Return the prefetch_related() lookups needed by the fields selected in the context."""
+        lookups = []
+        for field_name in sorted(cls.get_selected_field_names(context)):
+            for lookup in cls.FIELD_PREFETCHES.get(field_name, []):
+                if lookup not in lookups:
+                    lookups.append(lookup)
+        return lookups
+
     status = serializers.ChoiceField(
         choices=ApplicationStatus.choices,
         validators=[ApplicantApplicationStatusValidator()],
@@ -121,6 +169,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     class Meta:
         model = Application
+        list_serializer_class = ApplicationListSerializer
         fields = [
             "id",
             "status",
@@ -428,8 +477,18 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
         ),
     )
 
+    def _get_terms_in_effect(self, terms_type):
+        # The terms in effect are the same for all the applications, so they are fetched
+        # only once per serializer context
+        terms_in_effect = self.context.setdefault("terms_in_effect", {})
+        if terms_type not in terms_in_effect:
+            terms_in_effect[terms_type] = Terms.objects.get_terms_in_effect(terms_type)
+        return terms_in_effect[terms_type]
+
     def get_applicant_terms_approval_needed(self, obj):
-        return ApplicantTermsApproval.terms_approval_needed(obj)
+        return ApplicantTermsApproval.terms_approval_needed(
+            obj, terms_in_effect=self._get_terms_in_effect(TermsType.APPLICANT_TERMS)
+        )
 
     @extend_schema_field(TermsSerializer())
     def get_applicant_terms_in_effect(self, obj):
@@ -440,13 +499,21 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
         terms_type = terms_map.get(
             ApplicationOrigin(obj.application_origin), ApplicationOrigin.APPLICANT
         )
-        terms = Terms.objects.get_terms_in_effect(terms_type)
-        if terms:
-            # If given the request in context, DRF will output the URL for FileFields
-            context = {"request": self.context.get("request")}
-            return TermsSerializer(terms, context=context).data
-        else:
-            return None
+        serialized_terms = self.context.setdefault("serialized_terms_in_effect", {})
+        if terms_type not in serialized_terms:
+            if terms := self._get_terms_in_effect(terms_type):
+                # If given the request in context, DRF will output the URL for FileFields
+                context = {"request": self.context.get("request")}
+                serialized_terms[terms_type] = TermsSerializer(
+                    terms, context=context
+                ).data
+            else:
+                serialized_terms[terms_type] = None
+        return serialized_terms[terms_type]
+
+    def _get_past_benefit_index(self):
+        # only available when serializing a list of applications
+        return getattr(self.parent, "past_benefit_index", None)
 
     def get_warnings(self, obj) -> Dict[str, List[str]]:
         """
@@ -482,6 +549,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
                 obj.start_date,
                 obj.end_date,
                 obj.apprenticeship_program,
+                past_benefit_index=self._get_past_benefit_index(),
             ).warnings:
                 warnings["former_benefits"] = former_benefit_warnings
         return warnings
@@ -506,8 +574,9 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
             return None
 
     def get_status_last_changed_at(self, obj):
-        if log_entry := obj.log_entries.all().order_by("-created_at").first():
-            return log_entry.created_at
+        # the log entries are prefetched when listing applications, so they are not ordered in the query
+        if log_entries := obj.log_entries.all():
+            return max(log_entry.created_at for log_entry in log_entries)
         else:
             return None
 
@@ -523,6 +592,7 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
             obj.calculation.start_date or obj.start_date,
             obj.calculation.end_date or obj.end_date,
             obj.apprenticeship_program,
+            past_benefit_index=self._get_past_benefit_index(),
         )
         if aggregated_info.months_remaining is None:
             last_possible_end_date = None
@@ -916,11 +986,10 @@ class BaseApplicationSerializer(DynamicFieldsModelSerializer):
 
     def get_latest_ahjo_status(self, obj) -> Union[str, None]:
         """Get the latest Ahjo status text for the application"""
-        try:
-            status = obj.ahjo_status.latest()
-        except AhjoStatus.DoesNotExist:
-            return None
-        return status.status
+        # the statuses are prefetched when listing applications, so latest() is not used
+        if statuses := obj.ahjo_status.all():
+            return max(statuses, key=operator.attrgetter("created_at")).status
+        return None
 
     @staticmethod
     def _get_available_benefit_types(
@@ -1417,6 +1486,12 @@ class HandlerApplicationSerializer(BaseApplicationSerializer):
     def get_handled_at(self, obj):
         return getattr(obj, "handled_at", None)
 
+    FIELD_PREFETCHES = {
+        **BaseApplicationSerializer.FIELD_PREFETCHES,
+        "calculation": ["calculation__handler__terms_of_service_approvals"],
+        "latest_decision_comment": ["log_entries"],
+    }
+
     class Meta(BaseApplicationSerializer.Meta):
         fields = BaseApplicationSerializer.Meta.fields + [
             "calculation",
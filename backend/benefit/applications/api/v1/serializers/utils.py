@@ -19,6 +19,16 @@ class DynamicFieldsModelSerializer(serializers.ModelSerializer):
         for field_name in existing - allowed:
             self.fields.pop(field_name)
 
+    @classmethod
+    def get_selected_field_names(cls, context):
+        """
+        Return the names of the fields that the serializer will output with the given context,
+        without instantiating the serializer.
+        """
+        fields = context.get("fields", []) or cls.Meta.fields
+        exclude_fields = context.get("exclude_fields", [])
+        return set(cls.Meta.fields) & set(fields) - set(exclude_fields)
+
 
 class ReadOnlySerializer(serializers.ModelSerializer):
     def __init__(self, *args, **kwargs):
@@ -1,5 +1,6 @@
+import itertools
 import re
-from typing import List
+from typing import Iterable, Iterator
 
 from django.conf import settings
 from django.core import exceptions
@@ -15,12 +16,14 @@ from django_filters.widgets import CSVWidget
 from drf_spectacular.utils import extend_schema
 from rest_framework import filters as drf_filters, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.parsers import MultiPartParser
 from rest_framework.renderers import TemplateHTMLRenderer
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from sql_util.aggregates import SubqueryCount
 
+from applications.api.v1.pagination import ApplicationKeysetPagination
 from applications.api.v1.serializers.application import (
     ApplicantApplicationSerializer,
     HandlerApplicationSerializer,
@@ -34,11 +37,12 @@ from applications.enums import (
 from applications.models import Application, ApplicationBatch
 from applications.services.ahjo_integration import (
     ExportFileInfo,
-    generate_zip,
+    generate_zip_stream,
+    iter_pdf_files,
     prepare_csv_file,
-    prepare_pdf_files,
 )
 from applications.services.applications_csv_report import ApplicationsCsvService
+from applications.services.applications_parquet_report import ApplicationsParquetService
 from applications.services.generate_application_summary import (
     generate_application_summary_file,
     get_context_for_summary_context,
@@ -155,11 +159,13 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
         """
         Convenience action for the frontends that by default excludes the fields that are not normally
         needed in application listing pages.
+
+        The list can be paginated with the page_size and cursor query parameters,
+        see ApplicationKeysetPagination.
         """
         context = self.get_serializer_context()
         qs = self._get_simplified_queryset(request, context)
-        serializer = self.serializer_class(qs, many=True, context=context)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._simplified_list_response(qs, request, context)
 
     @action(
         methods=("POST",),
@@ -191,6 +197,37 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
         serializer.save()
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == "list":
+            queryset = self._prefetch_for_serializer_fields(
+                queryset, self.get_serializer_context()
+            )
+        return queryset
+
+    def _prefetch_for_serializer_fields(self, queryset, context) -> QuerySet:
+        """Prefetch the related objects needed by the fields that are serialized"""
+        return queryset.prefetch_related(
+            *self.serializer_class.get_prefetch_lookups(context)
+        )
+
+    def _simplified_list_response(self, qs, request, context) -> Response:
+        """
+        The list is paginated only if the page_size query parameter is given, for backwards compatibility.
+        """
+        paginator = ApplicationKeysetPagination()
+        if (page := paginator.paginate_queryset(qs, request)) is not None:
+            serializer = self.serializer_class(page, many=True, context=context)
+            return paginator.get_paginated_response(serializer.data)
+        # same order as in the pages, so that applications with equal ordering values don't change places
+        try:
+            qs = qs.order_by(*paginator.get_ordering(qs))
+        except ValidationError:
+            # orderings that can't be paginated are still allowed in the whole list
+            pass
+        serializer = self.serializer_class(qs, many=True, context=context)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
     def _get_simplified_queryset(self, request, context) -> QuerySet:
         qs = self.filter_queryset(self.get_queryset())
         fields = set(context.get("fields", []))
@@ -214,7 +251,7 @@ class BaseApplicationViewSet(AuditLoggingModelViewSet):
 
         qs = qs.filter(archived=request.query_params.get("filter_archived") == "1")
 
-        return qs
+        return self._prefetch_for_serializer_fields(qs, context)
 
     def _get_attachment(self, attachment_pk):
         try:
@@ -383,8 +420,7 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             status=ApplicationStatus.DRAFT,
             application_origin=ApplicationOrigin.APPLICANT,
         )
-        serializer = self.serializer_class(qs, many=True, context=context)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return self._simplified_list_response(qs, request, context)
 
     @action(methods=["GET"], detail=False)
     def export_csv(self, request) -> StreamingHttpResponse:
@@ -392,11 +428,28 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
         filtered_queryset = self.filter_queryset(queryset)
         return self._csv_response(filtered_queryset)
 
+    @action(methods=["GET"], detail=False)
+    def export_parquet(self, request) -> StreamingHttpResponse:
+        queryset = self.filter_queryset(self.get_queryset())
+        parquet_service = ApplicationsParquetService(
+            queryset.order_by(self.APPLICATION_ORDERING)
+        )
+        response = StreamingHttpResponse(
+            parquet_service.get_parquet_stream(),
+            content_type="application/vnd.apache.parquet",
+        )
+        response[
+            "Content-Disposition"
+        ] = "attachment; filename={filename}.parquet".format(
+            filename=self._export_filename_without_suffix()
+        )
+        return response
+
     APPLICATION_ORDERING = "application_number"
 
     @action(methods=["GET"], detail=False)
     @transaction.atomic
-    def batch_pdf_files(self, request) -> HttpResponse:
+    def batch_pdf_files(self, request) -> StreamingHttpResponse:
         batch_id = request.query_params.get("batch_id")
         if batch_id:
             apps = Application.objects.filter(batch_id=batch_id)
@@ -414,16 +467,24 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
 
     @action(methods=["GET"], detail=False)
     @transaction.atomic
-    def export_new_accepted_applications_csv_pdf(self, request) -> HttpResponse:
+    def export_new_accepted_applications_csv_pdf(
+        self, request
+    ) -> StreamingHttpResponse:
         return self._csv_pdf_response(
-            self._create_application_batch(ApplicationStatus.ACCEPTED), True, True
+            self._create_application_batch(ApplicationStatus.ACCEPTED),
+            True,
+            True,
+            stream_pdf_files=False,
         )
 
     @action(methods=["GET"], detail=False)
     @transaction.atomic
-    def export_new_rejected_applications_csv_pdf(self, request) -> HttpResponse:
+    def export_new_rejected_applications_csv_pdf(
+        self, request
+    ) -> StreamingHttpResponse:
         return self._csv_pdf_response(
-            self._create_application_batch(ApplicationStatus.REJECTED)
+            self._create_application_batch(ApplicationStatus.REJECTED),
+            stream_pdf_files=False,
         )
 
     def _create_application_batch(self, status) -> QuerySet[Application]:
@@ -473,6 +534,8 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
 
     """Generate a response with a CSV file and PDF files containing application data.
         Optionally prune data and remove quotes from the CSV file for Talpa.
+        If stream_pdf_files is False, the PDF files are rendered before the response is
+        returned, so that a failing render rolls back the transaction of the view.
     """
 
     def _csv_pdf_response(
@@ -480,7 +543,8 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
         queryset: QuerySet[Application],
         prune_data_for_talpa: bool = False,
         remove_quotes: bool = False,
-    ) -> HttpResponse:
+        stream_pdf_files: bool = True,
+    ) -> StreamingHttpResponse:
         ordered_queryset = queryset.order_by(self.APPLICATION_ORDERING)
         export_filename_without_suffix = self._export_filename_without_suffix()
 
@@ -488,13 +552,20 @@ class HandlerApplicationViewSet(BaseApplicationViewSet):
             ordered_queryset, prune_data_for_talpa, export_filename_without_suffix
         )
 
-        pdf_files: List[ExportFileInfo] = prepare_pdf_files(ordered_queryset)
+        pdf_files: Iterable[ExportFileInfo] = iter_pdf_files(ordered_queryset)
+        if not stream_pdf_files:
+            # The applications of a new batch can't be exported again, so the batch must not be
+            # committed before all of its PDF files have been rendered successfully
+            pdf_files = list(pdf_files)
 
-        zip_file: bytes = generate_zip([csv_file] + pdf_files)
+        # the archive is compressed file by file while the response is streamed
+        zip_stream: Iterator[bytes] = generate_zip_stream(
+            itertools.chain([csv_file], pdf_files)
+        )
         zip_filename = f"{export_filename_without_suffix}.zip"
 
-        response: HttpResponse = HttpResponse(
-            zip_file, content_type="application/x-zip-compressed"
+        response = StreamingHttpResponse(
+            zip_stream, content_type="application/x-zip-compressed"
         )
         response["Content-Disposition"] = f"attachment; filename={zip_filename}"
         return response
@@ -1,17 +1,25 @@
+import functools
 import operator
+from collections import defaultdict
 from dataclasses import dataclass, field
 from decimal import Decimal
 from itertools import chain
-from typing import List, Optional, Union
+from typing import Iterable, List, Optional, Union
 
 from dateutil.relativedelta import relativedelta
+from django.db.models import Q
 from django.utils.text import format_lazy
 from django.utils.translation import gettext_lazy as _
 
 from applications.enums import ApplicationStatus
 from applications.models import Application
 from calculator.models import PreviousBenefit
-from common.utils import date_range_overlap, duration_in_months, pairwise
+from common.utils import (
+    date_range_overlap,
+    duration_in_months,
+    durations_in_months,
+    pairwise,
+)
 
 
 @dataclass
@@ -27,6 +35,82 @@ class FormerBenefitInfo:
 BENEFIT_WAITING_PERIOD_MONTHS = 24
 
 
+class PastBenefitIndex:
+    """
+    The past benefits of the employees of many applications, fetched with one query for the accepted
+    applications and one query for the PreviousBenefits.
+
+    Used when the former benefit info is needed for a list of applications, so that the past benefits
+    don't need to be queried separately for each application.
+    """
+
+    def __init__(self, applications: Iterable[Application]):
+        self._past_benefits = defaultdict(list)
+        # the employees of the index, including the ones without past benefits
+        self._keys = {
+            (application.company_id, application.employee.social_security_number)
+            for application in applications
+            if application.company_id and application.employee.social_security_number
+        }
+        if not self._keys:
+            return
+        company_ids = {company_id for company_id, _ssn in self._keys}
+        social_security_numbers = {ssn for _company_id, ssn in self._keys}
+        # SearchFields only support exact lookups, so the numbers are combined with OR
+        for accepted_application in Application.objects.filter(
+            functools.reduce(
+                operator.or_,
+                (
+                    Q(employee__social_security_number=ssn)
+                    for ssn in social_security_numbers
+                ),
+            ),
+            company_id__in=company_ids,
+            status=ApplicationStatus.ACCEPTED,
+        ).select_related("employee"):
+            self._past_benefits[
+                (
+                    accepted_application.company_id,
+                    accepted_application.employee.social_security_number,
+                )
+            ].append(accepted_application)
+        for previous_benefit in PreviousBenefit.objects.filter(
+            functools.reduce(
+                operator.or_,
+                (Q(social_security_number=ssn) for ssn in social_security_numbers),
+            ),
+            company_id__in=company_ids,
+        ):
+            self._past_benefits[
+                (previous_benefit.company_id, previous_benefit.social_security_number)
+            ].append(previous_benefit)
+
+    def get_past_benefits(
+        self, application, company, social_security_number, end_date
+    ) -> List[Union[PreviousBenefit, Application]]:
+        """Same as _get_past_benefits, but without database queries."""
+        key = (company.pk, social_security_number)
+        if key not in self._keys:
+            # the employee of the application was not included when the index was built
+            return _get_past_benefits(
+                application, company, social_security_number, end_date
+            )
+        return sorted(
+            (
+                benefit
+                for benefit in self._past_benefits[key]
+                if benefit.start_date <= end_date
+                and not (
+                    application
+                    and isinstance(benefit, Application)
+                    and benefit.pk == application.pk
+                )
+            ),
+            key=operator.attrgetter("start_date"),
+            reverse=True,
+        )  # most recent first
+
+
 def get_former_benefit_info(
     application,
     company,
@@ -34,12 +118,14 @@ def get_former_benefit_info(
     start_date,
     end_date,
     apprenticeship_program,
+    past_benefit_index: Optional[PastBenefitIndex] = None,
 ):
     # the application field values are separate parameters, because validation is done
     # before assigning values, and if a new Application is being created, an Application doesn't yet exist when
     # the rest framework does the validation.
     # The Application parameter is only used to ensure that the application being validated isn't validated
     # against itself.
+    # If past_benefit_index is given, the past benefits are looked up from it instead of the database.
 
     former_benefit_info = FormerBenefitInfo()
 
@@ -47,17 +133,24 @@ def get_former_benefit_info(
         # the employee info hasn't been entered yet
         return former_benefit_info
 
-    recent_benefits = _get_benefits_relevant_for_validation(
-        _get_past_benefits(application, company, social_security_number, end_date),
-        start_date,
-    )
+    if past_benefit_index is not None:
+        past_benefits = past_benefit_index.get_past_benefits(
+            application, company, social_security_number, end_date
+        )
+    else:
+        past_benefits = _get_past_benefits(
+            application, company, social_security_number, end_date
+        )
+    recent_benefits = _get_benefits_relevant_for_validation(past_benefits, start_date)
 
     former_benefit_info.warnings.extend(
         _get_benefit_overlap_warnings(recent_benefits, start_date, end_date)
     )
 
     former_benefit_info.months_used = sum(
-        benefit.duration_in_months for benefit in recent_benefits
+        durations_in_months(
+            (benefit.start_date, benefit.end_date) for benefit in recent_benefits
+        )
     )
     if apprenticeship_program:
         # Kanslia Helsinki-lisä Teams discussion 2021-12-09: there's no upper limit defined for
@@ -0,0 +1,18 @@
+import logging
+
+from django_extensions.management.jobs import HourlyJob
+
+from applications.services.pdf_render_cache import PdfRenderCache
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Job(HourlyJob):
+    help = (
+        "Delete the rendered PDF files that are older than PDF_RENDER_CACHE_MAX_AGE, and the "
+        "oldest files if the cache is larger than PDF_RENDER_CACHE_MAX_SIZE"
+    )
+
+    def execute(self):
+        deleted_count = PdfRenderCache().evict()
+        LOGGER.info(f"Deleted {deleted_count} files from the PDF render cache.")
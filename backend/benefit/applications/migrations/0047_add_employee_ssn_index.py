@@ -0,0 +1,17 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0046_add_ahjo_ids_to_application'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['social_security_number'], name='bf_applicat_social__da5807_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 3.2.23 on 2026-10-18 20:34
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0047_add_employee_ssn_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TalpaExportDelivery',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='time created')),
+                ('modified_at', models.DateTimeField(auto_now=True, verbose_name='time modified')),
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('modified_until', models.DateTimeField(verbose_name='batches modified until')),
+            ],
+            options={
+                'verbose_name': 'talpa export delivery',
+                'verbose_name_plural': 'talpa export deliveries',
+                'db_table': 'bf_applications_talpa_export_delivery',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='applicationbatch',
+            index=models.Index(fields=['modified_at'], name='bf_applicat_modifie_aebecb_idx'),
+        ),
+        migrations.AddField(
+            model_name='talpaexportdelivery',
+            name='previous',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='next', to='applications.talpaexportdelivery', verbose_name='previous delivery'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("applications", "0048_talpa_export_delivery"),
+    ]
+
+    operations = [
+        # The one-to-one previous field makes the following deliveries unique, but NULL values
+        # are not unique in PostgreSQL, so there could be many first deliveries. The constant
+        # expression index allows only one row without a previous delivery, which can't be
+        # given in the model Meta with Django 3.2.
+        migrations.RunSQL(
+            "CREATE UNIQUE INDEX bf_applications_talpa_export_delivery_first_idx "
+            "ON bf_applications_talpa_export_delivery ((previous_id IS NULL)) "
+            "WHERE previous_id IS NULL",
+            "DROP INDEX bf_applications_talpa_export_delivery_first_idx",
+        )
+    ]
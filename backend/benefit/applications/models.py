@@ -1,4 +1,6 @@
+import operator
 from datetime import date, datetime
+from typing import Optional
 
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
@@ -404,13 +406,14 @@ class Application(UUIDModel, TimeStampedModel, DurationMixin):
         return f"{self.company_contact_person_first_name} {self.company_contact_person_last_name}"
 
     def get_log_entry_field(self, to_statuses, field_name):
-        if (
-            log_entry := self.log_entries.filter(to_status__in=to_statuses)
-            .order_by(
-                "-created_at"
-            )  # the latest transition to one of the statuses listed in to_statuses
-            .first()
-        ):
+        # filtered in Python, so that log entries prefetched for a list of applications are used
+        if log_entries := [
+            log_entry
+            for log_entry in self.log_entries.all()
+            if log_entry.to_status in to_statuses
+        ]:
+            # the latest transition to one of the statuses listed in to_statuses
+            log_entry = max(log_entries, key=operator.attrgetter("created_at"))
             return getattr(log_entry, field_name)
         else:
             return None
@@ -681,6 +684,59 @@ class ApplicationBatch(UUIDModel, TimeStampedModel):
         db_table = "bf_applicationbatch"
         verbose_name = _("application batch")
         verbose_name_plural = _("application batches")
+        indexes = [models.Index(fields=["modified_at"])]
+
+
+class TalpaExportDelivery(UUIDModel, TimeStampedModel):
+    """
+    One delivery of the incremental Talpa export. The id of the delivery is the cursor that the
+    Talpa robot sends to get the next delivery, which contains the accepted batches modified after
+    this delivery, up to modified_until. The next delivery is created once and then returned again
+    on the later requests with the same cursor, so an interrupted download can be retried and gets
+    the same applications. modified_until lags behind the creation time by
+    TALPA_EXPORT_DELIVERY_DELAY, so that the batches of transactions that are still open when the
+    delivery is created are left for the next delivery.
+    """
+
+    previous = models.OneToOneField(
+        "self",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="next",
+        verbose_name=_("previous delivery"),
+    )
+    modified_until = models.DateTimeField(
+        verbose_name=_("batches modified until"),
+    )
+
+    EXPORTED_BATCH_STATUSES = [
+        ApplicationBatchStatus.DECIDED_ACCEPTED,
+        ApplicationBatchStatus.SENT_TO_TALPA,
+        ApplicationBatchStatus.COMPLETED,
+    ]
+
+    @property
+    def modified_after(self) -> Optional[datetime]:
+        return self.previous.modified_until if self.previous else None
+
+    def get_batches(self):
+        batches = ApplicationBatch.objects.filter(
+            status__in=self.EXPORTED_BATCH_STATUSES,
+            modified_at__lte=self.modified_until,
+        )
+        if self.previous:
+            batches = batches.filter(modified_at__gt=self.modified_after)
+        return batches
+
+    def __str__(self):
+        return f"Talpa export delivery {self.modified_after} - {self.modified_until}"
+
+    class Meta:
+        db_table = "bf_applications_talpa_export_delivery"
+        verbose_name = _("talpa export delivery")
+        verbose_name_plural = _("talpa export deliveries")
+        ordering = ["created_at"]
 
 
 class ApplicationBasis(UUIDModel, TimeStampedModel):
@@ -827,6 +883,10 @@ class Employee(UUIDModel, TimeStampedModel):
         db_table = "bf_applications_employee"
         verbose_name = _("employee")
         verbose_name_plural = _("employees")
+        indexes = [
+            # used for looking up the former benefits of the employee
+            models.Index(fields=["social_security_number"]),
+        ]
 
 
 class Attachment(UUIDModel, TimeStampedModel):
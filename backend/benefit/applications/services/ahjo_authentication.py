@@ -2,11 +2,11 @@ from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Dict, Union
 
-import requests
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
 
 from applications.models import AhjoSetting
+from shared.common.http_client import HttpClient
 
 
 @dataclass
@@ -16,7 +16,9 @@ class AhjoToken:
     expires_in: datetime = datetime.now()
 
 
-class AhjoConnector:
+class AhjoConnector(HttpClient):
+    integration = "ahjo"
+
     def __init__(self) -> None:
         self.token_url: str = settings.AHJO_TOKEN_URL
         self.client_id: str = settings.AHJO_CLIENT_ID
@@ -28,7 +30,6 @@ class AhjoConnector:
         self.headers: Dict[str, str] = {
             "Content-Type": "application/x-www-form-urlencoded",
         }
-        self.timeout: int = 10
 
     def is_configured(self) -> bool:
         """Check if all required config options are set"""
@@ -84,9 +85,7 @@ class AhjoConnector:
 
     def do_token_request(self, payload: Dict[str, str]) -> AhjoToken:
         # Make the POST request
-        response = requests.post(
-            self.token_url, headers=self.headers, data=payload, timeout=self.timeout
-        )
+        response = self.post(self.token_url, headers=self.headers, data=payload)
 
         # Check if the request was successful
         if response.status_code == 200:
@@ -1,15 +1,15 @@
 import json
 import logging
 import os
+import time
 import uuid
 import zipfile
-from collections import defaultdict
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from io import BytesIO
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 
 import jinja2
-import pdfkit
 import requests
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
@@ -21,13 +21,15 @@ from applications.models import AhjoSetting, AhjoStatus, Application
 from applications.services.ahjo_authentication import AhjoConnector
 from applications.services.ahjo_payload import prepare_open_case_payload
 from applications.services.applications_csv_report import ApplicationsCsvService
+from applications.services.pdf_render_cache import PdfRenderCache
+from common.utils import StreamBuffer
 from companies.models import Company
 
 
 @dataclass
 class ExportFileInfo:
     filename: str
-    file_content: bytes
+    file_content: Optional[bytes]
     html_content: str
 
 
@@ -160,7 +162,9 @@ def _get_granted_as_de_minimis_aid(app):
     return False
 
 
-def gather_accepted_files(accepted_apps, accepted_groups, attachment_number):
+def gather_accepted_files(
+    accepted_apps, accepted_groups, attachment_number, render_pdf=True
+):
     accepted_files: List[ExportFileInfo] = []
     for app in accepted_apps:
         accepted_groups[app.company].append(app)
@@ -181,28 +185,30 @@ def gather_accepted_files(accepted_apps, accepted_groups, attachment_number):
         if apps_pay_as_default:
             accepted_files.append(
                 generate_single_approved_file(
-                    group, apps_pay_as_default, attachment_number
+                    group, apps_pay_as_default, attachment_number, render_pdf
                 )
             )
             attachment_number += 1
         if apps_pay_as_de_minimis:
             accepted_files.append(
                 generate_single_approved_file(
-                    group, apps_pay_as_de_minimis, attachment_number
+                    group, apps_pay_as_de_minimis, attachment_number, render_pdf
                 )
             )
             attachment_number += 1
     return accepted_files, attachment_number
 
 
-def gather_rejected_files(rejected_apps, rejected_groups, attachment_number):
+def gather_rejected_files(
+    rejected_apps, rejected_groups, attachment_number, render_pdf=True
+):
     rejected_files: List[ExportFileInfo] = []
     for app in rejected_apps:
         rejected_groups[app.company].append(app)
     for group, grouped_rejected_apps in rejected_groups.items():
         rejected_files.append(
             generate_single_declined_file(
-                group, grouped_rejected_apps, attachment_number
+                group, grouped_rejected_apps, attachment_number, render_pdf
             )
         )
         attachment_number += 1
@@ -210,7 +216,16 @@ def gather_rejected_files(rejected_apps, rejected_groups, attachment_number):
 
 
 def prepare_pdf_files(apps: QuerySet[Application]) -> List[ExportFileInfo]:
-    pdf_files: List[ExportFileInfo] = []
+    return list(iter_pdf_files(apps))
+
+
+def iter_pdf_files(apps: QuerySet[Application]) -> Iterator[ExportFileInfo]:
+    """
+    Render the decision PDF files of the applications and yield them in the attachment order.
+    The HTML of the files is rendered first in the calling thread, as the templates access the
+    database, and the PDFs are then rendered concurrently with render_pdf_files().
+    """
+    html_files: List[ExportFileInfo] = []
 
     # SINGLE COMPANY/ASSOCIATION PER DECISION PER FILE
     accepted_apps: List[Application] = [
@@ -221,10 +236,11 @@ def prepare_pdf_files(apps: QuerySet[Application]) -> List[ExportFileInfo]:
     ]
 
     # COMPOSED FILES
-    pdf_files += generate_composed_files(
+    html_files += generate_composed_files(
         accepted_apps,
         rejected_apps,
         1,
+        render_pdf=False,
     )
 
     # Start with three as Liite 1 and 2 is fixed for public/secret record
@@ -232,16 +248,60 @@ def prepare_pdf_files(apps: QuerySet[Application]) -> List[ExportFileInfo]:
 
     if accepted_apps:
         app_files, attachment_number = gather_accepted_files(
-            accepted_apps, defaultdict(list), attachment_number
+            accepted_apps, defaultdict(list), attachment_number, render_pdf=False
         )
-        pdf_files += app_files
+        html_files += app_files
     if rejected_apps:
         app_files, attachment_number = gather_rejected_files(
-            rejected_apps, defaultdict(list), attachment_number
+            rejected_apps, defaultdict(list), attachment_number, render_pdf=False
         )
-        pdf_files += app_files
+        html_files += app_files
+
+    yield from render_pdf_files(html_files)
+
+    LOGGER.info(f"PDF render cache statistics: {PdfRenderCache.get_stats()}")
+
+
+def _render_pdf_file(
+    cache: PdfRenderCache, file_info: ExportFileInfo
+) -> ExportFileInfo:
+    start = time.monotonic()
+    file_info.file_content = cache.render(file_info.html_content)
+    LOGGER.info(
+        f"Rendered {file_info.filename} in {time.monotonic() - start:.2f} seconds"
+    )
+    return file_info
+
+
+def render_pdf_files(
+    files: Iterable[ExportFileInfo], max_workers: Optional[int] = None
+) -> Iterator[ExportFileInfo]:
+    """
+    Render the PDF content of the files from their HTML content with a pool of
+    PDF_RENDER_MAX_WORKERS threads. Each thread waits for its own wkhtmltopdf process, so the
+    files are rendered in parallel. The files are yielded in the given order, which keeps the
+    attachment numbering of the export, and at most two files per worker are rendered ahead of
+    the consumer.
+    """
+    if max_workers is None:
+        max_workers = settings.PDF_RENDER_MAX_WORKERS
+    cache = PdfRenderCache()
+
+    if max_workers <= 1:
+        for file_info in files:
+            yield _render_pdf_file(cache, file_info)
+        return
 
-    return pdf_files
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="pdf-render"
+    ) as executor:
+        pending = deque()
+        for file_info in files:
+            pending.append(executor.submit(_render_pdf_file, cache, file_info))
+            if len(pending) >= 2 * max_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def prepare_csv_file(
@@ -268,7 +328,12 @@ def generate_pdf(
     template_config: dict,
     attachment_number: int,
     company: Optional[Company] = None,
+    render_pdf: bool = True,
 ) -> ExportFileInfo:
+    """
+    Render the HTML of the file from the template. The PDF content is left empty if render_pdf is
+    False, so that it can be rendered later with render_pdf_files().
+    """
     template = _get_template(template_config["path"])
     file_name: str = template_config["file_name"]
 
@@ -283,24 +348,31 @@ def generate_pdf(
     html: str = template.render({**template_config["context"], "apps": apps})
     return ExportFileInfo(
         filename=file_name,
-        file_content=pdfkit.from_string(html, False),
+        file_content=PdfRenderCache().render(html) if render_pdf else None,
         html_content=html,
     )
 
 
 def generate_single_declined_file(
-    company: Company, apps: List[Application], attachment_number: int
+    company: Company,
+    apps: List[Application],
+    attachment_number: int,
+    render_pdf: bool = True,
 ) -> ExportFileInfo:
     return generate_pdf(
         apps=apps,
         template_config=JINJA_TEMPLATES_SINGLE[TEMPLATE_ID_BENEFIT_DECLINED],
         company=company,
         attachment_number=attachment_number,
+        render_pdf=render_pdf,
     )
 
 
 def generate_single_approved_file(
-    company: Company, apps: List[Application], attachment_number: int
+    company: Company,
+    apps: List[Application],
+    attachment_number: int,
+    render_pdf: bool = True,
 ) -> ExportFileInfo:
     return generate_pdf(
         apps=apps,
@@ -311,6 +383,7 @@ def generate_single_approved_file(
         ],
         company=company,
         attachment_number=attachment_number,
+        render_pdf=render_pdf,
     )
 
 
@@ -318,6 +391,7 @@ def generate_composed_files(
     accepted_apps: List[Application],
     rejected_apps: List[Application],
     attachment_number: int,
+    render_pdf: bool = True,
 ) -> List[ExportFileInfo]:
     return [
         generate_pdf(
@@ -325,6 +399,7 @@ def generate_composed_files(
             template_config=JINJA_TEMPLATES_COMPOSED[template_id],
             company=None,
             attachment_number=attachment_number,
+            render_pdf=render_pdf,
         )
         for template_id in COMPOSED_ACCEPTED_TEMPLATE_IDS
         if accepted_apps
@@ -334,23 +409,37 @@ def generate_composed_files(
             template_config=JINJA_TEMPLATES_COMPOSED[template_id],
             company=None,
             attachment_number=attachment_number,
+            render_pdf=render_pdf,
         )
         for template_id in COMPOSED_DECLINED_TEMPLATE_IDS
         if rejected_apps
     ]
 
 
-def generate_zip(files: List[ExportFileInfo]) -> bytes:
-    mem_zip = BytesIO()
-
-    with zipfile.ZipFile(mem_zip, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+def generate_zip_stream(files: Iterable[ExportFileInfo]) -> Iterator[bytes]:
+    """
+    Yield the ZIP archive of the files in chunks, one compressed file at a time, so that only one
+    file of the archive is kept in memory. The stream is not seekable, so the sizes of the files
+    are written after the file data, in the data descriptors.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
         for f in files:
             zf.writestr(f.filename, f.file_content)
+            yield buffer.take()
+    # the central directory is written when the archive is closed
+    yield buffer.take()
+
 
-    return mem_zip.getvalue()
+def generate_zip(files: List[ExportFileInfo]) -> bytes:
+    return b"".join(generate_zip_stream(files))
 
 
 def export_application_batch(batch) -> bytes:
+    return b"".join(stream_application_batch_export(batch))
+
+
+def stream_application_batch_export(batch) -> Iterator[bytes]:
     apps = (
         batch.applications.select_related("company")
         .select_related("employee")
@@ -358,8 +447,7 @@ def export_application_batch(batch) -> bytes:
         .all()
     )
 
-    pdf_files: List[ExportFileInfo] = prepare_pdf_files(apps)
-    return generate_zip(pdf_files)
+    return generate_zip_stream(iter_pdf_files(apps))
 
 
 def get_token() -> str:
@@ -426,7 +514,7 @@ def do_ahjo_request_with_json_payload(
     json_data = json.dumps(data)
 
     try:
-        response = requests.post(
+        response = AhjoConnector().post(
             f"{url}/cases", headers=headers, timeout=timeout, data=json_data
         )
         response.raise_for_status()
@@ -1,12 +1,18 @@
+import itertools
+from functools import cached_property
+
+from django.db.models import prefetch_related_objects, QuerySet
 from django.utils import translation
 
 from applications.enums import BenefitType
+from applications.models import Application
 from applications.services.csv_export_base import (
     CsvColumn,
     CsvExportBase,
     get_organization_type,
     nested_queryset_attr,
 )
+from calculator.models import Calculation
 
 
 def csv_default_column(*args, **kwargs):
@@ -30,7 +36,7 @@ def get_export_notes(application):
         notes.append("osa de minimis -tuista puuttuu raportilta")
     if application.pay_subsidies.count() > ApplicationsCsvService.MAX_PAY_SUBSIDIES:
         notes.append("osa palkkatuista puuttuu raportilta")
-    if application.ahjo_rows.count() > ApplicationsCsvService.MAX_AHJO_ROWS:
+    if len(application.ahjo_rows) > ApplicationsCsvService.MAX_AHJO_ROWS:
         notes.append("osa Ahjo-riveistä puuttuu raportilta")
     return ", ".join(notes)
 
@@ -61,6 +67,20 @@ def current_ahjo_row_field_getter(field_name):
                 return getattr(rows[item.application_row_idx - 1], field_name)
         return ""
 
+    getter.field_path = f"calculation.rows.{field_name}"
+    return getter
+
+
+def ahjo_row_field_getter(row_idx, field_name):
+    # ahjo_rows may be a list prefetched with Calculation.prefetch_ahjo_rows, so it is indexed
+    # instead of using nested_queryset_attr
+    def getter(item):
+        rows = list(item.ahjo_rows)
+        if row_idx < len(rows):
+            return getattr(rows[row_idx], field_name)
+        return ""
+
+    getter.field_path = f"calculation.rows.{field_name}"
     return getter
 
 
@@ -79,12 +99,24 @@ class ApplicationsCsvService(CsvExportBase):
 
     """
 
+    # the related objects read by the columns, fetched with one query each for all the applications
+    PREFETCH_LOOKUPS = [
+        "company",
+        "employee",
+        "calculation",
+        "batch",
+        "pay_subsidies",
+        "de_minimis_aid_set",
+        "log_entries",
+    ]
+    TALPA_PREFETCH_LOOKUPS = ["company", "calculation", "batch"]
+
     def __init__(self, applications, prune_data_for_talpa=False):
         self.applications = applications
         self.export_notes = []
         self.prune_data_for_talpa = prune_data_for_talpa
 
-    @property
+    @cached_property
     def CSV_COLUMNS(self):
         calculated_benefit_amount = "calculation.calculated_benefit_amount"
         """Return only columns that are needed for Talpa"""
@@ -300,27 +332,27 @@ class ApplicationsCsvService(CsvExportBase):
                 [
                     CsvColumn(
                         f"Ahjo-rivi {idx + 1} / tyyppi",
-                        nested_queryset_attr("ahjo_rows", idx, "row_type"),
+                        ahjo_row_field_getter(idx, "row_type"),
                     ),
                     CsvColumn(
                         f"Ahjo-rivi {idx + 1} / teksti",
-                        nested_queryset_attr("ahjo_rows", idx, "description_fi"),
+                        ahjo_row_field_getter(idx, "description_fi"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / määrä eur yht",
-                        nested_queryset_attr("ahjo_rows", idx, "amount"),
+                        ahjo_row_field_getter(idx, "amount"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / määrä eur kk",
-                        nested_queryset_attr("ahjo_rows", idx, "monthly_amount"),
+                        ahjo_row_field_getter(idx, "monthly_amount"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / alkupäivä",
-                        nested_queryset_attr("ahjo_rows", idx, "start_date"),
+                        ahjo_row_field_getter(idx, "start_date"),
                     ),
                     csv_default_column(
                         f"Ahjo-rivi {idx + 1} / päättymispäivä",
-                        nested_queryset_attr("ahjo_rows", idx, "end_date"),
+                        ahjo_row_field_getter(idx, "end_date"),
                     ),
                 ]
             )
@@ -381,12 +413,52 @@ class ApplicationsCsvService(CsvExportBase):
     MAX_PAY_SUBSIDIES = 2
     MAX_DE_MINIMIS_AIDS = 5
 
+    # number of applications fetched and prefetched at a time
+    CHUNK_SIZE = 500
+
     def get_applications(self):
         return self.applications
 
+    def prefetch_related_data(self, applications):
+        """
+        Fetch the related objects of the applications up front, so that the columns read them
+        from memory instead of querying them for each application.
+        """
+        if not applications or not isinstance(applications[0], Application):
+            return
+        prefetch_related_objects(
+            applications,
+            *(
+                self.TALPA_PREFETCH_LOOKUPS
+                if self.prune_data_for_talpa
+                else self.PREFETCH_LOOKUPS
+            ),
+        )
+        if not self.prune_data_for_talpa:
+            Calculation.prefetch_ahjo_rows(
+                application.calculation
+                for application in applications
+                if hasattr(application, "calculation")
+            )
+
+    def iter_applications(self):
+        """
+        Iterate the applications in chunks of CHUNK_SIZE with a server-side cursor, and fetch the
+        related data of each chunk before it is exported. This way, the memory used by the export
+        does not grow with the number of applications.
+        """
+        applications = self.get_applications()
+        if isinstance(applications, QuerySet):
+            applications = applications.iterator(chunk_size=self.CHUNK_SIZE)
+        else:
+            applications = iter(applications)
+        while chunk := list(itertools.islice(applications, self.CHUNK_SIZE)):
+            self.prefetch_related_data(chunk)
+            yield from chunk
+
     def get_row_items(self):
         with translation.override("fi"):
-            for application in self.get_applications():
+            for application in self.iter_applications():
                 # for applications with multiple ahjo rows, output the same number of rows.
                 # If no Ahjo rows (calculation incomplete), always output just one row.
                 if self.prune_data_for_talpa:
@@ -406,11 +478,15 @@ class ApplicationsCsvService(CsvExportBase):
                     yield application
 
     def get_csv_cell_list_lines_generator(self):
-        if self.get_applications():
-            yield from super().get_csv_cell_list_lines_generator()
-        else:
-            header_row = self._get_header_row()
-            yield header_row
+        # the applications are not fetched in advance to find out if there are any
+        lines = super().get_csv_cell_list_lines_generator()
+        header_row = next(lines)
+        yield header_row
+        has_applications = False
+        for line in lines:
+            has_applications = True
+            yield line
+        if not has_applications:
             yield ["Ei löytynyt ehdot täyttäviä hakemuksia"] + [""] * (
                 len(header_row) - 1
             )
@@ -4,12 +4,14 @@ import decimal
 import operator
 from dataclasses import dataclass
 from io import StringIO
-from typing import Any, Callable, Generator, List, Union
+from typing import Any, Callable, Generator, List, Tuple, Union
 
 from applications.enums import OrganizationType
 
 NO_DEFAULT_VALUE = object()
 
+CSV_CELL_TYPES = (str, int, decimal.Decimal, datetime.date)
+
 
 @dataclass
 class CsvColumn:
@@ -39,19 +41,61 @@ def nested_queryset_attr(
     * dotted attribute access (like "a.b" is supported for attr_name and nested_attr_name
     """
 
+    get_related = operator.attrgetter(related_name)
+    get_nested_attr = operator.attrgetter(nested_attr_name)
+
     def getter(item):
         try:
-            nested_obj = operator.attrgetter(related_name)(item).all()[queryset_idx]
-            return operator.attrgetter(nested_attr_name)(nested_obj)
+            nested_obj = get_related(item).all()[queryset_idx]
+            return get_nested_attr(nested_obj)
         except (
             AttributeError,
             IndexError,
         ):
             return default_value
 
+    # the path of the model field, used for resolving the type of the column
+    getter.field_path = f"{related_name}.{nested_attr_name}"
     return getter
 
 
+def compile_csv_column(column: CsvColumn) -> Callable[[Any], Any]:
+    """
+    Return a function that takes an item and returns the value of the column's cell for it.
+    The attribute getter, the default value and the formatter of the column are resolved here once,
+    so that they are not looked up again for every row.
+    """
+    formatter = column.formatter
+    default_value = column.default_value
+    has_default_value = default_value is not NO_DEFAULT_VALUE
+
+    if callable(column.cell_data_source):
+        get_value = column.cell_data_source
+    elif has_default_value:
+        get_attr = operator.attrgetter(column.cell_data_source)
+
+        def get_value(item):
+            try:
+                return get_attr(item)
+            except AttributeError:
+                return None
+
+    else:
+        get_value = operator.attrgetter(column.cell_data_source)
+
+    def get_cell_value(item):
+        cell_value = get_value(item)
+        if cell_value is None and has_default_value:
+            cell_value = default_value
+        if formatter:
+            cell_value = formatter(cell_value)
+        if not isinstance(cell_value, CSV_CELL_TYPES):
+            raise ValueError("Invalid type in CSV export")
+        return cell_value
+
+    return get_cell_value
+
+
 class CsvExportBase:
     """
     Common code for CSV export interfaces.
@@ -90,33 +134,16 @@ class CsvExportBase:
           and the resulting value is used to construct the CSV cell value
         * if cell_data_source is a string, then it is treated as a dotted attribute reference (like "x" or "a.b")
           and the corresponding attribute should be found in the item
+        The columns are compiled once per export with get_compiled_columns.
         """
         yield self._get_header_row()
+        cell_getters = self.get_compiled_columns()
         for item in self.get_row_items():
-            line = []
-            for column in self.CSV_COLUMNS:
-                if callable(column.cell_data_source):
-                    cell_value = column.cell_data_source(item)
-                else:
-                    cell_value = None
-                    try:
-                        cell_value = operator.attrgetter(column.cell_data_source)(item)
-                    except AttributeError:
-                        if column.default_value is NO_DEFAULT_VALUE:
-                            raise
-
-                if cell_value is None and column.default_value is not NO_DEFAULT_VALUE:
-                    cell_value = column.default_value
-
-                if column.formatter:
-                    # most common case: a dotted property like company.name
-                    cell_value = column.formatter(cell_value)
-                if not isinstance(
-                    cell_value, (str, int, decimal.Decimal, datetime.date)
-                ):
-                    raise ValueError("Invalid type in CSV export")
-                line.append(cell_value)
-            yield line
+            yield [get_cell_value(item) for get_cell_value in cell_getters]
+
+    def get_compiled_columns(self) -> Tuple[Callable[[Any], Any], ...]:
+        """Return the cell value getters of CSV_COLUMNS, see compile_csv_column."""
+        return tuple(compile_csv_column(column) for column in self.CSV_COLUMNS)
 
     def get_csv_string_lines_generator(
         self, remove_quotes: bool = False, add_bom: bool = False
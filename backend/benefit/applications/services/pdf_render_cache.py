@@ -0,0 +1,153 @@
+import functools
+import hashlib
+import logging
+import os
+import threading
+from datetime import timedelta
+from typing import Optional
+
+import pdfkit
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage, Storage
+from django.utils import timezone
+
+LOGGER = logging.getLogger(__name__)
+
+PDF_TEMPLATE_PATH = os.path.join(os.path.dirname(__file__), "pdf_templates")
+
+
+@functools.lru_cache(maxsize=None)
+def get_template_version(template_path: str = PDF_TEMPLATE_PATH) -> str:
+    """
+    Hash of all the files in the template directory. The rendered HTML refers to the stylesheets and
+    images in the directory, so a change in any of them must invalidate the cached PDFs.
+    """
+    sha256 = hashlib.sha256()
+    for root, dirs, files in os.walk(template_path):
+        dirs.sort()
+        for file_name in sorted(files):
+            path = os.path.join(root, file_name)
+            sha256.update(os.path.relpath(path, template_path).encode())
+            with open(path, "rb") as f:
+                sha256.update(f.read())
+    return sha256.hexdigest()
+
+
+class PdfRenderCache:
+    """
+    Content-addressed cache for the PDF files rendered from HTML with wkhtmltopdf.
+
+    The cache key is a hash of the rendered HTML and the template version, so an unchanged
+    document is never rendered twice. The PDFs are stored in the default file storage. The PDFs
+    contain personal data of the applicants, so the files older than PDF_RENDER_CACHE_MAX_AGE are
+    deleted, and when the total size exceeds PDF_RENDER_CACHE_MAX_SIZE, the oldest files are
+    deleted first. The file storages don't keep track of access times, so the eviction is by the
+    time the file was stored. The eviction is run by the hourly job evict_pdf_render_cache.
+    Setting PDF_RENDER_CACHE_MAX_SIZE to 0 disables the cache.
+
+    The hit and miss counts of the process are available with get_stats().
+    """
+
+    directory = "pdf_render_cache"
+
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    def __init__(
+        self,
+        storage: Optional[Storage] = None,
+        max_size: Optional[int] = None,
+        max_age: Optional[int] = None,
+    ):
+        self.storage = storage or default_storage
+        self.max_size = (
+            settings.PDF_RENDER_CACHE_MAX_SIZE if max_size is None else max_size
+        )
+        self.max_age = settings.PDF_RENDER_CACHE_MAX_AGE if max_age is None else max_age
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def get_key(self, html: str) -> str:
+        sha256 = hashlib.sha256(get_template_version().encode())
+        sha256.update(html.encode("utf-8"))
+        return sha256.hexdigest()
+
+    def _get_path(self, key: str) -> str:
+        return f"{self.directory}/{key}.pdf"
+
+    def render(self, html: str) -> bytes:
+        """Return the PDF rendered from the HTML, from the cache if possible."""
+        if not self.enabled:
+            return pdfkit.from_string(html, False)
+
+        path = self._get_path(self.get_key(html))
+        if self.storage.exists(path):
+            with self.storage.open(path, "rb") as f:
+                content = f.read()
+            self._count(hit=True)
+            return content
+
+        self._count(hit=False)
+        content = pdfkit.from_string(html, False)
+        saved_path = self.storage.save(path, ContentFile(content))
+        if saved_path != path:
+            # Rendered concurrently by another worker, and the storage saved this copy with
+            # another name. The files of the same key have the same content, so one is kept.
+            self.storage.delete(saved_path)
+        return content
+
+    def evict(self) -> int:
+        """
+        Delete the files older than max_age, and then the oldest files until the total size of the
+        cache is within the limit. All the files are deleted if the cache is disabled. Every file
+        of the cache is checked, so this is not run on each export.
+
+        :return: The number of deleted files.
+        """
+        if not self.storage.exists(self.directory):
+            return 0
+        expired_before = timezone.now() - timedelta(seconds=self.max_age)
+        _, file_names = self.storage.listdir(self.directory)
+        files = []
+        total_size = 0
+        deleted_count = 0
+        for file_name in file_names:
+            path = f"{self.directory}/{file_name}"
+            modified_time = self.storage.get_modified_time(path)
+            if modified_time < expired_before:
+                self.storage.delete(path)
+                deleted_count += 1
+                continue
+            size = self.storage.size(path)
+            files.append((modified_time, size, path))
+            total_size += size
+        for _, size, path in sorted(files):
+            if total_size <= self.max_size:
+                break
+            self.storage.delete(path)
+            total_size -= size
+            deleted_count += 1
+        return deleted_count
+
+    @classmethod
+    def _count(cls, hit: bool):
+        with cls._stats_lock:
+            if hit:
+                cls._hits += 1
+            else:
+                cls._misses += 1
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._stats_lock:
+            return {"hits": cls._hits, "misses": cls._misses}
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._stats_lock:
+            cls._hits = 0
+            cls._misses = 0
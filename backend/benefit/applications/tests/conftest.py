@@ -28,6 +28,18 @@ from terms.tests.conftest import *  # noqa
 from terms.tests.factories import TermsOfServiceApprovalFactory
 
 
+@pytest.fixture(autouse=True)
+def disable_pdf_render_cache(settings):
+    # the PDF rendering is mocked in the tests, so the rendered files must not be reused between tests
+    settings.PDF_RENDER_CACHE_MAX_SIZE = 0
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # the rendered PDFs and the attachments are written to a temporary directory, not to var/media
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+
+
 @pytest.fixture
 def anonymous_application():
     with factory.Faker.override_default_locale("fi_FI"):
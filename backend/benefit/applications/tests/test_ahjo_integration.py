@@ -1,14 +1,19 @@
 import io
+import os
+import time
 import uuid
 import zipfile
-from datetime import date
+from datetime import date, timedelta
 from typing import List
 from unittest.mock import patch
 
 import pytest
 from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
 from django.http import FileResponse
 from django.urls import reverse
+from django.utils import timezone
 
 from applications.api.v1.ahjo_integration_views import AhjoAttachmentView
 from applications.enums import (
@@ -25,9 +30,13 @@ from applications.services.ahjo_integration import (
     generate_composed_files,
     generate_single_approved_file,
     generate_single_declined_file,
+    generate_zip_stream,
     get_application_for_ahjo,
+    prepare_pdf_files,
     REJECTED_TITLE,
+    render_pdf_files,
 )
+from applications.services.pdf_render_cache import PdfRenderCache
 from applications.tests.factories import ApplicationFactory, DecidedApplicationFactory
 from calculator.models import Calculation
 from calculator.tests.factories import PaySubsidyFactory
@@ -71,7 +80,7 @@ def _assert_html_content(html, include_keys=(), excluded_keys=()):
         (YtjOrganizationCode.COMPANY_FORM_CODE_DEFAULT, "oy", True),
     ],
 )
-@patch("applications.services.ahjo_integration.pdfkit.from_string")
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
 def test_generate_single_approved_template_html(
     mock_pdf_convert,
     company_form_code: YtjOrganizationCode,
@@ -113,7 +122,7 @@ def test_generate_single_approved_template_html(
     ) == should_show_de_minimis_aid_footer
 
 
-@patch("applications.services.ahjo_integration.pdfkit.from_string")
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
 def test_generate_single_declined_template_html(mock_pdf_convert):
     mock_pdf_convert.return_value = {}
     company = CompanyFactory()
@@ -143,7 +152,7 @@ def test_generate_single_declined_template_html(mock_pdf_convert):
     )
 
 
-@patch("applications.services.ahjo_integration.pdfkit.from_string")
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
 def test_generate_composed_template_html(mock_pdf_convert):
     mock_pdf_convert.return_value = {}
     accepted_app_1 = DecidedApplicationFactory(
@@ -233,7 +242,227 @@ def test_export_application_batch(application_batch):
     )
 
 
-@patch("applications.services.ahjo_integration.pdfkit.from_string")
+@pytest.fixture
+def pdf_render_cache_storage(settings, tmp_path):
+    settings.PDF_RENDER_CACHE_MAX_SIZE = 1024 * 1024
+    PdfRenderCache.reset_stats()
+    storage = FileSystemStorage(location=tmp_path)
+    with patch("applications.services.pdf_render_cache.default_storage", storage):
+        yield storage
+
+
+def _fake_pdf(html, _output_path):
+    return f"PDF {html}".encode()
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_pdf_render_cache(mock_pdf_convert, pdf_render_cache_storage):
+    mock_pdf_convert.side_effect = _fake_pdf
+    cache = PdfRenderCache()
+
+    assert cache.render("<p>first</p>") == b"PDF <p>first</p>"
+    assert cache.render("<p>first</p>") == b"PDF <p>first</p>"
+    assert cache.render("<p>second</p>") == b"PDF <p>second</p>"
+
+    assert mock_pdf_convert.call_count == 2
+    assert PdfRenderCache.get_stats() == {"hits": 1, "misses": 2}
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_pdf_render_cache_concurrent_render(mock_pdf_convert, pdf_render_cache_storage):
+    cache = PdfRenderCache()
+    path = cache._get_path(cache.get_key("<p>first</p>"))
+
+    def render_concurrently(html, output_path):
+        # another worker stores the same document while this one renders it
+        content = _fake_pdf(html, output_path)
+        pdf_render_cache_storage.save(path, ContentFile(content))
+        return content
+
+    mock_pdf_convert.side_effect = render_concurrently
+
+    assert cache.render("<p>first</p>") == b"PDF <p>first</p>"
+
+    # one file per key, the copy saved with a suffixed name is deleted
+    _, file_names = pdf_render_cache_storage.listdir(PdfRenderCache.directory)
+    assert file_names == [f"{cache.get_key('<p>first</p>')}.pdf"]
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_pdf_render_cache_disabled(mock_pdf_convert, pdf_render_cache_storage):
+    mock_pdf_convert.side_effect = _fake_pdf
+    cache = PdfRenderCache(max_size=0)
+
+    cache.render("<p>first</p>")
+    cache.render("<p>first</p>")
+
+    assert mock_pdf_convert.call_count == 2
+    assert not pdf_render_cache_storage.exists(PdfRenderCache.directory)
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_pdf_render_cache_eviction(mock_pdf_convert, pdf_render_cache_storage):
+    mock_pdf_convert.side_effect = _fake_pdf
+    cache = PdfRenderCache(max_size=45)
+    html_contents = [f"<p>document {i}</p>" for i in range(3)]  # 21 bytes per PDF
+    for i, html in enumerate(html_contents):
+        cache.render(html)
+        # make the storage times distinct
+        _set_modified_time(pdf_render_cache_storage, cache, html, minutes_ago=10 - i)
+
+    assert cache.evict() == 1
+
+    assert [
+        pdf_render_cache_storage.exists(cache._get_path(cache.get_key(html)))
+        for html in html_contents
+    ] == [False, True, True]
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_pdf_render_cache_eviction_by_age(mock_pdf_convert, pdf_render_cache_storage):
+    mock_pdf_convert.side_effect = _fake_pdf
+    cache = PdfRenderCache(max_age=60 * 60)
+    cache.render("<p>expired</p>")
+    _set_modified_time(pdf_render_cache_storage, cache, "<p>expired</p>", 61)
+    cache.render("<p>cached</p>")
+    _set_modified_time(pdf_render_cache_storage, cache, "<p>cached</p>", 59)
+
+    assert cache.evict() == 1
+
+    assert not pdf_render_cache_storage.exists(
+        cache._get_path(cache.get_key("<p>expired</p>"))
+    )
+    assert pdf_render_cache_storage.exists(
+        cache._get_path(cache.get_key("<p>cached</p>"))
+    )
+
+
+def _set_modified_time(storage, cache, html, minutes_ago):
+    path = storage.path(cache._get_path(cache.get_key(html)))
+    modified_time = (timezone.now() - timedelta(minutes=minutes_ago)).timestamp()
+    os.utime(path, (modified_time, modified_time))
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_export_unchanged_application_batch_from_cache(
+    mock_pdf_convert, application_batch, pdf_render_cache_storage
+):
+    mock_pdf_convert.side_effect = _fake_pdf
+    application_batch.applications.add(
+        DecidedApplicationFactory.create(
+            status=ApplicationStatus.ACCEPTED,
+            calculation__calculated_benefit_amount=1000,
+        ),
+        DecidedApplicationFactory.create(status=ApplicationStatus.REJECTED),
+    )
+
+    with patch.object(pdf_render_cache_storage, "listdir") as listdir_mock:
+        first_export = zipfile.ZipFile(
+            io.BytesIO(export_application_batch(application_batch))
+        )
+        render_count = mock_pdf_convert.call_count
+        second_export = zipfile.ZipFile(
+            io.BytesIO(export_application_batch(application_batch))
+        )
+
+    # the cache is evicted by a scheduled job, not by the exports
+    listdir_mock.assert_not_called()
+    assert render_count > 0
+    assert mock_pdf_convert.call_count == render_count
+    assert PdfRenderCache.get_stats() == {"hits": render_count, "misses": render_count}
+    assert [
+        (info.filename, first_export.read(info)) for info in first_export.infolist()
+    ] == [
+        (info.filename, second_export.read(info)) for info in second_export.infolist()
+    ]
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_render_pdf_files_keeps_order(mock_pdf_convert, max_workers):
+    def slow_fake_pdf(html, output_path):
+        # the first files are the slowest to render
+        time.sleep((10 - int(html)) / 1000)
+        return _fake_pdf(html, output_path)
+
+    mock_pdf_convert.side_effect = slow_fake_pdf
+    files = [
+        ExportFileInfo(
+            filename=f"Liite {i}.pdf", file_content=None, html_content=str(i)
+        )
+        for i in range(10)
+    ]
+
+    rendered_files = list(render_pdf_files(files, max_workers=max_workers))
+
+    assert [f.filename for f in rendered_files] == [f"Liite {i}.pdf" for i in range(10)]
+    assert [f.file_content for f in rendered_files] == [
+        f"PDF {i}".encode() for i in range(10)
+    ]
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_prepare_pdf_files_attachment_numbering(mock_pdf_convert, settings):
+    settings.PDF_RENDER_MAX_WORKERS = 4
+    mock_pdf_convert.side_effect = _fake_pdf
+    apps = [
+        DecidedApplicationFactory.create(status=ApplicationStatus.ACCEPTED)
+        for _ in range(3)
+    ] + [
+        DecidedApplicationFactory.create(status=ApplicationStatus.REJECTED)
+        for _ in range(2)
+    ]
+
+    pdf_files = prepare_pdf_files(
+        Application.objects.filter(pk__in=[app.pk for app in apps]).order_by(
+            "application_number"
+        )
+    )
+
+    assert [f.filename.split(" ")[1] for f in pdf_files] == [
+        "1",
+        "2",
+        "1",
+        "2",
+        "3",
+        "4",
+        "5",
+        "6",
+        "7",
+    ]
+    assert all(f.file_content == _fake_pdf(f.html_content, False) for f in pdf_files)
+
+
+def test_generate_zip_stream():
+    files = [
+        ExportFileInfo(
+            filename=f"file {i}.pdf", file_content=os.urandom(1000), html_content=""
+        )
+        for i in range(3)
+    ]
+    produced = []
+
+    def iter_files():
+        for f in files:
+            produced.append(f.filename)
+            yield f
+
+    stream = generate_zip_stream(iter_files())
+    chunks = []
+    for chunk in stream:
+        # the files are produced one by one as the archive is consumed
+        assert len(produced) == min(len(chunks) + 1, len(files))
+        chunks.append(chunk)
+
+    assert len(chunks) == len(files) + 1
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.testzip() is None
+    assert [(info.filename, archive.read(info)) for info in archive.infolist()] == [
+        (f.filename, f.file_content) for f in files
+    ]
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
 def test_multiple_benefit_per_application(mock_pdf_convert):
     mock_pdf_convert.return_value = {}
     # Test case data and expected results collected from
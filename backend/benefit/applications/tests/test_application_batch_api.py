@@ -9,12 +9,18 @@ import pytz
 from dateutil.relativedelta import relativedelta
 from django.conf import settings
 from django.http import StreamingHttpResponse
+from django.test import override_settings
+from freezegun import freeze_time
 from rest_framework.reverse import reverse
 
+from applications.api.v1.application_batch_views import (
+    ApplicationBatchViewSet,
+    TALPA_EXPORT_CURSOR_HEADER,
+)
 from applications.api.v1.serializers.application import ApplicationBatchSerializer
 from applications.enums import AhjoDecision, ApplicationBatchStatus, ApplicationStatus
 from applications.exceptions import BatchTooManyDraftsError
-from applications.models import Application, ApplicationBatch
+from applications.models import Application, ApplicationBatch, TalpaExportDelivery
 from applications.tests.conftest import *  # noqa
 from applications.tests.factories import (
     ApplicationBatchFactory,
@@ -23,6 +29,7 @@ from applications.tests.factories import (
 )
 from applications.tests.faker import get_faker
 from applications.tests.test_applications_api import get_handler_detail_url
+from shared.audit_log.models import AuditLogEntry
 
 
 def get_valid_batch_completion_data():
@@ -762,10 +769,10 @@ def test_application_delete(handler_api_client, application_batch):
     assert response.status_code == 204
 
 
-@patch("applications.api.v1.application_batch_views.export_application_batch")
+@patch("applications.api.v1.application_batch_views.stream_application_batch_export")
 def test_application_batch_export(mock_export, handler_api_client, application_batch):
     # Mock export pdf function to reduce test time, the unittest for the export feature will be run separately
-    mock_export.return_value = {}
+    mock_export.return_value = []
     # Export invalid batch
     application_batch.status = ApplicationBatchStatus.SENT_TO_TALPA
     application_batch.save()
@@ -841,3 +848,195 @@ def test_application_batches_talpa_export(anonymous_client, application_batch):
     assert isinstance(response, StreamingHttpResponse)
     assert response.headers["Content-Type"] == "text/csv"
     assert response.status_code == 200
+    # the applications of the batches are exported, even though the status is updated first
+    content = response.getvalue().decode("utf-8")
+    for application in [
+        *application_batch.applications.all(),
+        *app_batch_2.applications.all(),
+    ]:
+        assert str(application.application_number) in content
+
+
+def _talpa_export(client, **params):
+    credentials = base64.b64encode(settings.TALPA_ROBOT_AUTH_CREDENTIAL.encode("utf-8"))
+    client.credentials(
+        HTTP_AUTHORIZATION="Basic {}".format(credentials.decode("utf-8"))
+    )
+    return client.get(
+        reverse("v1:applicationbatch-talpa-export-batch"),
+        {"incremental": "1", **params},
+    )
+
+
+def _get_exported_application_numbers(response):
+    lines = response.getvalue().decode("utf-8-sig").splitlines()[1:]
+    return sorted(int(line.split(";")[0]) for line in lines)
+
+
+def _get_application_numbers(*batches):
+    return sorted(
+        app.application_number for batch in batches for app in batch.applications.all()
+    )
+
+
+def _get_delivery_audit_log_count():
+    return AuditLogEntry.objects.filter(
+        message__audit_event__target__type="TalpaExportDelivery"
+    ).count()
+
+
+@override_settings(TALPA_EXPORT_DELIVERY_DELAY=0)
+def test_application_batches_talpa_incremental_export(anonymous_client):
+    batch_1 = ApplicationBatchFactory()
+    fill_as_valid_batch_completion_and_save(
+        batch_1, ApplicationBatchStatus.DECIDED_ACCEPTED
+    )
+    ApplicationBatchFactory(status=ApplicationBatchStatus.AWAITING_AHJO_DECISION)
+
+    response = _talpa_export(anonymous_client)
+    assert response.status_code == 200
+    assert _get_exported_application_numbers(response) == _get_application_numbers(
+        batch_1
+    )
+    cursor_1 = response[TALPA_EXPORT_CURSOR_HEADER]
+    batch_1.refresh_from_db()
+    assert batch_1.status == ApplicationBatchStatus.SENT_TO_TALPA
+
+    # nothing new to export
+    response = _talpa_export(anonymous_client, cursor=cursor_1)
+    assert response.status_code == 400
+
+    with freeze_time("2021-06-05"):
+        batch_2 = ApplicationBatchFactory()
+        fill_as_valid_batch_completion_and_save(
+            batch_2, ApplicationBatchStatus.DECIDED_ACCEPTED
+        )
+        response = _talpa_export(anonymous_client, cursor=cursor_1)
+        assert response.status_code == 200
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_2
+        )
+        cursor_2 = response[TALPA_EXPORT_CURSOR_HEADER]
+        assert cursor_2 != cursor_1
+
+    with freeze_time("2021-06-06"):
+        batch_3 = ApplicationBatchFactory()
+        fill_as_valid_batch_completion_and_save(
+            batch_3, ApplicationBatchStatus.DECIDED_ACCEPTED
+        )
+        # a repeated request returns the same delivery, e.g. after an interrupted download
+        response = _talpa_export(anonymous_client, cursor=cursor_1)
+        assert response[TALPA_EXPORT_CURSOR_HEADER] == cursor_2
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_2
+        )
+        response = _talpa_export(anonymous_client)
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_1
+        )
+
+        response = _talpa_export(anonymous_client, cursor=cursor_2)
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_3
+        )
+
+    assert TalpaExportDelivery.objects.count() == 3
+    # each delivery is logged once
+    assert _get_delivery_audit_log_count() == 3
+
+
+@override_settings(TALPA_EXPORT_DELIVERY_DELAY=60)
+def test_application_batches_talpa_incremental_export_delay(anonymous_client):
+    with freeze_time("2021-06-05 12:00:00"):
+        batch_1 = ApplicationBatchFactory()
+        fill_as_valid_batch_completion_and_save(
+            batch_1, ApplicationBatchStatus.DECIDED_ACCEPTED
+        )
+
+    with freeze_time("2021-06-05 12:00:30"):
+        # the batch is modified too recently to be delivered
+        response = _talpa_export(anonymous_client)
+        assert response.status_code == 400
+        assert not TalpaExportDelivery.objects.exists()
+
+    with freeze_time("2021-06-05 12:01:30"):
+        response = _talpa_export(anonymous_client)
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_1
+        )
+        cursor_1 = response[TALPA_EXPORT_CURSOR_HEADER]
+
+    with freeze_time("2021-06-05 12:01:40"):
+        # a batch modified in a transaction that started before the previous delivery and was
+        # committed after it
+        batch_2 = ApplicationBatchFactory()
+        fill_as_valid_batch_completion_and_save(
+            batch_2, ApplicationBatchStatus.DECIDED_ACCEPTED
+        )
+        ApplicationBatch.objects.filter(pk=batch_2.pk).update(
+            modified_at=datetime(2021, 6, 5, 12, 1, 0, tzinfo=pytz.utc)
+        )
+
+    with freeze_time("2021-06-05 12:03:00"):
+        response = _talpa_export(anonymous_client, cursor=cursor_1)
+        assert _get_exported_application_numbers(response) == _get_application_numbers(
+            batch_2
+        )
+
+
+@pytest.mark.parametrize("with_cursor", [False, True])
+@override_settings(TALPA_EXPORT_DELIVERY_DELAY=0)
+def test_application_batches_talpa_incremental_export_concurrent_requests(
+    anonymous_client, with_cursor
+):
+    previous = None
+    if with_cursor:
+        with freeze_time("2021-06-03"):
+            previous = TalpaExportDelivery.objects.create(
+                modified_until=datetime(2021, 6, 3, tzinfo=pytz.utc)
+            )
+    batch = ApplicationBatchFactory()
+    fill_as_valid_batch_completion_and_save(
+        batch, ApplicationBatchStatus.DECIDED_ACCEPTED
+    )
+    get_next_delivery = ApplicationBatchViewSet._get_next_talpa_export_delivery
+    concurrent_deliveries = []
+
+    def create_concurrent_delivery(previous_delivery):
+        if not concurrent_deliveries:
+            # a concurrent request with the same cursor creates the delivery after this
+            # request has checked that it doesn't exist
+            concurrent_deliveries.append(
+                TalpaExportDelivery.objects.create(
+                    previous=previous_delivery,
+                    modified_until=datetime(2021, 6, 4, tzinfo=pytz.utc),
+                )
+            )
+            return None
+        return get_next_delivery(previous_delivery)
+
+    with patch.object(
+        ApplicationBatchViewSet,
+        "_get_next_talpa_export_delivery",
+        side_effect=create_concurrent_delivery,
+    ):
+        response = _talpa_export(
+            anonymous_client, **({"cursor": str(previous.id)} if previous else {})
+        )
+
+    assert response.status_code == 200
+    assert response[TALPA_EXPORT_CURSOR_HEADER] == str(concurrent_deliveries[0].id)
+    assert _get_exported_application_numbers(response) == _get_application_numbers(
+        batch
+    )
+    assert TalpaExportDelivery.objects.filter(previous=previous).count() == 1
+    assert _get_delivery_audit_log_count() == 0
+
+
+@pytest.mark.parametrize("cursor", ["invalid", str(uuid.uuid4())])
+def test_application_batches_talpa_incremental_export_invalid_cursor(
+    anonymous_client, cursor
+):
+    response = _talpa_export(anonymous_client, cursor=cursor)
+    assert response.status_code == 400
+    assert _get_delivery_audit_log_count() == 0
@@ -0,0 +1,91 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.reverse import reverse
+
+from applications.api.v1.serializers.application import HandlerApplicationSerializer
+from applications.models import AhjoStatus
+from applications.tests.conftest import *  # noqa
+from applications.tests.factories import DecidedApplicationFactory
+from common.tests.conftest import *  # noqa
+from companies.tests.conftest import *  # noqa
+from helsinkibenefit.tests.conftest import *  # noqa
+from terms.tests.conftest import *  # noqa
+
+
+# the query count of the list must not grow with the number of the listed applications
+SMALL_LIST_SIZE = 10
+LARGE_LIST_SIZE = 500
+
+
+def _get_query_count(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(response.data), len(context)
+
+
+def _create_applications(company, count):
+    for _ in range(count):
+        application = DecidedApplicationFactory(company=company)
+        AhjoStatus.objects.create(application=application)
+
+
+@pytest.mark.parametrize(
+    "client_fixture,url",
+    [
+        ("handler_api_client", reverse("v1:handler-application-list")),
+        (
+            "handler_api_client",
+            reverse("v1:handler-application-list")
+            + "?exclude_fields=warnings,former_benefit_info",
+        ),
+        (
+            "handler_api_client",
+            reverse("v1:handler-application-simplified-application-list"),
+        ),
+        ("api_client", reverse("v1:applicant-application-list")),
+        (
+            "api_client",
+            reverse("v1:applicant-application-simplified-application-list"),
+        ),
+    ],
+)
+def test_application_list_query_count_is_constant(
+    request, client_fixture, url, mock_get_organisation_roles_and_create_company
+):
+    client = request.getfixturevalue(client_fixture)
+    company = mock_get_organisation_roles_and_create_company
+    _create_applications(company, SMALL_LIST_SIZE)
+    # the first request saves the session, which is not repeated in the later requests
+    _get_query_count(client, url)
+    small_count, small_query_count = _get_query_count(client, url)
+    _create_applications(company, LARGE_LIST_SIZE - SMALL_LIST_SIZE)
+    large_count, large_query_count = _get_query_count(client, url)
+
+    assert (small_count, large_count) == (SMALL_LIST_SIZE, LARGE_LIST_SIZE)
+    assert large_query_count == small_query_count
+
+
+@pytest.mark.parametrize(
+    "context,expected_lookups",
+    [
+        (
+            {"fields": ["id", "attachments", "ahjo_status"]},
+            ["ahjo_status", "attachments"],
+        ),
+        ({"fields": ["id", "status"]}, []),
+        (
+            {"fields": ["status_last_changed_at", "latest_decision_comment"]},
+            ["log_entries"],
+        ),
+        (
+            {"exclude_fields": list(HandlerApplicationSerializer.Meta.fields)},
+            [],
+        ),
+    ],
+)
+def test_prefetch_lookups_for_fields(context, expected_lookups):
+    assert HandlerApplicationSerializer.get_prefetch_lookups(context) == (
+        expected_lookups
+    )
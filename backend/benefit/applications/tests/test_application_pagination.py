@@ -0,0 +1,146 @@
+import pytest
+from rest_framework.reverse import reverse
+
+from applications.enums import ApplicationStatus
+from applications.models import Application
+from applications.tests.conftest import *  # noqa
+from applications.tests.factories import (
+    DecidedApplicationFactory,
+    HandlingApplicationFactory,
+    ReceivedApplicationFactory,
+)
+from common.tests.conftest import *  # noqa
+from companies.tests.conftest import *  # noqa
+from helsinkibenefit.tests.conftest import *  # noqa
+from terms.tests.conftest import *  # noqa
+
+HANDLER_LIST_URL = reverse("v1:handler-application-simplified-application-list")
+APPLICANT_LIST_URL = reverse("v1:applicant-application-simplified-application-list")
+
+
+@pytest.fixture
+def applications(mock_get_organisation_roles_and_create_company):
+    # a mix of applications with and without handled_at, so that both NULL and non-NULL values
+    # of the ordering fields are paginated
+    company = mock_get_organisation_roles_and_create_company
+    return (
+        [DecidedApplicationFactory(company=company) for _ in range(3)]
+        + [HandlingApplicationFactory(company=company) for _ in range(3)]
+        + [ReceivedApplicationFactory(company=company) for _ in range(2)]
+    )
+
+
+def _get_all_pages(client, url, page_size, params=""):
+    ids = []
+    cursor = None
+    while True:
+        page_url = f"{url}?page_size={page_size}{params}"
+        if cursor:
+            page_url += f"&cursor={cursor}"
+        response = client.get(page_url)
+        assert response.status_code == 200
+        assert len(response.data["results"]) <= page_size
+        ids.extend(item["id"] for item in response.data["results"])
+        if not response.data["has_next"]:
+            assert response.data["next_cursor"] is None
+            return ids
+        cursor = response.data["next_cursor"]
+
+
+def test_simplified_list_without_page_size(handler_api_client, applications):
+    response = handler_api_client.get(HANDLER_LIST_URL)
+    assert response.status_code == 200
+    assert isinstance(response.data, list)
+    assert len(response.data) == len(applications)
+
+
+@pytest.mark.parametrize("page_size", [1, 3, 100])
+@pytest.mark.parametrize(
+    "params",
+    [
+        "",
+        "&order_by=application_number",
+        "&order_by=-application_number",
+        "&order_by=-submitted_at",
+        "&status=handling,received",
+    ],
+)
+def test_handler_simplified_list_pages(
+    handler_api_client, applications, page_size, params
+):
+    unpaginated = handler_api_client.get(HANDLER_LIST_URL + "?" + params[1:]).data
+    assert unpaginated
+
+    assert _get_all_pages(handler_api_client, HANDLER_LIST_URL, page_size, params) == [
+        item["id"] for item in unpaginated
+    ]
+
+
+@pytest.mark.parametrize(
+    "params,ordering",
+    [
+        # the default ordering of the handler views
+        ("", ("-handled_at", "-calculation__modified_at")),
+        ("&order_by=-submitted_at", ("-submitted_at",)),
+    ],
+)
+def test_pages_ordered_by_annotation(
+    handler_api_client, applications, params, ordering
+):
+    # handled_at and submitted_at are annotations of the queryset, not model fields
+    expected_ids = [
+        str(pk)
+        for pk in Application.objects.filter(
+            pk__in=[application.pk for application in applications]
+        )
+        .order_by(*ordering, "id")
+        .values_list("pk", flat=True)
+    ]
+
+    assert _get_all_pages(handler_api_client, HANDLER_LIST_URL, 2, params) == (
+        expected_ids
+    )
+
+
+def test_applicant_simplified_list_pages(api_client, applications):
+    unpaginated = api_client.get(APPLICANT_LIST_URL).data
+    assert len(unpaginated) == len(applications)
+
+    assert _get_all_pages(api_client, APPLICANT_LIST_URL, 3) == [
+        item["id"] for item in unpaginated
+    ]
+
+
+def test_pages_with_equal_ordering_values(handler_api_client, applications):
+    # all applications have the same status, so the ordering must fall back to the id
+    for application in applications:
+        application.status = ApplicationStatus.HANDLING
+        application.save()
+
+    ids = _get_all_pages(handler_api_client, HANDLER_LIST_URL, 2, "&order_by=status")
+
+    assert sorted(ids) == sorted(str(application.id) for application in applications)
+    assert len(set(ids)) == len(ids)
+
+
+@pytest.mark.parametrize("cursor", ["invalid", "WzFd"])
+def test_invalid_cursor(handler_api_client, applications, cursor):
+    response = handler_api_client.get(f"{HANDLER_LIST_URL}?page_size=2&cursor={cursor}")
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("order_by", ["company", "-company", "employee", "-employee"])
+def test_pages_ordered_by_relation(handler_api_client, applications, order_by):
+    unpaginated = handler_api_client.get(f"{HANDLER_LIST_URL}?order_by={order_by}").data
+
+    ids = _get_all_pages(handler_api_client, HANDLER_LIST_URL, 2, f"&order_by={order_by}")
+
+    assert ids == [item["id"] for item in unpaginated]
+    assert sorted(ids) == sorted(str(application.id) for application in applications)
+
+
+def test_pages_ordered_by_to_many_relation(handler_api_client, applications):
+    response = handler_api_client.get(
+        f"{HANDLER_LIST_URL}?page_size=2&order_by=attachments"
+    )
+    assert response.status_code == 400
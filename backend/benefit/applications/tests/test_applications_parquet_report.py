@@ -0,0 +1,98 @@
+import io
+from datetime import date
+from decimal import Decimal
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from django.http import StreamingHttpResponse
+from rest_framework.reverse import reverse
+
+from applications.enums import ApplicationStatus
+from applications.models import Application
+from applications.services.applications_parquet_report import (
+    ApplicationsParquetService,
+    ENUM_TYPE,
+)
+from applications.tests.conftest import *  # noqa
+from applications.tests.factories import DecidedApplicationFactory
+from common.tests.conftest import *  # noqa
+from companies.tests.conftest import *  # noqa
+from helsinkibenefit.tests.conftest import *  # noqa
+from terms.tests.conftest import *  # noqa
+
+
+def _read_parquet(stream) -> pq.ParquetFile:
+    return pq.ParquetFile(io.BytesIO(b"".join(stream)))
+
+
+def test_applications_parquet_output(applications_csv_service):
+    applications = list(applications_csv_service.get_applications())
+    parquet_service = ApplicationsParquetService(
+        applications_csv_service.get_applications()
+    )
+
+    table = _read_parquet(parquet_service.get_parquet_stream()).read()
+
+    assert table.column_names == [
+        column.heading for column in applications_csv_service.CSV_COLUMNS
+    ]
+    assert (
+        table.num_rows
+        == len(applications_csv_service.get_csv_string().splitlines()) - 1
+    )
+    schema = table.schema
+    assert schema.field("Hakemusnumero").type == pa.int64()
+    assert schema.field("Hakemuksen tila").type == ENUM_TYPE
+    assert schema.field("Haettu alkupäivä").type == pa.date32()
+    assert schema.field("Arkistoitu?").type == pa.bool_()
+    assert schema.field("Ahjo-rivi 1 / määrä eur kk").type == pa.decimal128(7, 2)
+
+    rows = table.to_pylist()
+    assert [row["Hakemusnumero"] for row in rows] == [
+        app.application_number for app in applications
+    ]
+    assert {row["Hakemuksen tila"] for row in rows} == {ApplicationStatus.ACCEPTED}
+    assert isinstance(rows[0]["Haettu alkupäivä"], date)
+    assert isinstance(rows[0]["Arkistoitu?"], bool)
+    assert rows[0]["Ahjo-rivi 1 / määrä eur yht"] == applications[0].ahjo_rows[0].amount
+    assert isinstance(rows[0]["Ahjo-rivi 1 / määrä eur kk"], Decimal)
+    # missing related objects are nulls
+    assert rows[0]["Ahjo-rivi 2 / määrä eur yht"] is None
+
+
+def test_applications_parquet_row_groups(monkeypatch):
+    applications = DecidedApplicationFactory.create_batch(3)
+    monkeypatch.setattr(ApplicationsParquetService, "ROW_GROUP_SIZE", 2)
+    parquet_service = ApplicationsParquetService(
+        Application.objects.filter(pk__in=[app.pk for app in applications])
+    )
+
+    stream = list(parquet_service.get_parquet_stream())
+
+    # a chunk for the full row group and one for the rest of the file
+    assert len(stream) == 2
+    parquet_file = _read_parquet(stream)
+    assert parquet_file.metadata.num_row_groups == 2
+    assert parquet_file.metadata.num_rows == 3
+
+
+def test_applications_parquet_without_applications():
+    parquet_file = _read_parquet(
+        ApplicationsParquetService(Application.objects.none()).get_parquet_stream()
+    )
+    assert parquet_file.metadata.num_rows == 0
+    assert "Hakemusnumero" in parquet_file.schema_arrow.names
+
+
+def test_applications_parquet_export(handler_api_client):
+    application = DecidedApplicationFactory()
+
+    response = handler_api_client.get(
+        reverse("v1:handler-application-list") + "export_parquet/"
+    )
+
+    assert response.status_code == 200
+    assert isinstance(response, StreamingHttpResponse)
+    assert response["Content-Type"] == "application/vnd.apache.parquet"
+    table = pq.read_table(io.BytesIO(response.getvalue()))
+    assert table.column("Hakemusnumero").to_pylist() == [application.application_number]
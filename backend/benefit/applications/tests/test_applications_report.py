@@ -4,11 +4,14 @@ from collections import defaultdict
 from datetime import date, datetime, timezone
 from decimal import Decimal
 from typing import Dict, List
+from unittest.mock import patch
 from zipfile import ZipFile
 
 import pytest
 from dateutil.relativedelta import relativedelta
-from django.http import HttpResponse, StreamingHttpResponse
+from django.db import connection
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
@@ -18,7 +21,8 @@ from applications.enums import (
     BenefitType,
     PaySubsidyGranted,
 )
-from applications.models import ApplicationBatch
+from applications.models import Application, ApplicationBatch
+from applications.services.applications_csv_report import ApplicationsCsvService
 from applications.tests.common import (
     check_csv_cell_list_lines_generator,
     check_csv_string_lines_generator,
@@ -85,11 +89,10 @@ def _get_csv(
 ) -> List[List[str]]:
     response = handler_api_client.get(url)
     assert response.status_code == 200
+    assert isinstance(response, StreamingHttpResponse)
     if from_zip:
-        assert isinstance(response, HttpResponse)
-        csv_content: bytes = _get_csv_from_zip(response.content)
+        csv_content: bytes = _get_csv_from_zip(response.getvalue())
     else:
-        assert isinstance(response, StreamingHttpResponse)
         csv_content: bytes = response.getvalue()
     csv_lines = split_lines_at_semicolon(csv_content.decode("utf-8"))
     _test_csv(csv_lines, expected_application_numbers, expected_without_quotes)
@@ -99,7 +102,8 @@ def _get_csv(
 def _get_csv_pdf_zip(handler_api_client: APIClient, url: str) -> ZipFile:
     response = handler_api_client.get(url)
     assert response.status_code == 200
-    return ZipFile(io.BytesIO(response.content))
+    assert isinstance(response, StreamingHttpResponse)
+    return ZipFile(io.BytesIO(response.getvalue()))
 
 
 def _create_applications_for_export():
@@ -699,6 +703,53 @@ def test_applications_csv_monthly_amount_override(
     assert csv_lines[1][current_total_col] == "200.00"
 
 
+def _get_csv_query_count(application_count, prune_data_for_talpa):
+    applications = DecidedApplicationFactory.create_batch(application_count)
+    DeMinimisAidFactory(application=applications[0])
+    csv_service = ApplicationsCsvService(
+        Application.objects.filter(pk__in=[app.pk for app in applications]),
+        prune_data_for_talpa,
+    )
+    with CaptureQueriesContext(connection) as context:
+        csv_service.get_csv_string()
+    return len(context)
+
+
+@pytest.mark.parametrize("prune_data_for_talpa", [False, True])
+def test_applications_csv_query_count(prune_data_for_talpa):
+    # the related data is fetched for all the applications at once
+    assert _get_csv_query_count(2, prune_data_for_talpa) == _get_csv_query_count(
+        6, prune_data_for_talpa
+    )
+
+
+def test_applications_csv_in_chunks(monkeypatch):
+    applications = DecidedApplicationFactory.create_batch(5)
+    queryset = Application.objects.filter(
+        pk__in=[app.pk for app in applications]
+    ).order_by("application_number")
+    csv_string = ApplicationsCsvService(queryset).get_csv_string()
+
+    monkeypatch.setattr(ApplicationsCsvService, "CHUNK_SIZE", 2)
+    with CaptureQueriesContext(connection) as context:
+        chunked_csv_string = ApplicationsCsvService(queryset).get_csv_string()
+
+    assert chunked_csv_string == csv_string
+    # the related data is prefetched separately for each of the three chunks
+    assert (
+        len([query for query in context if "bf_applications_employee" in query["sql"]])
+        == 3
+    )
+
+
+def test_applications_csv_empty_queryset():
+    csv_lines = split_lines_at_semicolon(
+        ApplicationsCsvService(Application.objects.none()).get_csv_string()
+    )
+    assert len(csv_lines) == 2
+    assert csv_lines[1][0] == '"Ei löytynyt ehdot täyttäviä hakemuksia"'
+
+
 def test_write_applications_csv_file(applications_csv_service, tmp_path):
     application = applications_csv_service.get_applications()[0]
     application.company_name = "test äöÄÖtest"
@@ -767,3 +818,27 @@ def test_applications_csv_pdf_zip_export_new_applications(handler_api_client):
     )
     assert len(extension_to_filenames.get(".csv", [])) == 1
     assert len(extension_to_filenames.get(".pdf", [])) == 0
+
+
+@patch("applications.services.pdf_render_cache.pdfkit.from_string")
+def test_applications_csv_pdf_zip_export_failing_pdf_render(
+    mock_pdf_convert, handler_api_client, settings
+):
+    settings.PDF_RENDER_MAX_WORKERS = 1
+    # the second PDF file of the export fails to render
+    mock_pdf_convert.side_effect = [b"pdf", RuntimeError("wkhtmltopdf failed")]
+    application1, application2, *_ = _create_applications_for_export()
+    ApplicationBatch.objects.all().delete()
+
+    with pytest.raises(RuntimeError):
+        handler_api_client.get(
+            reverse("v1:handler-application-list")
+            + "export_new_accepted_applications_csv_pdf/",
+        )
+
+    # the batch is rolled back, so the applications can be exported again
+    assert not ApplicationBatch.objects.exists()
+    application1.refresh_from_db()
+    application2.refresh_from_db()
+    assert application1.batch is None
+    assert application2.batch is None
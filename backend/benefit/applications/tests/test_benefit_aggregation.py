@@ -4,12 +4,17 @@ from decimal import Decimal
 
 import pytest
 from django.utils import translation
+from rest_framework.reverse import reverse
 
 from applications.api.v1.serializers.application import ApplicantApplicationSerializer
+from applications.benefit_aggregation import get_former_benefit_info, PastBenefitIndex
 from applications.enums import BenefitType, PaySubsidyGranted
 from applications.models import Application
 from applications.tests.conftest import *  # noqa
-from applications.tests.factories import DecidedApplicationFactory
+from applications.tests.factories import (
+    DecidedApplicationFactory,
+    HandlingApplicationFactory,
+)
 from applications.tests.test_applications_api import get_handler_detail_url
 from calculator.models import PreviousBenefit
 from calculator.tests.factories import PreviousBenefitFactory
@@ -413,3 +418,103 @@ def test_application_with_previously_accepted_applications_and_previous_benefits
             assert len(response.data["warnings"]["former_benefits"]) == 1
         else:
             assert "former_benefits" not in response.data["warnings"]
+
+
+@pytest.fixture
+def applications_with_past_benefits(mock_get_organisation_roles_and_create_company):
+    company = mock_get_organisation_roles_and_create_company
+    applications = []
+    for index in range(3):
+        application = HandlingApplicationFactory(
+            company=company,
+            start_date=date(2021, 7, 1),
+            end_date=date(2021, 12, 31),
+        )
+        social_security_number = application.employee.social_security_number
+        PreviousBenefitFactory(
+            company=company,
+            social_security_number=social_security_number,
+            start_date=date(2020, 1, 1),
+            end_date=date(2020, 3 + index, 28),
+        )
+        decided_application = DecidedApplicationFactory(
+            company=company,
+            start_date=date(2021, 1, 1),
+            end_date=date(2021, 7 + index, 15),
+        )
+        decided_application.employee.social_security_number = social_security_number
+        decided_application.employee.save()
+        applications.append(application)
+    return applications
+
+
+def test_past_benefit_index(applications_with_past_benefits, django_assert_num_queries):
+    applications = list(
+        Application.objects.filter(
+            pk__in=[application.pk for application in applications_with_past_benefits]
+        ).select_related("company", "employee")
+    )
+    with django_assert_num_queries(2):
+        past_benefit_index = PastBenefitIndex(applications)
+
+    for application in applications:
+        args = (
+            application,
+            application.company,
+            application.employee.social_security_number,
+            application.start_date,
+            application.end_date,
+            application.apprenticeship_program,
+        )
+        with django_assert_num_queries(0):
+            indexed_info = get_former_benefit_info(
+                *args, past_benefit_index=past_benefit_index
+            )
+        assert indexed_info == get_former_benefit_info(*args)
+        assert indexed_info.months_used > 0
+        assert indexed_info.warnings
+
+
+def test_past_benefit_index_without_past_benefits(
+    mock_get_organisation_roles_and_create_company, django_assert_num_queries
+):
+    company = mock_get_organisation_roles_and_create_company
+    applications = [
+        HandlingApplicationFactory(
+            company=company,
+            start_date=date(2021, 7, 1),
+            end_date=date(2021, 12, 31),
+        )
+        for _ in range(3)
+    ]
+    past_benefit_index = PastBenefitIndex(applications)
+
+    for application in applications:
+        # the employees without past benefits are in the index too
+        with django_assert_num_queries(0):
+            former_benefit_info = get_former_benefit_info(
+                application,
+                application.company,
+                application.employee.social_security_number,
+                application.start_date,
+                application.end_date,
+                application.apprenticeship_program,
+                past_benefit_index=past_benefit_index,
+            )
+        assert former_benefit_info.months_used == 0
+        assert not former_benefit_info.warnings
+
+
+def test_former_benefit_info_in_application_list(
+    handler_api_client, applications_with_past_benefits
+):
+    response = handler_api_client.get(reverse("v1:handler-application-list"))
+    assert response.status_code == 200
+    listed = {item["id"]: item for item in response.data}
+
+    for application in applications_with_past_benefits:
+        detail = handler_api_client.get(get_handler_detail_url(application)).data
+        item = listed[str(application.id)]
+        assert item["former_benefit_info"] == detail["former_benefit_info"]
+        assert item["warnings"] == detail["warnings"]
+        assert item["warnings"]["former_benefits"]
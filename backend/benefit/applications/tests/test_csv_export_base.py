@@ -0,0 +1,137 @@
+import decimal
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+
+from applications.enums import ApplicationStatus, BenefitType
+from applications.services.applications_csv_report import ApplicationsCsvService
+from applications.services.csv_export_base import (
+    compile_csv_column,
+    CsvColumn,
+    CsvExportBase,
+)
+from shared.service_bus.enums import YtjOrganizationCode
+
+
+class _ListExport(CsvExportBase):
+    def __init__(self, columns, items):
+        self.CSV_COLUMNS = columns
+        self.items = items
+
+    def get_row_items(self):
+        return self.items
+
+
+class _Item:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_csv_column_values():
+    item = _Item(name="Firma", nested=_Item(value=None), number=5)
+    export = _ListExport(
+        [
+            CsvColumn("Name", "name"),
+            CsvColumn("Nested", "nested.value", default_value="-"),
+            CsvColumn("Missing", "missing.value", default_value=""),
+            CsvColumn("Number", "number", str),
+            CsvColumn("Callable", lambda i: i.number * 2),
+            CsvColumn("Formatted default", "nested.value", repr, default_value=None),
+        ],
+        [item],
+    )
+
+    assert list(export.get_csv_cell_list_lines_generator()) == [
+        ["Name", "Nested", "Missing", "Number", "Callable", "Formatted default"],
+        ["Firma", "-", "", "5", 10, "None"],
+    ]
+
+
+def test_csv_column_missing_attribute_without_default():
+    export = _ListExport([CsvColumn("Missing", "missing")], [_Item()])
+
+    with pytest.raises(AttributeError):
+        list(export.get_csv_cell_list_lines_generator())
+
+
+def test_csv_column_invalid_type():
+    export = _ListExport([CsvColumn("List", "values")], [_Item(values=[1])])
+
+    with pytest.raises(ValueError):
+        list(export.get_csv_cell_list_lines_generator())
+
+
+class _RelatedItems(list):
+    def all(self):
+        return self
+
+    def count(self):
+        return len(self)
+
+
+class _SyntheticObject:
+    """Any attribute that is not given is an empty string"""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def __getattr__(self, name):
+        return ""
+
+
+def _synthetic_application(application_number):
+    return _SyntheticObject(
+        application_number=application_number,
+        status=ApplicationStatus.ACCEPTED,
+        benefit_type=BenefitType.SALARY_BENEFIT,
+        start_date=date(2023, 1, 1),
+        end_date=date(2023, 6, 30),
+        company=_SyntheticObject(
+            business_id="1234567-8",
+            company_form_code=YtjOrganizationCode.COMPANY_FORM_CODE_DEFAULT,
+        ),
+        use_alternative_address=False,
+        association_has_business_activities=None,
+        association_immediate_manager_check=None,
+        co_operation_negotiations=False,
+        apprenticeship_program=False,
+        archived=False,
+        employee=_SyntheticObject(id=application_number, is_living_in_helsinki=True),
+        calculation=_SyntheticObject(
+            calculated_benefit_amount=decimal.Decimal("4800.00"),
+            granted_as_de_minimis_aid=False,
+            target_group_check=True,
+        ),
+        ahjo_rows=_RelatedItems(
+            _SyntheticObject(
+                amount=decimal.Decimal("4800.00"),
+                monthly_amount=decimal.Decimal("800.00"),
+                start_date=date(2023, 1, 1),
+                end_date=date(2023, 6, 30),
+            )
+            for _ in range(2)
+        ),
+        pay_subsidies=_RelatedItems(
+            [_SyntheticObject(pay_subsidy_percent=50, disability_or_illness=False)]
+        ),
+        de_minimis_aid_set=_RelatedItems(
+            [_SyntheticObject(amount=decimal.Decimal("1000.00"))]
+        ),
+    )
+
+
+def test_applications_csv_columns_compiled_once():
+    applications = [_synthetic_application(i) for i in range(100)]
+    csv_service = ApplicationsCsvService(applications)
+
+    with patch(
+        "applications.services.csv_export_base.compile_csv_column",
+        wraps=compile_csv_column,
+    ) as compile_mock:
+        lines = list(csv_service.get_csv_cell_list_lines_generator())
+
+    # once per column, not once per row
+    assert compile_mock.call_count == len(csv_service.CSV_COLUMNS)
+    assert len(lines) - 1 == 2 * len(applications)
+    assert {len(line) for line in lines} == {len(csv_service.CSV_COLUMNS)}
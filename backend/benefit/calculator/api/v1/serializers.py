@@ -5,7 +5,8 @@ from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
 
 from applications.enums import ApplicationActions, ApplicationStatus, BenefitType
-from applications.models import Application
+from applications.models import Application, PAY_SUBSIDY_PERCENT_CHOICES
+from calculator.enums import DescriptionType, RowType
 from calculator.models import (
     Calculation,
     CalculationRow,
@@ -14,6 +15,11 @@ from calculator.models import (
     STATE_AID_MAX_PERCENTAGE_CHOICES,
     TrainingCompensation,
 )
+from calculator.simulation import (
+    CalculationInput,
+    PaySubsidyInput,
+    TrainingCompensationInput,
+)
 from users.api.v1.serializers import UserSerializer
 from users.models import User
 
@@ -348,3 +354,114 @@ class PreviousBenefitSerializer(serializers.ModelSerializer):
             "total_amount",
         ]
         read_only_fields = []
+
+
+class PaySubsidySimulationSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    pay_subsidy_percent = serializers.ChoiceField(choices=PAY_SUBSIDY_PERCENT_CHOICES)
+    work_time_percent = serializers.DecimalField(
+        max_digits=5,
+        decimal_places=2,
+        min_value=0,
+        max_value=100,
+        default=PaySubsidy.DEFAULT_WORK_TIME_PERCENT,
+    )
+    disability_or_illness = serializers.BooleanField(default=False)
+
+    def validate(self, data):
+        if data["start_date"] > data["end_date"]:
+            raise serializers.ValidationError(
+                {"end_date": _("End date cannot be before start date")}
+            )
+        return data
+
+
+class TrainingCompensationSimulationSerializer(serializers.Serializer):
+    start_date = serializers.DateField()
+    end_date = serializers.DateField()
+    monthly_amount = serializers.DecimalField(
+        max_digits=7, decimal_places=2, min_value=0
+    )
+
+    def validate(self, data):
+        if data["start_date"] > data["end_date"]:
+            raise serializers.ValidationError(
+                {"end_date": _("End date cannot be before start date")}
+            )
+        return data
+
+
+class CalculationSimulationSerializer(serializers.Serializer):
+    """
+    Input of a what-if calculation. The calculation is made with the same rules as the
+    calculations of the applications, but nothing is saved.
+    """
+
+    benefit_type = serializers.ChoiceField(choices=BenefitType.choices)
+    monthly_pay = serializers.DecimalField(max_digits=7, decimal_places=2, min_value=0)
+    vacation_money = serializers.DecimalField(
+        max_digits=7, decimal_places=2, min_value=0
+    )
+    other_expenses = serializers.DecimalField(
+        max_digits=7, decimal_places=2, min_value=0
+    )
+    start_date = serializers.DateField(allow_null=True)
+    end_date = serializers.DateField(allow_null=True)
+    state_aid_max_percentage = serializers.ChoiceField(
+        choices=STATE_AID_MAX_PERCENTAGE_CHOICES, allow_null=True, default=None
+    )
+    pay_subsidies = PaySubsidySimulationSerializer(many=True, default=list)
+    training_compensations = TrainingCompensationSimulationSerializer(
+        many=True, default=list
+    )
+
+    def validate(self, data):
+        start_date, end_date = data["start_date"], data["end_date"]
+        if start_date is not None and end_date is not None:
+            if start_date > end_date:
+                raise serializers.ValidationError(
+                    {"end_date": _("End date cannot be before start date")}
+                )
+            if (
+                start_date
+                + relativedelta(months=CalculationSerializer.CALCULATION_MAX_MONTHS)
+                <= end_date
+            ):
+                raise serializers.ValidationError(
+                    {"end_date": _("Date range too large")}
+                )
+        return data
+
+    def to_calculation_input(self) -> CalculationInput:
+        data = dict(self.validated_data)
+        data["pay_subsidies"] = [
+            PaySubsidyInput(**pay_subsidy) for pay_subsidy in data["pay_subsidies"]
+        ]
+        data["training_compensations"] = [
+            TrainingCompensationInput(**training_compensation)
+            for training_compensation in data["training_compensations"]
+        ]
+        return CalculationInput(**data)
+
+
+class SimulatedCalculationRowSerializer(serializers.Serializer):
+    row_type = serializers.ChoiceField(choices=RowType.choices)
+    ordering = serializers.IntegerField()
+    description_fi = serializers.CharField()
+    amount = serializers.DecimalField(max_digits=7, decimal_places=2)
+    description_type = serializers.ChoiceField(
+        choices=DescriptionType.choices, allow_null=True
+    )
+
+
+class SimulatedCalculationSerializer(serializers.Serializer):
+    rows = SimulatedCalculationRowSerializer(
+        many=True, help_text="Calculation rows, generated by the calculator"
+    )
+    calculated_benefit_amount = serializers.DecimalField(
+        max_digits=7,
+        decimal_places=2,
+        allow_null=True,
+        help_text="Total amount of the benefit, or null if the calculation can not be made",
+    )
@@ -1,9 +1,16 @@
 from django_filters import rest_framework as filters
 from drf_spectacular.utils import extend_schema
 from rest_framework import filters as drf_filters
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from calculator.api.v1.serializers import PreviousBenefitSerializer
+from calculator.api.v1.serializers import (
+    CalculationSimulationSerializer,
+    PreviousBenefitSerializer,
+    SimulatedCalculationSerializer,
+)
 from calculator.models import PreviousBenefit
+from calculator.simulation import simulate_calculation
 from common.permissions import BFIsHandler
 from shared.audit_log.viewsets import AuditLoggingModelViewSet
 
@@ -33,3 +40,26 @@ class PreviousBenefitViewSet(AuditLoggingModelViewSet):
     ]
     filterset_class = PreviousBenefitFilter
     search_fields = ["company__name", "social_security_number"]
+
+
+class CalculationSimulationView(APIView):
+    """
+    API View for what-if calculations. The handlers can try out how the input values affect the
+    benefit amount without changing the calculation of any application.
+    """
+
+    permission_classes = [BFIsHandler]
+
+    @extend_schema(
+        request=CalculationSimulationSerializer,
+        responses=SimulatedCalculationSerializer,
+        description=(
+            "Calculate the benefit for the given input without saving anything. The same calculation"
+            " rules are used as in the calculations of the applications."
+        ),
+    )
+    def post(self, request):
+        serializer = CalculationSimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        simulated_calculation = simulate_calculation(serializer.to_calculation_input())
+        return Response(SimulatedCalculationSerializer(simulated_calculation).data)
@@ -0,0 +1,173 @@
+import collections
+import logging
+import multiprocessing
+import time
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Iterator, Optional
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+
+from calculator.models import Calculation
+from calculator.rules import HelsinkiBenefitCalculator
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class RecalculationResult:
+    application_number: int
+    old_amount: Optional[Decimal]
+    new_amount: Optional[Decimal]
+    failed: bool = False
+
+    @property
+    def changed(self) -> bool:
+        return not self.failed and self.old_amount != self.new_amount
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalculate the calculations of all the applications that can still be recalculated, "
+        "e.g. after the calculation rules have changed"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the applications whose calculated benefit amount would change",
+        )
+
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="The number of worker processes, 1 (the default) to recalculate in the current "
+            "process",
+        )
+
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="The number of calculations processed by a worker at a time",
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        start_time = time.perf_counter()
+        results = recalculate_calculations(
+            options["workers"], options["chunk_size"], dry_run
+        )
+
+        total, changed, failed = 0, 0, 0
+        for result in results:
+            total += 1
+            if result.failed:
+                failed += 1
+                self.stdout.write(
+                    f"Failed to recalculate application {result.application_number}"
+                )
+            elif result.changed:
+                changed += 1
+                self.stdout.write(
+                    f"Application {result.application_number}: "
+                    f"{result.old_amount} -> {result.new_amount}"
+                )
+        elapsed = time.perf_counter() - start_time
+
+        throughput = total / elapsed if elapsed > 0 else 0
+
+        verb = "would change" if dry_run else "changed"
+        self.stdout.write(
+            f"Recalculated {total} calculations, {changed} {verb}, {failed} failed"
+        )
+        self.stdout.write(
+            f"Elapsed time {elapsed:.2f} s ({throughput:.2f} calculations/s)"
+        )
+
+
+def recalculate_calculations(
+    workers: int, chunk_size: int, dry_run: bool
+) -> Iterator[RecalculationResult]:
+    """Recalculate all calculations whose application is in one of the statuses that allow
+    recalculation. The ids of the calculations are streamed from the database in chunks, and each
+    chunk is recalculated in a worker process that uses its own database connection.
+    If dry_run is True, the changes are rolled back after each calculation."""
+    chunks = _calculation_id_chunks(chunk_size)
+    if workers <= 1:
+        for calculation_ids in chunks:
+            yield from _recalculate_chunk(calculation_ids, dry_run)
+        return
+
+    # The database connections must not be shared with the forked worker processes
+    connections.close_all()
+    pool = multiprocessing.Pool(processes=workers)
+    try:
+        pending = collections.deque()
+        for calculation_ids in chunks:
+            pending.append(
+                pool.apply_async(_recalculate_chunk, (calculation_ids, dry_run))
+            )
+            # keep the number of queued chunks bounded
+            if len(pending) > 2 * workers:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _calculation_id_chunks(chunk_size: int) -> Iterator[list]:
+    calculation_ids = (
+        Calculation.objects.filter(
+            application__status__in=HelsinkiBenefitCalculator.CALCULATION_ALLOWED_STATUSES
+        )
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=chunk_size)
+    )
+    chunk = []
+    for calculation_id in calculation_ids:
+        chunk.append(calculation_id)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _recalculate_chunk(calculation_ids: list, dry_run: bool) -> list:
+    calculations = (
+        Calculation.objects.filter(pk__in=calculation_ids)
+        .select_related("application")
+        .prefetch_related(
+            "application__pay_subsidies", "application__training_compensations"
+        )
+    )
+    return [_recalculate(calculation, dry_run) for calculation in calculations]
+
+
+def _recalculate(calculation: Calculation, dry_run: bool) -> RecalculationResult:
+    old_amount = calculation.calculated_benefit_amount
+    try:
+        with transaction.atomic():
+            calculation.calculate()
+            if dry_run:
+                transaction.set_rollback(True)
+    except Exception:
+        LOGGER.exception(f"Failed to recalculate {calculation}")
+        return RecalculationResult(
+            calculation.application.application_number,
+            old_amount,
+            None,
+            failed=True,
+        )
+    return RecalculationResult(
+        calculation.application.application_number,
+        old_amount,
+        calculation.calculated_benefit_amount,
+    )
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.23 on 2026-10-18 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('calculator', '0015_desc_type_for_old_calc_rows'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='previousbenefit',
+            index=models.Index(fields=['company', 'social_security_number'], name='bf_calculat_company_91d4bf_idx'),
+        ),
+    ]
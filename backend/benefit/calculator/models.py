@@ -1,6 +1,8 @@
 import decimal
 import operator
+from collections import defaultdict
 from datetime import timedelta
+from typing import Iterable
 
 from babel.dates import format_date
 from django.conf import settings
@@ -136,8 +138,13 @@ class Calculation(UUIDModel, TimeStampedModel, DurationMixin):
         blank=True,
     )
 
+    # Set by prefetch_ahjo_rows, so that the rows of each exported calculation are not queried separately
+    _prefetched_ahjo_rows = None
+
     @property
     def ahjo_rows(self):
+        if self._prefetched_ahjo_rows is not None:
+            return self._prefetched_ahjo_rows
         rows = SalaryBenefitSubTotalRow.objects.filter(
             calculation=self, row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
         )
@@ -153,6 +160,68 @@ class Calculation(UUIDModel, TimeStampedModel, DurationMixin):
                 calculation=self, row_type=RowType.HELSINKI_BENEFIT_TOTAL_EUR
             )
 
+    @classmethod
+    def prefetch_ahjo_rows(cls, calculations: Iterable["Calculation"]):
+        """
+        Fetch the ahjo_rows of the calculations, and the monthly amounts of the rows, with at most
+        four queries. The rows are chosen the same way as in ahjo_rows, and stored as lists in the
+        calculations.
+        """
+        calculations = {calculation.pk: calculation for calculation in calculations}
+        if not calculations:
+            return
+        ahjo_rows = defaultdict(list)
+
+        for row in SalaryBenefitSubTotalRow.objects.filter(
+            calculation_id__in=calculations.keys(),
+            row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR,
+        ).order_by("ordering"):
+            ahjo_rows[row.calculation_id].append(row)
+
+        without_sub_total_rows = [
+            calculation
+            for pk, calculation in calculations.items()
+            if pk not in ahjo_rows
+        ]
+        for row_class, row_calculations in (
+            (
+                ManualOverrideTotalRow,
+                [
+                    calculation.pk
+                    for calculation in without_sub_total_rows
+                    if calculation.override_monthly_benefit_amount is not None
+                ],
+            ),
+            (
+                SalaryBenefitTotalRow,
+                [
+                    calculation.pk
+                    for calculation in without_sub_total_rows
+                    if calculation.override_monthly_benefit_amount is None
+                ],
+            ),
+        ):
+            if row_calculations:
+                for row in row_class.objects.filter(
+                    calculation_id__in=row_calculations,
+                    row_type=RowType.HELSINKI_BENEFIT_TOTAL_EUR,
+                ).order_by("ordering"):
+                    ahjo_rows[row.calculation_id].append(row)
+
+        TotalRowMixin.prefetch_monthly_amounts(
+            [
+                row
+                for rows in ahjo_rows.values()
+                for row in rows
+                if isinstance(row, TotalRowMixin)
+            ]
+        )
+
+        for pk, calculation in calculations.items():
+            for row in ahjo_rows[pk]:
+                row.calculation = calculation
+            calculation._prefetched_ahjo_rows = ahjo_rows[pk]
+
     history = HistoricalRecords(table_name="bf_calculator_calculator_history")
 
     copy_fields_from_application = {
@@ -384,6 +453,9 @@ class PreviousBenefit(UUIDModel, TimeStampedModel, DurationMixin):
         db_table = "bf_calculator_previousbenefit"
         verbose_name = _("Previously granted benefit")
         verbose_name_plural = _("Previously granted benefits")
+        indexes = [
+            models.Index(fields=["company", "social_security_number"]),
+        ]
 
 
 class TrainingCompensation(UUIDModel, TimeStampedModel, DurationMixin):
@@ -512,12 +584,16 @@ class DateRangeDescriptionRow(CalculationRow):
         start_date = kwargs.pop("start_date", None)
         end_date = kwargs.pop("end_date", None)
         prefix_text = kwargs.pop("prefix_text", None)
+        # the duration rounded to two decimals, if the calculator computed it already
+        duration = kwargs.pop("duration", None)
 
         if start_date and end_date and prefix_text:
+            if duration is None:
+                duration = duration_in_months(start_date, end_date, 2)
             self.description_fi_template = (
                 f'{prefix_text} {format_date(start_date, locale="fi_FI")} - '
                 f'{format_date(end_date, locale="fi_FI")} '
-                f"({to_decimal(duration_in_months(start_date, end_date), 2)} kk)"
+                f"({duration} kk)"
             )
         super().__init__(*args, **kwargs)
 
@@ -694,8 +770,14 @@ class SalaryBenefitMonthlyRow(CalculationRow):
 
 
 class TotalRowMixin:
+    # Set by the calculator when the row is created, so that the monthly amount does not need to be
+    # queried for the rows of a calculation that is still in memory
+    _monthly_amount = None
+
     @property
     def monthly_amount(self):
+        if self._monthly_amount is not None:
+            return self._monthly_amount
         # For each total row, there needs to be a row that defines the monthly amount
         row = (
             self.calculation.rows.filter(
@@ -710,6 +792,31 @@ class TotalRowMixin:
         ), "Application logic error - misconstructed application rows"
         return row.amount
 
+    @monthly_amount.setter
+    def monthly_amount(self, value):
+        self._monthly_amount = value
+
+    @staticmethod
+    def prefetch_monthly_amounts(rows: list["TotalRowMixin"]):
+        """Set the monthly amounts of the total rows of many calculations with one query."""
+        if not rows:
+            return
+        monthly_rows = defaultdict(list)
+        for calculation_id, ordering, amount in CalculationRow.objects.filter(
+            calculation_id__in={row.calculation_id for row in rows},
+            row_type=RowType.HELSINKI_BENEFIT_MONTHLY_EUR,
+        ).values_list("calculation_id", "ordering", "amount"):
+            monthly_rows[calculation_id].append((ordering, amount))
+        for row in rows:
+            # the same row as in monthly_amount: the closest monthly row before the total row
+            previous_monthly_rows = [
+                (ordering, amount)
+                for ordering, amount in monthly_rows[row.calculation_id]
+                if ordering < row.ordering
+            ]
+            if previous_monthly_rows:
+                row.monthly_amount = max(previous_monthly_rows)[1]
+
 
 class SalaryBenefitTotalRow(CalculationRow, TotalRowMixin):
     """
@@ -739,11 +846,16 @@ class SalaryBenefitSubTotalRow(CalculationRow, TotalRowMixin):
     description_fi_template = "Yhteensä ajanjaksolta"
 
     def __init__(self, *args, **kwargs):
+        # the duration rounded to two decimals, if the calculator computed it already
+        self.duration = kwargs.pop("duration", None)
         super().__init__(*args, **kwargs)
 
     def calculate_amount(self):
+        duration = self.duration
+        if duration is None:
+            duration = duration_in_months(self.start_date, self.end_date, 2)
         return to_decimal(
-            duration_in_months(self.start_date, self.end_date, 2)
+            duration
             * self.calculation.calculator.get_amount(
                 RowType.HELSINKI_BENEFIT_MONTHLY_EUR
             ),
@@ -760,12 +872,9 @@ class SalaryBenefitSumSubTotalsRow(CalculationRow):
 
     def calculate_amount(self):
         return sum(
-            [
-                row.amount
-                for row in self.calculation.rows.all().filter(
-                    row_type=RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
-                )
-            ]
+            self.calculation.calculator.get_amounts(
+                RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR
+            )
         )
 
     class Meta:
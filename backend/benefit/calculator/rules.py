@@ -2,9 +2,12 @@ import collections
 import datetime
 import decimal
 import logging
-from typing import Union
+import operator
+from typing import Optional, Union
 
 from django.db import transaction
+from django.db.backends.utils import format_number
+from simple_history.utils import bulk_create_with_history
 
 from applications.enums import ApplicationStatus, BenefitType
 from calculator.enums import DescriptionType, RowType
@@ -25,9 +28,11 @@ from calculator.models import (
     SalaryCostsRow,
     StateAidMaxMonthlyRow,
     TotalDeductionsMonthlyRow,
+    TotalRowMixin,
+    TrainingCompensation,
     TrainingCompensationMonthlyRow,
 )
-from common.utils import pairwise
+from common.utils import durations_in_months, pairwise
 
 LOGGER = logging.getLogger(__name__)
 BenefitSubRange = collections.namedtuple(
@@ -37,21 +42,48 @@ BenefitSubRange = collections.namedtuple(
 
 
 class HelsinkiBenefitCalculator:
-    def __init__(self, calculation: Calculation):
+    def __init__(
+        self,
+        calculation: Calculation,
+        pay_subsidies: Optional[list[PaySubsidy]] = None,
+        training_compensations: Optional[list[TrainingCompensation]] = None,
+    ):
         self.calculation = calculation
+        # If given, these are used instead of the ones stored in the database for the application,
+        # so that a calculation can be made without accessing the database (see calculator.simulation)
+        self._pay_subsidies = pay_subsidies
+        self._training_compensations = training_compensations
+        self._reset_rows()
+
+    def _reset_rows(self):
+        # The rows are built in memory and saved with a single bulk insert once the calculation is
+        # complete. Amounts of the rows created so far are kept by row type for get_amount().
         self._row_counter = 0
+        self._rows = []
+        self._amounts_by_row_type = collections.defaultdict(list)
 
     @staticmethod
-    def get_calculator(calculation: Calculation):
+    def get_calculator(calculation: Calculation, **kwargs):
         # in future, one might use e.g. application date to determine the correct calculator
         if calculation.override_monthly_benefit_amount is not None:
-            return ManualOverrideCalculator(calculation)
+            return ManualOverrideCalculator(calculation, **kwargs)
         elif calculation.application.benefit_type == BenefitType.SALARY_BENEFIT:
-            return SalaryBenefitCalculator2023(calculation)
+            return SalaryBenefitCalculator2023(calculation, **kwargs)
         elif calculation.application.benefit_type == BenefitType.EMPLOYMENT_BENEFIT:
-            return EmployeeBenefitCalculator2021(calculation)
+            return EmployeeBenefitCalculator2021(calculation, **kwargs)
         else:
-            return DummyBenefitCalculator(calculation)
+            return DummyBenefitCalculator(calculation, **kwargs)
+
+    def get_pay_subsidies(self) -> list[PaySubsidy]:
+        if self._pay_subsidies is not None:
+            return self._pay_subsidies
+        # use all() so that prefetched pay subsidies are used when available
+        return list(self.calculation.application.pay_subsidies.all())
+
+    def get_training_compensations(self) -> list[TrainingCompensation]:
+        if self._training_compensations is not None:
+            return self._training_compensations
+        return list(self.calculation.application.training_compensations.all())
 
     def get_sub_total_ranges(self):
         # return a list of BenefitSubRange(start_date, end_date, pay_subsidy, training_compensation)
@@ -61,11 +93,12 @@ class HelsinkiBenefitCalculator:
             raise ValueError(
                 "Cannot get sub total range of calculation start_date or end_date"
             )
+        start_date_key = operator.attrgetter("start_date")
         pay_subsidies = PaySubsidy.merge_compatible_subsidies(
-            list(self.calculation.application.pay_subsidies.order_by("start_date"))
+            sorted(self.get_pay_subsidies(), key=start_date_key)
         )
-        training_compensations = list(
-            self.calculation.application.training_compensations.order_by("start_date")
+        training_compensations = sorted(
+            self.get_training_compensations(), key=start_date_key
         )
 
         change_days = {
@@ -112,15 +145,15 @@ class HelsinkiBenefitCalculator:
 
     def get_amount(self, row_type: RowType, default=None):
         # This function is used by the various CalculationRow to retrieve a previously calculated value
-        row = (
-            self.calculation.rows.order_by("-ordering")
-            .filter(row_type=row_type)
-            .first()
-        )
-        if not row and default is not None:
+        amounts = self._amounts_by_row_type.get(row_type)
+        if not amounts and default is not None:
             return default
-        assert row, f"Internal error, {row_type} not found"
-        return row.amount
+        assert amounts, f"Internal error, {row_type} not found"
+        return amounts[-1]
+
+    def get_amounts(self, row_type: RowType) -> list[decimal.Decimal]:
+        # Return the amounts of all the previously calculated rows of the given type, in row order
+        return list(self._amounts_by_row_type.get(row_type, []))
 
     # if calculation is enabled for non-handler users, need to change this
     # locked applications (transferred to Ahjo) should never be re-calculated.
@@ -140,12 +173,23 @@ class HelsinkiBenefitCalculator:
             return False
         return True
 
+    def calculate_rows(self) -> list[CalculationRow]:
+        """
+        Create the calculation rows in memory without saving them. Returns an empty list if the
+        calculation can not be made. The database is not accessed if the pay subsidies and training
+        compensations were given to the calculator.
+        """
+        self._reset_rows()
+        if self.can_calculate():
+            self.create_rows()
+        return self._rows
+
     @transaction.atomic
     def calculate(self):
         if self.calculation.application.status in self.CALCULATION_ALLOWED_STATUSES:
             self.calculation.rows.all().delete()
-            if self.can_calculate():
-                self.create_rows()
+            if self.calculate_rows():
+                self._save_rows()
                 # the total benefit amount is stored in Calculation model, for easier processing.
                 self.calculation.calculated_benefit_amount = self.get_amount(
                     RowType.HELSINKI_BENEFIT_TOTAL_EUR
@@ -160,9 +204,28 @@ class HelsinkiBenefitCalculator:
         )
         self._row_counter += 1
         row.update_row()
-        row.save()
+        if isinstance(row, TotalRowMixin):
+            row.monthly_amount = self.get_amount(RowType.HELSINKI_BENEFIT_MONTHLY_EUR)
+        self._rows.append(row)
+        self._amounts_by_row_type[row.row_type].append(
+            self.as_stored_amount(row.amount)
+        )
         return row
 
+    @staticmethod
+    def as_stored_amount(amount) -> decimal.Decimal:
+        # Round the amount the same way as it is rounded when saved to the database, so that
+        # get_amount() returns the same values as when the rows were read back from the database.
+        field = CalculationRow._meta.get_field("amount")
+        return decimal.Decimal(
+            format_number(
+                field.to_python(amount), field.max_digits, field.decimal_places
+            )
+        )
+
+    def _save_rows(self):
+        bulk_create_with_history(self._rows, CalculationRow)
+
     def create_rows(self):
         pass
 
@@ -210,7 +273,7 @@ class SalaryBenefitCalculator2023(HelsinkiBenefitCalculator):
             ]
         ):
             return False
-        for pay_subsidy in self.calculation.application.pay_subsidies.all():
+        for pay_subsidy in self.get_pay_subsidies():
             if not all([pay_subsidy.start_date, pay_subsidy.end_date]):
                 return False
         return True
@@ -274,13 +337,18 @@ class SalaryBenefitCalculator2023(HelsinkiBenefitCalculator):
         assert date_ranges
         self._create_row(SalaryCostsRow)
         self._create_row(StateAidMaxMonthlyRow)
+        durations = durations_in_months(
+            [(sub_range.start_date, sub_range.end_date) for sub_range in date_ranges],
+            decimal_places=2,
+        )
 
-        for sub_range in date_ranges:
+        for sub_range, duration in zip(date_ranges, durations):
             if len(date_ranges) > 1:
                 self._create_row(
                     DateRangeDescriptionRow,
                     start_date=sub_range.start_date,
                     end_date=sub_range.end_date,
+                    duration=duration,
                     prefix_text="Ajalta",
                     description_type=DescriptionType.DATE,
                 )
@@ -295,6 +363,7 @@ class SalaryBenefitCalculator2023(HelsinkiBenefitCalculator):
                 SalaryBenefitSubTotalRow,
                 start_date=sub_range.start_date,
                 end_date=sub_range.end_date,
+                duration=duration,
             )
 
         if len(date_ranges) > 1:
@@ -0,0 +1,133 @@
+"""
+What-if calculations for the handlers.
+
+The calculation is made with the same rules as Calculation.calculate(), but the input is given as plain
+dataclasses and nothing is read from or written to the database. The model objects needed by the
+calculator are only created in memory.
+"""
+import decimal
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Optional
+
+from applications.enums import ApplicationStatus, BenefitType
+from applications.models import Application
+from calculator.enums import DescriptionType, RowType
+from calculator.models import Calculation, PaySubsidy, TrainingCompensation
+from calculator.rules import HelsinkiBenefitCalculator
+
+
+@dataclass
+class PaySubsidyInput:
+    start_date: date
+    end_date: date
+    pay_subsidy_percent: int
+    work_time_percent: decimal.Decimal = PaySubsidy.DEFAULT_WORK_TIME_PERCENT
+    disability_or_illness: bool = False
+
+
+@dataclass
+class TrainingCompensationInput:
+    start_date: date
+    end_date: date
+    monthly_amount: decimal.Decimal
+
+
+@dataclass
+class CalculationInput:
+    benefit_type: BenefitType
+    monthly_pay: decimal.Decimal
+    vacation_money: decimal.Decimal
+    other_expenses: decimal.Decimal
+    start_date: Optional[date]
+    end_date: Optional[date]
+    state_aid_max_percentage: Optional[int] = None
+    pay_subsidies: list[PaySubsidyInput] = field(default_factory=list)
+    training_compensations: list[TrainingCompensationInput] = field(
+        default_factory=list
+    )
+
+
+@dataclass
+class SimulatedCalculationRow:
+    row_type: RowType
+    ordering: int
+    description_fi: str
+    amount: decimal.Decimal
+    start_date: Optional[date]
+    end_date: Optional[date]
+    description_type: Optional[DescriptionType]
+
+
+@dataclass
+class SimulatedCalculation:
+    rows: list[SimulatedCalculationRow]
+    calculated_benefit_amount: Optional[decimal.Decimal]
+
+
+def simulate_calculation(calculation_input: CalculationInput) -> SimulatedCalculation:
+    """Calculate the rows and the total benefit amount for the given input without database access."""
+    # application_number is given so that the default value is not fetched from the database sequence
+    application = Application(
+        application_number=0,
+        benefit_type=calculation_input.benefit_type,
+        status=ApplicationStatus.HANDLING,
+    )
+    calculation = Calculation(
+        application=application,
+        monthly_pay=calculation_input.monthly_pay,
+        vacation_money=calculation_input.vacation_money,
+        other_expenses=calculation_input.other_expenses,
+        start_date=calculation_input.start_date,
+        end_date=calculation_input.end_date,
+        state_aid_max_percentage=calculation_input.state_aid_max_percentage,
+    )
+    pay_subsidies = [
+        PaySubsidy(
+            application=application,
+            ordering=ordering,
+            start_date=pay_subsidy.start_date,
+            end_date=pay_subsidy.end_date,
+            pay_subsidy_percent=pay_subsidy.pay_subsidy_percent,
+            work_time_percent=pay_subsidy.work_time_percent,
+            disability_or_illness=pay_subsidy.disability_or_illness,
+        )
+        for ordering, pay_subsidy in enumerate(calculation_input.pay_subsidies)
+    ]
+    training_compensations = [
+        TrainingCompensation(
+            application=application,
+            ordering=ordering,
+            start_date=training_compensation.start_date,
+            end_date=training_compensation.end_date,
+            monthly_amount=training_compensation.monthly_amount,
+        )
+        for ordering, training_compensation in enumerate(
+            calculation_input.training_compensations
+        )
+    ]
+    # the calculation rows access the calculator through the calculation
+    calculator = calculation.calculator = HelsinkiBenefitCalculator.get_calculator(
+        calculation,
+        pay_subsidies=pay_subsidies,
+        training_compensations=training_compensations,
+    )
+
+    rows = calculator.calculate_rows()
+    return SimulatedCalculation(
+        rows=[
+            SimulatedCalculationRow(
+                row_type=row.row_type,
+                ordering=row.ordering,
+                description_fi=row.description_fi,
+                amount=calculator.as_stored_amount(row.amount),
+                start_date=row.start_date,
+                end_date=row.end_date,
+                description_type=row.description_type,
+            )
+            for row in rows
+        ],
+        calculated_benefit_amount=(
+            calculator.get_amount(RowType.HELSINKI_BENEFIT_TOTAL_EUR) if rows else None
+        ),
+    )
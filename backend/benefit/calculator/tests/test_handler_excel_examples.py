@@ -1,6 +1,8 @@
 import datetime
 import os
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from openpyxl import load_workbook
 from openpyxl.utils import get_column_letter
 
@@ -50,6 +52,13 @@ sentinel = object()
 
 
 class SalaryBenefitExcelTest(ExcelTestCase):
+    # The calculation rows are built in memory and saved in bulk, so the number of queries
+    # must be exactly the same regardless of how many sub ranges and rows the calculation has:
+    # savepoint, delete old rows, pay subsidies (can_calculate), pay subsidies and training
+    # compensations (sub ranges), insert rows and their history, update calculation and its history,
+    # release savepoint
+    calculation_query_count = 10
+
     def _setup(self):
         self._setup_expected_results()
         self._setup_db_objects()
@@ -203,9 +212,16 @@ class SalaryBenefitExcelTest(ExcelTestCase):
         self.application.calculation.init_calculator()
         if self.application.TEST_FLAGS == "SKIP":
             return
-        self.application.calculation.calculate()
+        self._calculate()
         self._verify_results()
 
+    def _calculate(self):
+        with CaptureQueriesContext(connection) as context:
+            self.application.calculation.calculate()
+        assert len(context) == self.calculation_query_count, "\n".join(
+            query["sql"] for query in context.captured_queries
+        )
+
     def _verify_results(self):
         for row in self.application.calculation.rows.all():
             print(row)
@@ -216,6 +232,9 @@ class SalaryBenefitExcelTest(ExcelTestCase):
 
 
 class EmployeeBenefitExcelTest(SalaryBenefitExcelTest):
+    # the employee benefit calculation does not use pay subsidies or training compensations
+    calculation_query_count = 7
+
     def _setup_expected_results(self):
         # actual expected values loaded from Excel
         self.expected_results = ExpectedResults(
@@ -260,7 +279,7 @@ class EmployeeBenefitExcelTest(SalaryBenefitExcelTest):
     def run_test(self):
         self._setup()
         self.application.calculation.init_calculator()
-        self.application.calculation.calculate()
+        self._calculate()
         self._verify_results()
 
     def _verify_results(self):
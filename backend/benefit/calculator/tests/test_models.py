@@ -1,15 +1,22 @@
-from datetime import date
+from datetime import date, timedelta
 
 import pytest
 
 from applications.enums import ApplicationStatus, BenefitType
 from applications.tests.conftest import *  # noqa
+from applications.tests.factories import DecidedApplicationFactory
+from calculator.enums import RowType
 from calculator.models import (
     Calculation,
+    ManualOverrideTotalRow,
     PaySubsidy,
     PreviousBenefit,
+    SalaryBenefitSubTotalRow,
+    SalaryBenefitTotalRow,
+    TotalRowMixin,
     TrainingCompensation,
 )
+from calculator.tests.factories import PaySubsidyFactory
 from common.exceptions import BenefitAPIException
 from common.utils import duration_in_months
 from helsinkibenefit.tests.conftest import *  # noqa
@@ -250,3 +257,98 @@ def test_calculation_required_fields(
     else:
         assert handling_application.calculation.calculated_benefit_amount is None
         assert handling_application.calculation.rows.count() == 0
+
+
+def test_calculator_can_be_run_again(handling_application, django_assert_num_queries):
+    handling_application.benefit_type = BenefitType.SALARY_BENEFIT
+    handling_application.save()
+    # split the benefit period in two sub ranges, so that the sub totals are summed up
+    pay_subsidy = handling_application.pay_subsidies.get()
+    pay_subsidy.end_date = pay_subsidy.start_date + timedelta(days=14)
+    pay_subsidy.save()
+    PaySubsidyFactory(
+        application=handling_application,
+        start_date=pay_subsidy.end_date + timedelta(days=1),
+        end_date=handling_application.calculation.end_date,
+        pay_subsidy_percent=70,
+    )
+    calculator = handling_application.calculation.init_calculator()
+
+    calculator.calculate()
+    amount = handling_application.calculation.calculated_benefit_amount
+    row_count = handling_application.calculation.rows.count()
+    calculator.calculate()
+
+    assert handling_application.calculation.calculated_benefit_amount == amount
+    assert handling_application.calculation.rows.count() == row_count
+    assert len(calculator.get_amounts(RowType.HELSINKI_BENEFIT_SUB_TOTAL_EUR)) == 2
+
+    total_rows = [row for row in calculator._rows if isinstance(row, TotalRowMixin)]
+    assert total_rows
+    with django_assert_num_queries(0):
+        monthly_amounts = [row.monthly_amount for row in total_rows]
+    # the monthly amounts must equal the ones queried for the saved rows
+    assert monthly_amounts == [
+        type(row).objects.get(pk=row.pk).monthly_amount for row in total_rows
+    ]
+
+
+def _get_ahjo_rows(calculation):
+    return [
+        (type(row), row.pk, row.amount, row.monthly_amount)
+        for row in calculation.ahjo_rows
+    ]
+
+
+def test_prefetch_ahjo_rows(handling_application, django_assert_num_queries):
+    # sub total rows
+    handling_application.benefit_type = BenefitType.SALARY_BENEFIT
+    handling_application.save()
+    pay_subsidy = handling_application.pay_subsidies.get()
+    pay_subsidy.end_date = pay_subsidy.start_date + timedelta(days=14)
+    pay_subsidy.save()
+    PaySubsidyFactory(
+        application=handling_application,
+        start_date=pay_subsidy.end_date + timedelta(days=1),
+        end_date=handling_application.calculation.end_date,
+        pay_subsidy_percent=70,
+    )
+    handling_application.calculation.init_calculator()
+    handling_application.calculation.calculate()
+    # a single total row
+    total_application = DecidedApplicationFactory()
+    # a manually overridden total row
+    override_application = DecidedApplicationFactory()
+    override_application.calculation.override_monthly_benefit_amount = 100
+    override_application.calculation.save()
+    override_application.calculation.calculate()
+    # no rows
+    empty_application = DecidedApplicationFactory()
+    empty_application.calculation.rows.all().delete()
+
+    calculation_ids = [
+        application.calculation.pk
+        for application in [
+            handling_application,
+            total_application,
+            override_application,
+            empty_application,
+        ]
+    ]
+    expected_rows = [
+        _get_ahjo_rows(Calculation.objects.get(pk=pk)) for pk in calculation_ids
+    ]
+    assert [{row[0] for row in rows} for rows in expected_rows] == [
+        {SalaryBenefitSubTotalRow},
+        {SalaryBenefitTotalRow},
+        {ManualOverrideTotalRow},
+        set(),
+    ]
+
+    calculations = [Calculation.objects.get(pk=pk) for pk in calculation_ids]
+    with django_assert_num_queries(4):
+        Calculation.prefetch_ahjo_rows(calculations)
+    with django_assert_num_queries(0):
+        prefetched_rows = [_get_ahjo_rows(calculation) for calculation in calculations]
+
+    assert prefetched_rows == expected_rows
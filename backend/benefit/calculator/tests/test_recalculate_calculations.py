@@ -0,0 +1,105 @@
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+
+from applications.tests.conftest import *  # noqa
+from calculator.models import Calculation
+from helsinkibenefit.tests.conftest import *  # noqa
+
+
+def _set_stale_amount(application, amount=Decimal("1.00")):
+    # simulate a calculation that was made with different calculation rules
+    Calculation.objects.filter(pk=application.calculation.pk).update(
+        calculated_benefit_amount=amount
+    )
+    application.calculation.refresh_from_db()
+
+
+class _InProcessPool:
+    """Run the chunks in the test process, as the forked worker processes would not see the data
+    of the test transaction"""
+
+    def __init__(self, events, processes):
+        events.append(f"pool({processes})")
+
+    def apply_async(self, func, args):
+        result = func(*args)
+        return mock.Mock(get=mock.Mock(return_value=result))
+
+    def close(self):
+        pass
+
+    def join(self):
+        pass
+
+
+def test_recalculate_calculations_dry_run(handling_application):
+    expected_amount = handling_application.calculation.calculated_benefit_amount
+    _set_stale_amount(handling_application)
+    row_ids = set(handling_application.calculation.rows.values_list("pk", flat=True))
+    out = StringIO()
+
+    call_command("recalculate_calculations", dry_run=True, workers=1, stdout=out)
+
+    assert (
+        f"Application {handling_application.application_number}: 1.00 -> {expected_amount}"
+        in out.getvalue()
+    )
+    assert "Recalculated 1 calculations, 1 would change, 0 failed" in out.getvalue()
+    assert "calculations/s" in out.getvalue()
+    handling_application.calculation.refresh_from_db()
+    assert handling_application.calculation.calculated_benefit_amount == Decimal("1.00")
+    assert (
+        set(handling_application.calculation.rows.values_list("pk", flat=True))
+        == row_ids
+    )
+
+
+def test_recalculate_calculations(handling_application, decided_application):
+    expected_amount = handling_application.calculation.calculated_benefit_amount
+    _set_stale_amount(handling_application)
+    _set_stale_amount(decided_application)
+    out = StringIO()
+
+    call_command("recalculate_calculations", workers=1, stdout=out)
+
+    # decided applications are never recalculated
+    assert "Recalculated 1 calculations, 1 changed, 0 failed" in out.getvalue()
+    handling_application.calculation.refresh_from_db()
+    assert handling_application.calculation.calculated_benefit_amount == expected_amount
+    decided_application.calculation.refresh_from_db()
+    assert decided_application.calculation.calculated_benefit_amount == Decimal("1.00")
+
+
+def test_recalculate_calculations_unchanged(handling_application, received_application):
+    out = StringIO()
+
+    call_command("recalculate_calculations", workers=1, chunk_size=1, stdout=out)
+
+    assert "Recalculated 2 calculations, 0 changed, 0 failed" in out.getvalue()
+
+
+def test_recalculate_calculations_with_workers(
+    handling_application, received_application
+):
+    expected_amount = handling_application.calculation.calculated_benefit_amount
+    _set_stale_amount(handling_application)
+    events = []
+    out = StringIO()
+
+    with mock.patch(
+        "calculator.management.commands.recalculate_calculations.connections.close_all",
+        side_effect=lambda: events.append("close_all"),
+    ), mock.patch(
+        "calculator.management.commands.recalculate_calculations.multiprocessing.Pool",
+        side_effect=lambda processes: _InProcessPool(events, processes),
+    ):
+        call_command("recalculate_calculations", workers=2, chunk_size=1, stdout=out)
+
+    # the database connections are closed before the worker processes are forked
+    assert events == ["close_all", "pool(2)"]
+    assert "Recalculated 2 calculations, 1 changed, 0 failed" in out.getvalue()
+    handling_application.calculation.refresh_from_db()
+    assert handling_application.calculation.calculated_benefit_amount == expected_amount
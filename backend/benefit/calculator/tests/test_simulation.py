@@ -0,0 +1,155 @@
+import decimal
+from datetime import timedelta
+
+import pytest
+from rest_framework.reverse import reverse
+
+from applications.enums import BenefitType
+from applications.tests.conftest import *  # noqa
+from calculator.simulation import (
+    CalculationInput,
+    PaySubsidyInput,
+    simulate_calculation,
+    TrainingCompensationInput,
+)
+from calculator.tests.factories import TrainingCompensationFactory
+
+SIMULATE_URL = reverse("calculation-simulate")
+
+
+def _get_calculation_input(application):
+    calculation = application.calculation
+    return CalculationInput(
+        benefit_type=application.benefit_type,
+        monthly_pay=calculation.monthly_pay,
+        vacation_money=calculation.vacation_money,
+        other_expenses=calculation.other_expenses,
+        start_date=calculation.start_date,
+        end_date=calculation.end_date,
+        state_aid_max_percentage=calculation.state_aid_max_percentage,
+        pay_subsidies=[
+            PaySubsidyInput(
+                start_date=pay_subsidy.start_date,
+                end_date=pay_subsidy.end_date,
+                pay_subsidy_percent=pay_subsidy.pay_subsidy_percent,
+                work_time_percent=pay_subsidy.work_time_percent,
+                disability_or_illness=pay_subsidy.disability_or_illness,
+            )
+            for pay_subsidy in application.pay_subsidies.all()
+        ],
+        training_compensations=[
+            TrainingCompensationInput(
+                start_date=training_compensation.start_date,
+                end_date=training_compensation.end_date,
+                monthly_amount=training_compensation.monthly_amount,
+            )
+            for training_compensation in application.training_compensations.all()
+        ],
+    )
+
+
+@pytest.mark.parametrize(
+    "benefit_type", [BenefitType.SALARY_BENEFIT, BenefitType.EMPLOYMENT_BENEFIT]
+)
+def test_simulation_matches_calculation(
+    handling_application, benefit_type, django_assert_num_queries
+):
+    handling_application.benefit_type = benefit_type
+    handling_application.save()
+    TrainingCompensationFactory(
+        application=handling_application,
+        start_date=handling_application.calculation.start_date,
+        end_date=handling_application.calculation.start_date + timedelta(days=30),
+    )
+    calculation_input = _get_calculation_input(handling_application)
+
+    with django_assert_num_queries(0):
+        simulated = simulate_calculation(calculation_input)
+    handling_application.calculation.calculate()
+
+    rows = list(handling_application.calculation.rows.order_by("ordering"))
+    assert [
+        (row.row_type, row.description_fi, row.amount, row.description_type)
+        for row in rows
+    ] == [
+        (row.row_type, row.description_fi, row.amount, row.description_type)
+        for row in simulated.rows
+    ]
+    assert (
+        simulated.calculated_benefit_amount
+        == handling_application.calculation.calculated_benefit_amount
+    )
+
+
+def test_simulation_without_dates(handling_application):
+    calculation_input = _get_calculation_input(handling_application)
+    calculation_input.start_date = None
+
+    simulated = simulate_calculation(calculation_input)
+
+    assert simulated.rows == []
+    assert simulated.calculated_benefit_amount is None
+
+
+def _get_simulation_data():
+    return {
+        "benefit_type": BenefitType.SALARY_BENEFIT,
+        "monthly_pay": "3000.00",
+        "vacation_money": "500.00",
+        "other_expenses": "100.00",
+        "start_date": "2023-01-01",
+        "end_date": "2023-06-30",
+        "state_aid_max_percentage": 50,
+        "pay_subsidies": [
+            {
+                "start_date": "2023-01-01",
+                "end_date": "2023-06-30",
+                "pay_subsidy_percent": 50,
+            }
+        ],
+    }
+
+
+def test_simulate_unauthenticated(anonymous_client):
+    response = anonymous_client.post(
+        SIMULATE_URL, _get_simulation_data(), format="json"
+    )
+    assert response.status_code == 403
+
+
+def test_simulate_applicant(api_client):
+    response = api_client.post(SIMULATE_URL, _get_simulation_data(), format="json")
+    assert response.status_code == 403
+
+
+def test_simulate_handler(handler_api_client):
+    response = handler_api_client.post(
+        SIMULATE_URL, _get_simulation_data(), format="json"
+    )
+
+    assert response.status_code == 200
+    assert response.data["rows"]
+    assert response.data["rows"][-1]["row_type"] == "helsinki_benefit_total_eur"
+    assert decimal.Decimal(
+        response.data["calculated_benefit_amount"]
+    ) == decimal.Decimal(response.data["rows"][-1]["amount"])
+
+
+def test_simulate_invalid_date_range(handler_api_client):
+    data = _get_simulation_data()
+    data["end_date"] = "2022-12-31"
+
+    response = handler_api_client.post(SIMULATE_URL, data, format="json")
+
+    assert response.status_code == 400
+    assert "end_date" in response.data
+
+
+def test_simulate_too_long_date_range(handler_api_client):
+    data = _get_simulation_data()
+    data["end_date"] = "2025-01-01"
+
+    response = handler_api_client.post(SIMULATE_URL, data, format="json")
+
+    assert response.status_code == 400
+    assert "end_date" in response.data
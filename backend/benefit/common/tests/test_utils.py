@@ -1,7 +1,8 @@
 import decimal
 import hashlib
 import os
-from datetime import date
+import random
+from datetime import date, timedelta
 
 import pytest
 from dateutil.relativedelta import relativedelta
@@ -11,6 +12,7 @@ from common.utils import (
     date_range_overlap,
     days360,
     duration_in_months,
+    durations_in_months,
     get_date_range_end_with_days360,
     hash_file,
 )
@@ -133,6 +135,27 @@ def test_get_date_range_end_with_days360_combinations():
                 assert result_difference <= next_day_difference
 
 
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("decimal_places", [None, 0, 2])
+def test_durations_in_months_matches_duration_in_months(seed, decimal_places):
+    rng = random.Random(seed)
+    # random ranges, including month ends, leap days and year boundaries
+    date_ranges = []
+    for _ in range(1000):
+        start_date = date(2019, 1, 1) + timedelta(days=rng.randrange(0, 365 * 6))
+        end_date = start_date + timedelta(days=rng.randrange(-2, 800))
+        date_ranges.append((start_date, end_date))
+
+    assert durations_in_months(date_ranges, decimal_places) == [
+        duration_in_months(start_date, end_date, decimal_places)
+        for start_date, end_date in date_ranges
+    ]
+
+
+def test_durations_in_months_empty():
+    assert durations_in_months([]) == []
+
+
 @pytest.mark.django_db
 def test_hash_file():
     # Create a dummy file with known content
@@ -1,9 +1,10 @@
 import decimal
 import functools
 import hashlib
+import io
 import itertools
 from datetime import date, timedelta
-from typing import Iterator, Tuple, Union
+from typing import Iterable, Iterator, List, Tuple, Union
 
 from dateutil.relativedelta import relativedelta
 from django.core.files import File
@@ -333,6 +334,37 @@ def duration_in_months(
     )
 
 
+def _days360_serial(value: date) -> int:
+    """
+    Day number of the date on the EU 360-day calendar, where the 31st day is treated as the 30th.
+    days360(start_date, end_date) == _days360_serial(end_date) - _days360_serial(start_date)
+    """
+    return value.year * 360 + value.month * 30 + min(value.day, 30)
+
+
+def durations_in_months(
+    date_ranges: Iterable[Tuple[date, date]], decimal_places: Union[int, None] = None
+) -> List[decimal.Decimal]:
+    """
+    Batch version of duration_in_months for a sequence of (start_date, end_date) pairs.
+
+    The result is exactly the same as [duration_in_months(start, end, decimal_places) for start, end in date_ranges],
+    but the day counts are computed with integer arithmetic and each distinct day count is converted
+    to a Decimal only once, which makes a difference in reports and aggregations over many date ranges.
+    """
+    one_day = timedelta(days=1)
+    durations_by_days = {}
+    durations = []
+    for start_date, end_date in date_ranges:
+        days = _days360_serial(end_date + one_day) - _days360_serial(start_date)
+        if days not in durations_by_days:
+            durations_by_days[days] = to_decimal(
+                decimal.Decimal(days) / 30, decimal_places
+            )
+        durations.append(durations_by_days[days])
+    return durations
+
+
 class DurationMixin:
     """
     Mixin class that defines properties for duration_in_months and duration_in_months_rounded.
@@ -404,12 +436,23 @@ def get_date_range_end_with_days360(start_date: date, n_months: int):
         + relativedelta(months=full_months)
         + relativedelta(days=fractional_days - 3)
     )
+    start_serial = _days360_serial(start_date)
+    one_day = timedelta(days=1)
+    next_day_difference = None
     for _ in range(DATE_RANGE_MAX_ITERATIONS):
         # calculate how much we are off from the duration that was requested, and see if the
-        # next day would be closer to the goal
-        difference = abs(duration_in_months(start_date, end_date) - n_months)
+        # next day would be closer to the goal. The difference of the next day is reused when
+        # advancing, as it's the difference of the new end_date.
+        if next_day_difference is None:
+            difference = abs(
+                decimal.Decimal(_days360_serial(end_date + one_day) - start_serial) / 30
+                - n_months
+            )
+        else:
+            difference = next_day_difference
         next_day_difference = abs(
-            duration_in_months(start_date, end_date + relativedelta(days=1)) - n_months
+            decimal.Decimal(_days360_serial(end_date + 2 * one_day) - start_serial) / 30
+            - n_months
         )
         if difference < next_day_difference:
             # [end_date, start_date] is the date range that most closely matches n_months.
@@ -441,3 +484,26 @@ def hash_file(file: File) -> str:
 
         # Return the hexadecimal representation of the hash
     return sha256.hexdigest()
+
+
+class StreamBuffer(io.RawIOBase):
+    """
+    Write-only, non-seekable file object that collects the written bytes until they are taken.
+    Used for streaming the output of file writers, like ZipFile, in chunks.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
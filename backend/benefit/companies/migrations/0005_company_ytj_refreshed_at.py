@@ -0,0 +1,20 @@
+# Generated by Django 3.2.23 on 2026-10-18 21:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0004_localized_iban_field"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="company",
+            name="ytj_refreshed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="time of the latest YTJ refresh"
+            ),
+        ),
+    ]
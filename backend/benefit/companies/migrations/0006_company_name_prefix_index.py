@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("companies", "0005_company_ytj_refreshed_at"),
+    ]
+
+    operations = [
+        # Index for the case-insensitive prefix search of the company names, i.e.
+        # name__istartswith. The operator class can't be given to an expression index in
+        # the model Meta with Django 3.2.
+        migrations.RunSQL(
+            "CREATE INDEX bf_companies_company_name_prefix_idx ON bf_companies_company "
+            "(UPPER(name::text) text_pattern_ops)",
+            "DROP INDEX bf_companies_company_name_prefix_idx",
+        )
+    ]
@@ -12,6 +12,9 @@ class Company(AbstractCompany):
     company_form_code = models.IntegerField(
         verbose_name=_("YTJ type code for company form")
     )
+    ytj_refreshed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("time of the latest YTJ refresh")
+    )
 
     def __str__(self):
         return self.name
@@ -1,5 +1,16 @@
+import hashlib
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
+from functools import partial
+
 from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.http import Http404
+from django.utils import timezone
 from requests import HTTPError
 from rest_framework.exceptions import APIException
 
@@ -9,6 +20,20 @@ from companies.tests.factories import CompanyFactory, generate_search_results
 from shared.service_bus.service_bus_client import ServiceBusClient
 from shared.yrtti.yrtti_client import YRTTIClient
 
+LOGGER = logging.getLogger(__name__)
+
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=2, thread_name_prefix="company-refresh"
+)
+_refreshing_business_ids = set()
+_refreshing_lock = threading.Lock()
+
+ORGANISATION_SEARCH_CACHE_KEY_PREFIX = "organisation_search"
+LOCAL_SEARCH_LIMIT = 10
+_search_executor = ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="organisation-search"
+)
+
 
 def get_or_create_company_using_company_data(company_data: dict) -> Company:
     """
@@ -24,12 +49,62 @@ def get_or_create_company_using_company_data(company_data: dict) -> Company:
         business_id=business_id,
         defaults={"company_form_code": company_data["company_form_code"]},
     )
-    update_object(company, company_data)
+    update_object(company, {**company_data, "ytj_refreshed_at": timezone.now()})
 
     return company
 
 
 def get_or_create_organisation_with_business_id(business_id: str) -> Company:
+    """
+    Get the organisation from the DB if its data was refreshed less than
+    COMPANY_REFRESH_INTERVAL seconds ago. During the COMPANY_STALE_WHILE_REVALIDATE seconds
+    after that the organisation is returned from the DB and refreshed in the background.
+    Otherwise, or if the organisation isn't in the DB, it's refreshed from Palveluväylä or
+    YRTTI before it's returned.
+    """
+    company = Company.objects.filter(business_id=business_id).first()
+    if company and company.ytj_refreshed_at:
+        age = timezone.now() - company.ytj_refreshed_at
+        refresh_interval = timedelta(seconds=settings.COMPANY_REFRESH_INTERVAL)
+        if age < refresh_interval:
+            return company
+        if age < refresh_interval + timedelta(
+            seconds=settings.COMPANY_STALE_WHILE_REVALIDATE
+        ):
+            transaction.on_commit(
+                partial(refresh_organisation_in_background, business_id)
+            )
+            return company
+    return refresh_organisation_with_business_id(business_id)
+
+
+def refresh_organisation_in_background(business_id: str):
+    """
+    Refresh the organisation in a background thread, unless it's already being refreshed.
+    """
+    with _refreshing_lock:
+        if business_id in _refreshing_business_ids:
+            return
+        _refreshing_business_ids.add(business_id)
+    _refresh_executor.submit(_refresh_organisation, business_id)
+
+
+def _refresh_organisation(business_id: str):
+    try:
+        with transaction.atomic():
+            refresh_organisation_with_business_id(business_id)
+    except Exception:
+        # the stale data is used until the next refresh
+        LOGGER.warning(
+            f"Could not refresh the organisation {business_id}", exc_info=True
+        )
+    finally:
+        with _refreshing_lock:
+            _refreshing_business_ids.discard(business_id)
+        connection.close()
+
+
+def refresh_organisation_with_business_id(business_id: str) -> Company:
     try:
         organisation = get_or_create_organisation_with_business_id_via_service_bus(
             business_id
@@ -62,21 +137,88 @@ def get_or_create_association_with_business_id(business_id: str) -> Company:
     return get_or_create_company_using_company_data(association_data)
 
 
+def search_local_organisations(search_term: str) -> list[dict]:
+    """Search for the organisations in the DB whose name starts with the search term."""
+    if not search_term:
+        return []
+    return list(
+        Company.objects.filter(name__istartswith=search_term)
+        .order_by("name")
+        .values("name", "business_id")[:LOCAL_SEARCH_LIMIT]
+    )
+
+
+def search_remote_organisations(search_term: str) -> tuple[list[dict], bool]:
+    """
+    Search for organisations in Service Bus (YTJ) and YRTTI concurrently. The searches that
+    haven't finished in ORGANISATION_SEARCH_TIMEOUT seconds or that failed are left out.
+    The searches that haven't started by then are cancelled, and the requests of the started
+    ones are given the same deadline, so that they aren't retried or waited for after it.
+
+    :return: The results of Service Bus followed by the results of YRTTI, and True if both
+             searches succeeded.
+    """
+    deadline = time.monotonic() + settings.ORGANISATION_SEARCH_TIMEOUT
+    searches = [ServiceBusClient().search_companies]
+    # Option to disable YRTTI as their test api has some difficulties
+    if not settings.YRTTI_DISABLE:
+        searches.append(YRTTIClient().search_associations)
+    futures = [
+        _search_executor.submit(search, search_term, deadline=deadline)
+        for search in searches
+    ]
+    _, not_done = wait(futures, timeout=settings.ORGANISATION_SEARCH_TIMEOUT)
+    for future in not_done:
+        future.cancel()
+
+    results = []
+    is_complete = True
+    for future in futures:
+        if future.cancelled() or not future.done():
+            LOGGER.warning("Organisation search timed out")
+            is_complete = False
+        elif future.exception():
+            LOGGER.warning(
+                f"Organisation search failed: {future.exception()}",
+                exc_info=future.exception(),
+            )
+            is_complete = False
+        else:
+            results += future.result()
+    return results, is_complete
+
+
 def search_organisations(search_term: str) -> list[dict]:
-    """Search for organisations Service Bus (YTJ) and YRTTI and merge results."""
+    """
+    Search for organisations in the DB, Service Bus (YTJ) and YRTTI and merge the results
+    in this order, leaving out the duplicate business ids. The results of Service Bus and
+    YRTTI are cached by the normalized search term for ORGANISATION_SEARCH_CACHE_TIMEOUT
+    seconds, if both searches succeeded.
+    """
 
     if settings.NEXT_PUBLIC_MOCK_FLAG:
-        company_data = association_data = generate_search_results(search_term)
+        merged_results = generate_search_results(search_term)
     else:
-        sb_client = ServiceBusClient()
-        company_data = sb_client.search_companies(search_term)
-        association_data = []
-        # Option to disable YRTTI as their test api has some difficulties
-        if not settings.YRTTI_DISABLE:
-            yrtti_client = YRTTIClient()
-            association_data = yrtti_client.search_associations(search_term)
-    merged_results = company_data + association_data
-    results_without_duplicates = [
-        dict(unique) for unique in {tuple(result.items()) for result in merged_results}
-    ]
+        search_term = " ".join(search_term.split())
+        cache_key = (
+            f"{ORGANISATION_SEARCH_CACHE_KEY_PREFIX}:"
+            f"{hashlib.sha256(search_term.casefold().encode()).hexdigest()}"
+        )
+        remote_results = cache.get(cache_key)
+        if remote_results is None:
+            remote_results, is_complete = search_remote_organisations(search_term)
+            if is_complete:
+                cache.set(
+                    cache_key,
+                    remote_results,
+                    timeout=settings.ORGANISATION_SEARCH_CACHE_TIMEOUT,
+                )
+        merged_results = search_local_organisations(search_term) + remote_results
+
+    business_ids = set()
+    results_without_duplicates = []
+    for result in merged_results:
+        if result["business_id"] not in business_ids:
+            business_ids.add(result["business_id"])
+            results_without_duplicates.append(result)
     return results_without_duplicates
@@ -1,20 +1,30 @@
 import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from datetime import timedelta
+from unittest import mock
 
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.test import override_settings
+from django.utils import timezone
 from requests import HTTPError
 
 from applications.tests.conftest import *  # noqa
 from companies.api.v1.serializers import CompanySerializer
 from companies.models import Company
+from companies.services import _refresh_organisation, _refreshing_business_ids
 from companies.tests.data.company_data import (
     DUMMY_SERVICE_BUS_RESPONSE,
     DUMMY_YRTTI_RESPONSE,
     get_dummy_company_data,
 )
+from companies.tests.factories import CompanyFactory, generate_search_results
 from shared.service_bus.enums import YtjOrganizationCode
+from shared.service_bus.service_bus_client import ServiceBusClient
+from shared.yrtti.yrtti_client import YRTTIClient
 from terms.tests.factories import TermsOfServiceApprovalFactory
 
 SERVICE_BUS_INFO_PATH = f"{settings.SERVICE_BUS_BASE_URL}/GetCompany"
@@ -206,7 +216,9 @@ def test_get_company_from_service_bus_and_yrtti_with_fallback_data(
     assert response.status_code == 200
     assert Company.objects.count() == 1
 
-    # Now assuming request to YTJ & YRTTI doesn't return any data
+    # Now assuming request to YTJ & YRTTI doesn't return any data, when the data in the DB
+    # is too old to be used without refreshing it
+    Company.objects.update(ytj_refreshed_at=None)
     matcher = re.compile(re.escape(SERVICE_BUS_INFO_PATH))
     requests_mock.post(matcher, text="Error", status_code=404)
     matcher = re.compile(re.escape(YRTTI_BASIC_INFO_PATH))
@@ -220,3 +232,226 @@ def test_get_company_from_service_bus_and_yrtti_with_fallback_data(
         == YtjOrganizationCode.COMPANY_FORM_CODE_DEFAULT
     )
     assert response.data["company_form"] == "Osakeyhtiö"
+
+
+@pytest.mark.django_db
+@override_settings(COMPANY_REFRESH_INTERVAL=60, COMPANY_STALE_WHILE_REVALIDATE=600)
+@pytest.mark.parametrize(
+    "age,expected_service_bus_calls,expected_background_refreshes",
+    [
+        # fresh
+        (timedelta(seconds=59), 0, 0),
+        # stale, used while it's refreshed in the background
+        (timedelta(seconds=61), 0, 1),
+        # expired
+        (timedelta(seconds=661), 1, 0),
+    ],
+)
+def test_get_organisation_refresh_policy(
+    api_client,
+    requests_mock,
+    mock_get_organisation_roles_and_create_company,
+    django_capture_on_commit_callbacks,
+    age,
+    expected_service_bus_calls,
+    expected_background_refreshes,
+):
+    company = mock_get_organisation_roles_and_create_company
+    refreshed_at = timezone.now() - age
+    Company.objects.filter(pk=company.pk).update(
+        name="Old name", ytj_refreshed_at=refreshed_at
+    )
+    service_bus_mock = requests_mock.post(
+        re.compile(re.escape(SERVICE_BUS_INFO_PATH)), json=DUMMY_SERVICE_BUS_RESPONSE
+    )
+
+    with mock.patch(
+        "companies.services._refresh_executor.submit"
+    ) as submit_mock, django_capture_on_commit_callbacks(execute=True):
+        response = api_client.get(get_company_api_url())
+        # the organisation is refreshed only once at a time
+        api_client.get(get_company_api_url())
+    _refreshing_business_ids.clear()
+
+    assert response.status_code == 200
+    assert service_bus_mock.call_count == expected_service_bus_calls
+    assert submit_mock.call_count == expected_background_refreshes
+    company.refresh_from_db()
+    if expected_service_bus_calls:
+        assert response.data["name"] == company.name != "Old name"
+        assert company.ytj_refreshed_at == timezone.now()
+    else:
+        assert response.data["name"] == company.name == "Old name"
+        assert company.ytj_refreshed_at == refreshed_at
+
+
+@pytest.mark.django_db
+def test_refresh_organisation_in_background(
+    requests_mock, mock_get_organisation_roles_and_create_company
+):
+    company = mock_get_organisation_roles_and_create_company
+    requests_mock.post(
+        re.compile(re.escape(SERVICE_BUS_INFO_PATH)), json=DUMMY_SERVICE_BUS_RESPONSE
+    )
+
+    # the background thread closes its own connection
+    with mock.patch("companies.services.connection"):
+        _refresh_organisation(company.business_id)
+
+    company.refresh_from_db()
+    assert (
+        company.name
+        == DUMMY_SERVICE_BUS_RESPONSE["GetCompanyResult"]["Company"]["TradeName"][
+            "Name"
+        ]
+    )
+    assert company.ytj_refreshed_at == timezone.now()
+
+
+@pytest.mark.django_db
+def test_refresh_organisation_in_background_error(
+    requests_mock, mock_get_organisation_roles_and_create_company
+):
+    company = mock_get_organisation_roles_and_create_company
+    requests_mock.post(re.compile(re.escape(SERVICE_BUS_INFO_PATH)), status_code=404)
+    requests_mock.post(re.compile(re.escape(YRTTI_BASIC_INFO_PATH)), status_code=404)
+
+    with mock.patch("companies.services.connection"):
+        _refresh_organisation(company.business_id)
+
+    company.refresh_from_db()
+    assert company.ytj_refreshed_at is None
+
+
+def get_search_api_url(name):
+    return f"/v1/company/search/{name}/"
+
+
+@pytest.fixture
+def organisation_search_mocks():
+    cache.clear()
+    with mock.patch.object(
+        ServiceBusClient,
+        "search_companies",
+        return_value=[
+            {"name": "I. Haanpää Oy", "business_id": "7654321-0"},
+            {"name": "Haanpää Consulting Oy", "business_id": "1234567-8"},
+        ],
+    ) as search_companies, mock.patch.object(
+        YRTTIClient,
+        "search_associations",
+        return_value=[
+            {"name": "Haanpää ry", "business_id": "2345678-9"},
+            {"name": "Haanpää Consulting Oy", "business_id": "1234567-8"},
+        ],
+    ) as search_associations:
+        yield search_companies, search_associations
+    cache.clear()
+
+
+@pytest.mark.django_db
+def test_search_organisations(api_client, organisation_search_mocks):
+    search_companies, search_associations = organisation_search_mocks
+    CompanyFactory(name="Haanpää Local Oy", business_id="3456789-0")
+    CompanyFactory(name="Haanpää Consulting Oy", business_id="1234567-8")
+    CompanyFactory(name="Other Haanpää Oy", business_id="4567890-1")
+
+    response = api_client.get(get_search_api_url("haanp"))
+
+    assert response.status_code == 200
+    # local companies first, then Service Bus and YRTTI, without duplicates
+    assert response.data == [
+        {"name": "Haanpää Consulting Oy", "business_id": "1234567-8"},
+        {"name": "Haanpää Local Oy", "business_id": "3456789-0"},
+        {"name": "I. Haanpää Oy", "business_id": "7654321-0"},
+        {"name": "Haanpää ry", "business_id": "2345678-9"},
+    ]
+    # the requests are given the deadline of the whole search
+    search_companies.assert_called_once_with("haanp", deadline=mock.ANY)
+    search_associations.assert_called_once_with("haanp", deadline=mock.ANY)
+    assert (
+        search_companies.call_args.kwargs["deadline"]
+        == search_associations.call_args.kwargs["deadline"]
+    )
+
+    # the remote results are cached by the normalized search term
+    CompanyFactory(name="Haanpää New Oy", business_id="5678901-2")
+    response = api_client.get(get_search_api_url(" HAANP "))
+    assert [result["business_id"] for result in response.data] == [
+        "1234567-8",
+        "3456789-0",
+        "5678901-2",
+        "7654321-0",
+        "2345678-9",
+    ]
+    assert search_companies.call_count == 1
+    assert search_associations.call_count == 1
+
+
+@pytest.mark.django_db
+@override_settings(ORGANISATION_SEARCH_TIMEOUT=0.1)
+def test_search_organisations_timeout(api_client, organisation_search_mocks):
+    search_companies, search_associations = organisation_search_mocks
+    release = threading.Event()
+    search_companies.side_effect = lambda search_term, deadline: release.wait(5) and []
+
+    try:
+        response = api_client.get(get_search_api_url("haanp"))
+        assert response.status_code == 200
+        assert [result["business_id"] for result in response.data] == [
+            "2345678-9",
+            "1234567-8",
+        ]
+    finally:
+        release.set()
+
+    # incomplete results aren't cached
+    api_client.get(get_search_api_url("haanp"))
+    assert search_associations.call_count == 2
+
+
+@pytest.mark.django_db
+@override_settings(ORGANISATION_SEARCH_TIMEOUT=0.1)
+def test_search_organisations_timeout_cancels_queued_search(
+    api_client, organisation_search_mocks
+):
+    search_companies, search_associations = organisation_search_mocks
+    release = threading.Event()
+    search_companies.side_effect = lambda search_term, deadline: release.wait(5) and []
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    try:
+        with mock.patch("companies.services._search_executor", executor):
+            response = api_client.get(get_search_api_url("haanp"))
+        assert response.status_code == 200
+        assert response.data == []
+    finally:
+        release.set()
+        executor.shutdown(wait=True)
+
+    # the YRTTI search queued behind the Service Bus search never started
+    search_associations.assert_not_called()
+
+
+@pytest.mark.django_db
+def test_search_organisations_error(api_client, organisation_search_mocks):
+    search_companies, search_associations = organisation_search_mocks
+    search_associations.side_effect = HTTPError("Error")
+
+    response = api_client.get(get_search_api_url("haanp"))
+
+    assert response.status_code == 200
+    assert [result["business_id"] for result in response.data] == [
+        "7654321-0",
+        "1234567-8",
+    ]
+    api_client.get(get_search_api_url("haanp"))
+    assert search_companies.call_count == 2
+
+
+@pytest.mark.django_db
+@override_settings(NEXT_PUBLIC_MOCK_FLAG=True)
+def test_search_mock_organisations(api_client):
+    response = api_client.get(get_search_api_url("haanp"))
+
+    assert response.data == generate_search_results("haanp")
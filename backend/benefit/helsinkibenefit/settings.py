@@ -123,6 +123,7 @@ env = environ.Env(
     ELASTICSEARCH_PASSWORD=(str, ""),
     CLEAR_AUDIT_LOG_ENTRIES=(bool, False),
     ENABLE_SEND_AUDIT_LOG=(bool, False),
+    AUDIT_LOG_BUFFERED=(bool, False),
     EMAIL_USE_TLS=(bool, False),
     EMAIL_HOST=(str, "relay.hel.fi"),
     EMAIL_HOST_USER=(str, ""),
@@ -131,6 +132,9 @@ env = environ.Env(
     EMAIL_TIMEOUT=(int, 15),
     DEFAULT_FROM_EMAIL=(str, "Helsinki-lisä <helsinkilisa@hel.fi>"),
     WKHTMLTOPDF_BIN=(str, "/usr/bin/wkhtmltopdf"),
+    PDF_RENDER_CACHE_MAX_SIZE=(int, 500 * 1024 * 1024),
+    PDF_RENDER_CACHE_MAX_AGE=(int, 60 * 60 * 24 * 7),
+    PDF_RENDER_MAX_WORKERS=(int, 4),
     DUMMY_COMPANY_FORM_CODE=(
         int,
         YtjOrganizationCode.COMPANY_FORM_CODE_DEFAULT,
@@ -138,6 +142,7 @@ env = environ.Env(
     TERMS_OF_SERVICE_SESSION_KEY=(str, "_tos_session"),
     ENABLE_DEBUG_ENV=(bool, False),
     TALPA_ROBOT_AUTH_CREDENTIAL=(str, "username:password"),
+    TALPA_EXPORT_DELIVERY_DELAY=(int, 60 * 5),
     DISABLE_TOS_APPROVAL_CHECK=(bool, False),
     YRTTI_BASE_URL=(
         str,
@@ -156,6 +161,10 @@ env = environ.Env(
     SERVICE_BUS_AUTH_PASSWORD=(str, "sample_password"),
     SERVICE_BUS_TIMEOUT=(int, 30),
     SERVICE_BUS_SEARCH_LIMIT=(int, 10),
+    COMPANY_REFRESH_INTERVAL=(int, 60 * 60 * 24),
+    COMPANY_STALE_WHILE_REVALIDATE=(int, 60 * 60 * 24 * 7),
+    ORGANISATION_SEARCH_TIMEOUT=(float, 5),
+    ORGANISATION_SEARCH_CACHE_TIMEOUT=(int, 60 * 60),
     GDPR_API_QUERY_SCOPE=(str, "helsinkibenefit.gdprquery"),
     GDPR_API_DELETE_SCOPE=(str, "helsinkibenefit.gdprdelete"),
     # For AHJO Rest API authentication
@@ -314,6 +323,7 @@ ELASTICSEARCH_PORT = env("ELASTICSEARCH_PORT")
 ELASTICSEARCH_USERNAME = env("ELASTICSEARCH_USERNAME")
 ELASTICSEARCH_PASSWORD = env("ELASTICSEARCH_PASSWORD")
 ENABLE_SEND_AUDIT_LOG = env("ENABLE_SEND_AUDIT_LOG")
+AUDIT_LOG_BUFFERED = env.bool("AUDIT_LOG_BUFFERED")
 
 LOGGING = {
     "version": 1,
@@ -471,8 +481,18 @@ MAX_UPLOAD_SIZE = 10485760  # 10MB
 MINIMUM_WORKING_HOURS_PER_WEEK = env("MINIMUM_WORKING_HOURS_PER_WEEK")
 
 WKHTMLTOPDF_BIN = env("WKHTMLTOPDF_BIN")
+# Total size of the rendered PDF files kept in the file storage, 0 disables the cache
+PDF_RENDER_CACHE_MAX_SIZE = env("PDF_RENDER_CACHE_MAX_SIZE")
+# Seconds the rendered PDFs, which contain personal data, are kept in the cache. Keep this well
+# below the 30 days after which the cancelled applications are deleted.
+PDF_RENDER_CACHE_MAX_AGE = env("PDF_RENDER_CACHE_MAX_AGE")
+# Number of wkhtmltopdf processes run concurrently in an export, 1 renders the files one by one
+PDF_RENDER_MAX_WORKERS = env("PDF_RENDER_MAX_WORKERS")
 
 TALPA_ROBOT_AUTH_CREDENTIAL = env("TALPA_ROBOT_AUTH_CREDENTIAL")
+# Seconds a modified batch waits before it's included in an incremental Talpa export delivery,
+# so that the batches modified in transactions that are still open are not skipped
+TALPA_EXPORT_DELIVERY_DELAY = env("TALPA_EXPORT_DELIVERY_DELAY")
 
 YRTTI_TIMEOUT = env("YRTTI_TIMEOUT")
 YRTTI_BASE_URL = env("YRTTI_BASE_URL")
@@ -487,6 +507,16 @@ SERVICE_BUS_AUTH_USERNAME = env("SERVICE_BUS_AUTH_USERNAME")
 SERVICE_BUS_AUTH_PASSWORD = env("SERVICE_BUS_AUTH_PASSWORD")
 SERVICE_BUS_SEARCH_LIMIT = env("SERVICE_BUS_SEARCH_LIMIT")
 
+# Seconds the company data from Palveluväylä / YRTTI is used without refreshing it
+COMPANY_REFRESH_INTERVAL = env("COMPANY_REFRESH_INTERVAL")
+# Seconds after the refresh interval the company data is still used while it's refreshed in
+# the background, after that it's refreshed before it's used
+COMPANY_STALE_WHILE_REVALIDATE = env("COMPANY_STALE_WHILE_REVALIDATE")
+# Seconds the organisation search waits for the Palveluväylä and YRTTI searches
+ORGANISATION_SEARCH_TIMEOUT = env("ORGANISATION_SEARCH_TIMEOUT")
+# Seconds the results of the Palveluväylä and YRTTI searches are cached
+ORGANISATION_SEARCH_CACHE_TIMEOUT = env("ORGANISATION_SEARCH_CACHE_TIMEOUT")
+
 HANDLERS_GROUP_NAME = "Application handlers"
 
 GDPR_API_QUERY_SCOPE = env("GDPR_API_QUERY_SCOPE")
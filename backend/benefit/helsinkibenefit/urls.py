@@ -80,6 +80,11 @@ urlpatterns = [
     path("v1/", include(applicant_app_router.urls)),
     path("v1/", include(handler_app_router.urls)),
     path("v1/terms/approve_terms_of_service/", ApproveTermsOfServiceView.as_view()),
+    path(
+        "v1/calculations/simulate/",
+        calculator_views.CalculationSimulationView.as_view(),
+        name="calculation-simulate",
+    ),
     path("v1/company/", GetUsersOrganizationView.as_view()),
     path("v1/company/search/<str:name>/", SearchOrganisationsView.as_view()),
     path("v1/company/get/<str:business_id>/", GetOrganisationByIdView.as_view()),
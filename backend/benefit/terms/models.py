@@ -180,6 +180,10 @@ class AbstractTermsApproval(UUIDModel, TimeStampedModel):
         abstract = True
 
 
+# Default value for arguments that can also be None
+NOT_FETCHED = object()
+
+
 class ApplicantTermsApproval(AbstractTermsApproval):
     application = models.OneToOneField(
         Application,
@@ -192,16 +196,21 @@ class ApplicantTermsApproval(AbstractTermsApproval):
         return f"{self.approved_by.email} approved terms {self.terms} at {self.approved_at}"
 
     @staticmethod
-    def terms_approval_needed(application):
+    def terms_approval_needed(application, terms_in_effect=NOT_FETCHED):
+        """
+        terms_in_effect can be given if the applicant terms in effect have already been fetched
+        (None if there are no terms in effect), otherwise they are queried.
+        """
         try:
             application.applicant_terms_approval
         except ObjectDoesNotExist:
             return True
         else:
-            return (
-                Terms.objects.get_terms_in_effect(TermsType.APPLICANT_TERMS)
-                != application.applicant_terms_approval.terms
-            )
+            if terms_in_effect is NOT_FETCHED:
+                terms_in_effect = Terms.objects.get_terms_in_effect(
+                    TermsType.APPLICANT_TERMS
+                )
+            return terms_in_effect != application.applicant_terms_approval.terms
 
     class Meta:
         db_table = "bf_applicanttermsapproval"
@@ -54,8 +54,10 @@ class UserSerializer(serializers.ModelSerializer):
             if request and request.query_params
             else None
         )
+        if not include_terms:
+            return None
         terms = Terms.objects.get_terms_in_effect(TermsType.TERMS_OF_SERVICE)
-        if terms and include_terms:
+        if terms:
             # If given the request in context, DRF will output the URL for FileFields
             context = {"request": self.context.get("request")}
             return TermsSerializer(terms, context=context).data
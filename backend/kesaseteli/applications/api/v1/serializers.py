@@ -662,7 +662,7 @@ class YouthApplicationExcelExportSerializer(serializers.ModelSerializer):
 
     @staticmethod
     def get_placeholder_value(field: str) -> Union[int, str]:
-        if field in ["application_year", "birth_year"]:
+        if field in ["application_year", "birth_year", "summer_voucher_serial_number"]:
             return 1  # Placeholder integer value
         else:
             return "placeholder_value"
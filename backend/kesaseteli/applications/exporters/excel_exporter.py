@@ -1,17 +1,32 @@
+import functools
+import hashlib
 import io
-from typing import Iterable, List, NamedTuple
-
-from django.db.models import QuerySet
+from collections import defaultdict
+from operator import attrgetter
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Tuple,
+    Union,
+)
+
+import xlsxwriter
+from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
 from django.shortcuts import reverse
-from django.utils import timezone
+from django.utils import timezone, translation
 from django.utils.translation import gettext_lazy as _
 from xlsxwriter import Workbook
-from xlsxwriter.worksheet import Worksheet
 
-from applications.enums import ExcelColumns
-from applications.models import EmployerSummerVoucher
-from common.utils import getattr_nested
+from applications.enums import AttachmentType, ExcelColumns
+from applications.models import Attachment, EmployerSummerVoucher
+from common.utils import compile_getattr_nested
 
 
 class ExcelField(NamedTuple):
@@ -284,161 +299,230 @@ def get_xlsx_filename(columns: ExcelColumns) -> str:
     return filename
 
 
-def set_header_and_formatting(
-    wb: Workbook, ws: Worksheet, column: int, field: ExcelField, header_format
-):
-    ws.write(0, column, str(_(field.title)), header_format)
+ATTACHMENT_TYPES_BY_TITLE_WORD = {
+    "Työsopimus": AttachmentType.EMPLOYMENT_CONTRACT,
+    "Palkkalaskelma": AttachmentType.PAYSLIP,
+}
 
-    cell_format = wb.add_format()
-    cell_format.set_border(1)
-    cell_format.set_bg_color(field.background_color)
-    ws.set_column(column, column, field.width, cell_format)
+XLSX_TEMPLATE_CACHE_KEY_PREFIX = "xlsx_template"
 
+# placeholders for the ids in the reversed attachment URL
+SUMMER_VOUCHER_ID_PLACEHOLDER = "summer-voucher-id"
+ATTACHMENT_ID_PLACEHOLDER = "attachment-id"
 
-def get_attachment_uri(
-    summer_voucher: EmployerSummerVoucher,
-    field: ExcelField,
-    value,
-    request: HttpRequest,
-):
-    field_name = field.title
-    attachment_number = int(field_name.split(" ")[-1])
-    attachment_type = field_name.split(" ")[1]
-
-    if attachment_type == "Työsopimus":
-        attachment_type = "employment_contract"
-    elif attachment_type == "Palkkalaskelma":
-        attachment_type = "payslip"
-
-    # Get attachment of type `attachment_type` and use the OFFSET and LIMIT to get only the n'th entry
-    # where n is `attachment_number`.
-    attachment = (
-        value.filter(attachment_type=attachment_type)
-        .order_by("created_at")[attachment_number - 1 : attachment_number]  # noqa
-        .first()
-    )
-    if not attachment:
-        return ""
 
-    path = reverse(
-        "v1:employersummervoucher-handle-attachment",
-        kwargs={"pk": summer_voucher.id, "attachment_pk": attachment.id},
-    )
-    return request.build_absolute_uri(path)
+def get_attachment_type_and_number(field: ExcelField) -> Tuple[str, int]:
+    """
+    Return the attachment type and the number of the attachment of that type in the
+    attachment field, e.g. ("payslip", 2) for "Liite: Palkkalaskelma 2".
+    """
+    words = field.title.split(" ")
+    return ATTACHMENT_TYPES_BY_TITLE_WORD.get(words[1], words[1]), int(words[-1])
 
 
-def handle_special_cases(
-    value,
-    attr_str,
+def group_attachments_by_type(
     summer_voucher: EmployerSummerVoucher,
-    field: ExcelField,
-    request: HttpRequest,
-):
-    if isinstance(value, bool):
-        value = str(_("Kyllä")) if value else str(_("Ei"))
-    elif attr_str == "attachments":
-        value = get_attachment_uri(summer_voucher, field, value, request)
-    elif "application__invoicer" in attr_str and getattr(
-        summer_voucher, "application", None
-    ):
-        value = value if summer_voucher.application.is_separate_invoicer else ""
-    return value
+) -> Dict[str, List[Attachment]]:
+    """
+    Group the attachments of the summer voucher by type, oldest first, and by id if they
+    were uploaded at the same time. The prefetched attachments are used if the queryset has
+    prefetch_related("attachments").
+    """
+    attachments_by_type = defaultdict(list)
+    for attachment in summer_voucher.attachments.all():
+        attachments_by_type[attachment.attachment_type].append(attachment)
+    for attachments in attachments_by_type.values():
+        attachments.sort(key=attrgetter("created_at", "pk"))
+    return attachments_by_type
 
 
-def generate_data_row(
-    summer_voucher: EmployerSummerVoucher,
-    fields: List[ExcelField],
-    request: HttpRequest,
-    is_template: bool = False,
-) -> list:
-    result = []
-    for column_number, field in enumerate(fields):
+class DataRowGenerator:
+    """
+    Generate the data rows of the summer vouchers for the given fields. The value getters
+    of the fields and the absolute URL of the attachments are resolved once, when the
+    generator is created, so the same generator should be used for the whole export, e.g.
+    as the serializer of xlsx_streaming.stream_queryset_as_xlsx.
+    """
+
+    def __init__(self, fields: List[ExcelField], request: HttpRequest):
+        self.attachment_uri_template = request.build_absolute_uri(
+            reverse(
+                "v1:employersummervoucher-handle-attachment",
+                kwargs={
+                    "pk": SUMMER_VOUCHER_ID_PLACEHOLDER,
+                    "attachment_pk": ATTACHMENT_ID_PLACEHOLDER,
+                },
+            )
+        )
+        self.has_attachment_fields = any(
+            field.model_fields == ["attachments"] for field in fields
+        )
+        self.cell_getters = [self.compile_cell_getter(field) for field in fields]
+
+    def __call__(
+        self, summer_vouchers: Iterable[EmployerSummerVoucher]
+    ) -> Iterator[list]:
+        return (
+            self.generate_data_row(summer_voucher) for summer_voucher in summer_vouchers
+        )
+
+    def get_attachment_uri(self, summer_voucher_id, attachment_id) -> str:
+        return self.attachment_uri_template.replace(
+            SUMMER_VOUCHER_ID_PLACEHOLDER, str(summer_voucher_id)
+        ).replace(ATTACHMENT_ID_PLACEHOLDER, str(attachment_id))
+
+    def compile_cell_getter(
+        self, field: ExcelField
+    ) -> Callable[[EmployerSummerVoucher, Dict[str, List[Attachment]]], Any]:
+        """
+        Return a function that takes a summer voucher and its attachments grouped by type
+        and returns the value of the field's cell.
+        """
         if field.title == ORDER_FIELD_TITLE:
-            cell_value = summer_voucher.row_number
-        elif field.title == RECEIVED_DATE_FIELD_TITLE:
-            cell_value = summer_voucher.submitted_at.astimezone().strftime("%d/%m/%Y")
-        else:
-            attr_names = field.model_fields
-            values = []
-            for attr_str in attr_names:
-                value = getattr_nested(summer_voucher, attr_str.split("__"))
-                value = handle_special_cases(
-                    value, attr_str, summer_voucher, field, request
+            return lambda summer_voucher, _: summer_voucher.row_number
+        if field.title == RECEIVED_DATE_FIELD_TITLE:
+            return lambda summer_voucher, _: summer_voucher.submitted_at.astimezone().strftime(
+                "%d/%m/%Y"
+            )
+        if field.model_fields == ["attachments"]:
+            attachment_type, attachment_number = get_attachment_type_and_number(field)
+
+            def get_attachment_uri(summer_voucher, attachments_by_type):
+                attachments = attachments_by_type.get(attachment_type, [])
+                if len(attachments) < attachment_number:
+                    return ""
+                return self.get_attachment_uri(
+                    summer_voucher.id, attachments[attachment_number - 1].id
                 )
-                values.append(value)
 
-            cell_value = field.value % tuple(values)
+            return get_attachment_uri
+
+        value_getters = [
+            self.compile_value_getter(attr_str) for attr_str in field.model_fields
+        ]
+        return lambda summer_voucher, _: field.value % tuple(
+            get_value(summer_voucher) for get_value in value_getters
+        )
+
+    @staticmethod
+    def compile_value_getter(attr_str: str) -> Callable[[EmployerSummerVoucher], Any]:
+        getter = compile_getattr_nested(EmployerSummerVoucher, attr_str.split("__"))
+        is_invoicer_field = "application__invoicer" in attr_str
+
+        def get_value(summer_voucher):
+            value = getter(summer_voucher)
+            if isinstance(value, bool):
+                value = str(_("Kyllä")) if value else str(_("Ei"))
+            elif is_invoicer_field and getattr(summer_voucher, "application", None):
+                value = value if summer_voucher.application.is_separate_invoicer else ""
+            return value
+
+        return get_value
+
+    def generate_data_row(self, summer_voucher: EmployerSummerVoucher) -> list:
+        attachments_by_type = (
+            group_attachments_by_type(summer_voucher)
+            if self.has_attachment_fields
+            else {}
+        )
+        return [
+            get_cell_value(summer_voucher, attachments_by_type)
+            for get_cell_value in self.cell_getters
+        ]
+
 
-        if is_template and cell_value in [None, ""]:
-            # Assume string type for empty values in template and
-            # place a placeholder for xlsx-streaming package to infer cell type from
-            cell_value = "placeholder value"
+def get_placeholder_value(field: ExcelField) -> Union[int, str]:
+    """
+    Return the value of the field in the template row, which the xlsx-streaming package
+    uses to infer the cell types. All the other cells are formatted as strings.
+    """
+    if field.title == ORDER_FIELD_TITLE:
+        return 1  # Placeholder integer value
+    return "placeholder value"
 
-        result.append(cell_value)
 
-    return result
+@functools.lru_cache(maxsize=None)
+def get_xlsx_template_definition(columns: ExcelColumns, language: str) -> tuple:
+    """
+    Return everything the template of the columns is built from in the given language: the
+    worksheet name and the translated titles, the formatting and the placeholder values of the
+    columns. The translations are only looked up once per process.
+    """
+    with translation.override(language):
+        return (
+            str(_("Setelit")),
+            tuple(
+                (
+                    str(_(field.title)),
+                    field.width,
+                    field.background_color,
+                    get_placeholder_value(field),
+                )
+                for field in get_exportable_fields(columns)
+            ),
+        )
 
 
-def generate_data_rows(
-    summer_vouchers: Iterable[EmployerSummerVoucher],
-    fields: List[ExcelField],
-    request: HttpRequest,
-    is_template: bool = False,
-):
+def get_xlsx_template_cache_key(name: str, definition: tuple) -> str:
+    """
+    The template is cached by its name, the language and a hash of its definition, so any
+    change in the columns, the translations or the xlsxwriter version creates a new template.
+    """
+    definition_hash = hashlib.sha256(
+        repr((xlsxwriter.__version__, definition)).encode()
+    ).hexdigest()
     return (
-        generate_data_row(summer_voucher, fields, request, is_template)
-        for summer_voucher in summer_vouchers
+        f"{XLSX_TEMPLATE_CACHE_KEY_PREFIX}:{name}:{translation.get_language()}:"
+        f"{definition_hash}"
     )
 
 
-def write_data_row(
-    ws: Worksheet,
-    row_number: int,
-    summer_voucher: EmployerSummerVoucher,
-    fields: List[ExcelField],
-    request: HttpRequest,
-    is_template: bool = False,
-):
-    data_row = generate_data_row(summer_voucher, fields, request, is_template)
-    for column_number, cell_value in enumerate(data_row):
-        ws.write(row_number, column_number, cell_value)
-
-
-def populate_workbook(
-    wb: Workbook,
-    summer_vouchers: QuerySet[EmployerSummerVoucher],
-    columns: ExcelColumns,
-    request: HttpRequest,
-    is_template: bool = False,
-):
+def get_cached_xlsx_template(
+    name: str, definition: tuple, build_template: Callable[[], bytes]
+) -> io.BytesIO:
     """
-    Fill the workbook with information from the summer vouchers queryset. Field names and values are
-    fetched from the FIELDS tuple.
+    Return the xlsx template from the cache, or build it with build_template() and cache it
+    if it's not there yet.
     """
-    ws = wb.add_worksheet(name=str(_("Setelit")))
-    wrapped_cell_format = wb.add_format()
-    wrapped_cell_format.set_text_wrap()
+    cache_key = get_xlsx_template_cache_key(name, definition)
+    content = cache.get(cache_key)
+    if content is None:
+        content = build_template()
+        cache.set(cache_key, content, timeout=settings.XLSX_TEMPLATE_CACHE_TIMEOUT)
+    return io.BytesIO(content)
+
 
+def build_xlsx_template(definition: tuple) -> bytes:
+    worksheet_name, template_columns = definition
+    output = io.BytesIO()
+    wb = Workbook(output)
+    ws = wb.add_worksheet(name=worksheet_name)
     header_format = wb.add_format({"bold": True})
-    exportable_fields = get_exportable_fields(columns)
-    for column, field in enumerate(exportable_fields):
-        set_header_and_formatting(wb, ws, column, field, header_format)
-    for row_number, summer_voucher in enumerate(summer_vouchers, 1):
-        write_data_row(
-            ws, row_number, summer_voucher, exportable_fields, request, is_template
-        )
+    for column, (title, width, background_color, placeholder_value) in enumerate(
+        template_columns
+    ):
+        ws.write(0, column, title, header_format)
+
+        cell_format = wb.add_format()
+        cell_format.set_border(1)
+        cell_format.set_bg_color(background_color)
+        ws.set_column(column, column, width, cell_format)
+
+        ws.write(1, column, placeholder_value)
     wb.close()
+    return output.getvalue()
 
 
-def generate_xlsx_template(
-    summer_vouchers: QuerySet[EmployerSummerVoucher],
-    columns: ExcelColumns,
-    request: HttpRequest,
-):
-    output = io.BytesIO()
-    wb = Workbook(output)
-    # Use the first row in the queryset to generate the .xlsx template for the
-    # xlsx-streaming package which uses the template for determining column names and
-    # types (supports at least boolean, integer and string types) in Excel output
-    populate_workbook(wb, summer_vouchers[0:1], columns, request, is_template=True)
-    return output
+def generate_xlsx_template(columns: ExcelColumns) -> io.BytesIO:
+    """
+    Get the .xlsx template for the xlsx-streaming package, which uses the template for
+    determining column names and types (supports at least boolean, integer and string types)
+    in Excel output. The template only depends on the columns and the language, so it's
+    built once and then kept in the cache.
+    """
+    definition = get_xlsx_template_definition(columns, translation.get_language())
+    return get_cached_xlsx_template(
+        f"summer_vouchers_{columns}",
+        definition,
+        functools.partial(build_xlsx_template, definition),
+    )
@@ -5,7 +5,6 @@ from pathlib import Path
 from typing import Optional
 from urllib.parse import quote, urljoin
 
-import jsonpath_ng
 import sequences
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
@@ -35,6 +34,7 @@ from applications.tests.data.mock_vtj import (
     mock_vtj_person_id_query_found_content,
     mock_vtj_person_id_query_not_found_content,
 )
+from applications.vtj import VtjDocument
 from common.permissions import HandlerPermission
 from common.urls import handler_youth_application_processing_url
 from common.utils import (
@@ -272,6 +272,8 @@ class YouthApplication(LockForUpdateMixin, TimeStampedModel, UUIDModel):
     )
     objects = YouthApplicationQuerySet.as_manager()
 
+    _vtj_document: Optional[VtjDocument] = None
+
     @property
     def is_vtj_test_case(self) -> bool:
         return (
@@ -336,16 +338,18 @@ class YouthApplication(LockForUpdateMixin, TimeStampedModel, UUIDModel):
                 VTJClient().get_personal_info(self.social_security_number, end_user)
             )
 
-    def _vtj_values(self, jsonpath_expression) -> list:
-        try:
-            vtj_json = json.loads(self.encrypted_original_vtj_json)
-        except (json.decoder.JSONDecodeError, TypeError):
-            return []
-
-        return [
-            match.value
-            for match in jsonpath_ng.parse(jsonpath_expression).find(vtj_json)
-        ]
+    @property
+    def vtj_document(self) -> VtjDocument:
+        """
+        Parsed encrypted_original_vtj_json, parsed again only if the field has been set
+        to a different value since the last use.
+        """
+        if (
+            self._vtj_document is None
+            or self._vtj_document.vtj_json != self.encrypted_original_vtj_json
+        ):
+            self._vtj_document = VtjDocument(self.encrypted_original_vtj_json)
+        return self._vtj_document
 
     def handler_processing_url(self):
         return handler_youth_application_processing_url(self.pk)
@@ -711,22 +715,17 @@ class YouthApplication(LockForUpdateMixin, TimeStampedModel, UUIDModel):
     @property
     def is_social_security_number_valid_according_to_vtj(self) -> bool:
         return are_same_text_lists(
-            self._vtj_values("$.Henkilo.Henkilotunnus.['@voimassaolokoodi', '#text']"),
+            self.vtj_document.social_security_number_values,
             ["1", self.social_security_number],
         )
 
     @property
     def is_applicant_dead_according_to_vtj(self) -> bool:
-        return "1" in self._vtj_values("$.Henkilo.Kuolintiedot.Kuollut") or (
-            len(self._vtj_values("$.Henkilo.Kuolintiedot.Kuolinpvm")) > 0
-            and set(self._vtj_values("$.Henkilo.Kuolintiedot.Kuolinpvm")) != {None}
-        )
+        return self.vtj_document.is_dead
 
     @property
     def vtj_last_name(self) -> Optional[str]:
-        if vtj_last_names := self._vtj_values("$.Henkilo.NykyinenSukunimi.Sukunimi"):
-            return vtj_last_names[0]
-        return ""
+        return self.vtj_document.last_name
 
     @property
     def attends_helsinkian_school(self) -> bool:
@@ -734,9 +733,7 @@ class YouthApplication(LockForUpdateMixin, TimeStampedModel, UUIDModel):
 
     @property
     def vtj_home_municipality(self) -> Optional[str]:
-        if vtj_home_municipality := self._vtj_values("$.Henkilo.Kotikunta.KuntaS"):
-            return vtj_home_municipality[0]
-        return ""
+        return self.vtj_document.home_municipality
 
     @property
     def is_helsinkian(self) -> bool:
@@ -1,3 +1,5 @@
+from unittest import mock
+
 import pytest
 from django.test import override_settings
 from rest_framework.reverse import reverse
@@ -314,6 +316,33 @@ def test_application_update_writes_audit_log(api_client, user, application):
     assert audit_event["status"] == "SUCCESS"
 
 
+@pytest.mark.django_db(transaction=True)
+@override_settings(
+    AUDIT_LOG_ORIGIN="TEST_SERVICE",
+    AUDIT_LOG_BUFFERED=True,
+)
+def test_application_update_writes_buffered_audit_log(api_client, application):
+    application.invoicer_name = "test1"
+    application.save()
+
+    data = EmployerApplicationSerializer(application).data
+    data["invoicer_name"] = "test2"
+    history_model = EmployerApplication.history.model
+    with mock.patch.object(history_model, "diff_against") as diff_against_mock:
+        response = api_client.put(get_detail_url(application), data)
+
+    assert response.status_code == 200
+    # the changes are not read from the history
+    diff_against_mock.assert_not_called()
+    audit_event = AuditLogEntry.objects.get().message["audit_event"]
+    assert audit_event["operation"] == "UPDATE"
+    assert audit_event["target"] == {
+        "id": response.data["id"],
+        "type": "EmployerApplication",
+        "changes": ["invoicer_name changed from test1 to test2"],
+    }
+
+
 @pytest.mark.django_db
 @override_settings(
     AUDIT_LOG_ORIGIN="TEST_SERVICE",
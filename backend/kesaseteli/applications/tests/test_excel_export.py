@@ -3,12 +3,16 @@ from datetime import date, datetime, timedelta
 from decimal import Decimal
 from io import BytesIO
 from typing import List
+from unittest.mock import patch
 
 import openpyxl
 import pytest
+from django.core.cache import cache
+from django.db import connection
 from django.http import StreamingHttpResponse
 from django.shortcuts import reverse
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import translation
 from django.utils.timezone import localdate
 from freezegun import freeze_time
@@ -22,11 +26,13 @@ from applications.enums import (
 )
 from applications.exporters.excel_exporter import (
     APPLICATION_LANGUAGE_FIELD_TITLE,
+    build_xlsx_template,
     EMPLOYMENT_END_DATE_FIELD_TITLE,
     EMPLOYMENT_START_DATE_FIELD_TITLE,
     ExcelField,
     FIELDS,
-    get_attachment_uri,
+    generate_xlsx_template,
+    get_attachment_type_and_number,
     get_exportable_fields,
     get_reporting_columns,
     get_talpa_columns,
@@ -69,6 +75,25 @@ def get_field_titles(fields: List[ExcelField]) -> List[str]:
     return [field.title for field in fields]
 
 
+def get_expected_attachment_uri(
+    voucher: EmployerSummerVoucher, excel_field: ExcelField, request
+) -> str:
+    attachment_type, attachment_number = get_attachment_type_and_number(excel_field)
+    attachment = (
+        voucher.attachments.filter(attachment_type=attachment_type)
+        .order_by("created_at", "pk")[attachment_number - 1 : attachment_number]  # noqa
+        .first()
+    )
+    if not attachment:
+        return ""
+    return request.build_absolute_uri(
+        reverse(
+            "v1:employersummervoucher-handle-attachment",
+            kwargs={"pk": voucher.id, "attachment_pk": attachment.id},
+        )
+    )
+
+
 def check_removable_field_titles(removable_field_titles):
     assert len(removable_field_titles) == len(set(removable_field_titles))
     assert set(removable_field_titles) <= set(get_field_titles(FIELDS))
@@ -328,8 +353,8 @@ def test_excel_view_download_content(  # noqa: C901
                     output_column.value
                 ) == salary_paid
             elif excel_field.model_fields == ["attachments"]:
-                expected_attachment_uri = get_attachment_uri(
-                    voucher, excel_field, voucher.attachments, response.wsgi_request
+                expected_attachment_uri = get_expected_attachment_uri(
+                    voucher, excel_field, response.wsgi_request
                 )
                 assert output_column.value == expected_attachment_uri
             elif (
@@ -352,6 +377,26 @@ def test_excel_view_download_content(  # noqa: C901
                 ), excel_field.title
 
 
+@pytest.mark.django_db
+@override_settings(EXCEL_DOWNLOAD_BATCH_SIZE=100, NEXT_PUBLIC_MOCK_FLAG=False)
+@pytest.mark.parametrize("columns", ExcelColumns.values)
+def test_excel_view_download_query_count(staff_client, columns):
+    def get_download_query_count():
+        with CaptureQueriesContext(connection) as context:
+            response = staff_client.get(
+                f"{excel_download_url()}?download=annual&columns={columns}"
+            )
+            response.getvalue()
+        return len(context.captured_queries)
+
+    with freeze_time(datetime(2021, 12, 31)):
+        create_test_employer_summer_vouchers(year=2021)
+        query_count = get_download_query_count()
+        # the attachments are not queried for each summer voucher
+        create_test_employer_summer_vouchers(year=2021)
+        assert get_download_query_count() == query_count
+
+
 @pytest.mark.django_db
 @override_settings(
     EXCEL_DOWNLOAD_BATCH_SIZE=3,
@@ -481,6 +526,57 @@ def test_excel_view_download_with_unauthenticated_user(
     assert response.url == handler_403_url()
 
 
+@pytest.mark.parametrize("columns", ExcelColumns.values)
+def test_xlsx_template(columns):
+    cache.clear()
+    workbook = openpyxl.load_workbook(filename=generate_xlsx_template(columns))
+    header_row, placeholder_row = workbook.active.rows
+
+    fields = get_exportable_fields(columns)
+    assert [cell.value or "" for cell in header_row] == get_field_titles(fields)
+    for cell, field in zip(placeholder_row, fields):
+        if field.title == ORDER_FIELD_TITLE:
+            assert cell.value == 1
+        else:
+            assert cell.value == "placeholder value"
+
+
+def test_xlsx_template_cache():
+    cache.clear()
+    with patch(
+        "applications.exporters.excel_exporter.build_xlsx_template",
+        wraps=build_xlsx_template,
+    ) as build_template_mock:
+        template = generate_xlsx_template(ExcelColumns.REPORTING.value).getvalue()
+        assert (
+            generate_xlsx_template(ExcelColumns.REPORTING.value).getvalue() == template
+        )
+        assert build_template_mock.call_count == 1
+
+        generate_xlsx_template(ExcelColumns.TALPA.value)
+        assert build_template_mock.call_count == 2
+
+        with translation.override("sv"):
+            generate_xlsx_template(ExcelColumns.REPORTING.value)
+        assert build_template_mock.call_count == 3
+
+
+@pytest.mark.django_db
+def test_youth_xlsx_template_cache(staff_client):
+    ActiveYouthApplicationFactory()
+    cache.clear()
+    with patch.object(
+        YouthApplicationExcelExportViewSet,
+        "build_xlsx_template",
+        wraps=YouthApplicationExcelExportViewSet.build_xlsx_template,
+    ) as build_template_mock:
+        for _ in range(2):
+            response = staff_client.get(youth_excel_download_url())
+            workbook = openpyxl.load_workbook(filename=BytesIO(response.getvalue()))
+            assert len(list(workbook.active.rows)) == 2
+        assert build_template_mock.call_count == 1
+
+
 def test_unique_fields_besides_padding_fields():
     field_titles = get_field_titles(FIELDS)
     field_titles_without_padding_fields = [
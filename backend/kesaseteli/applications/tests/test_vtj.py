@@ -0,0 +1,104 @@
+from unittest import mock
+
+import pytest
+
+from applications.enums import YouthApplicationStatus
+from applications.tests.data.mock_vtj import (
+    mock_vtj_person_id_query_found_content,
+    mock_vtj_person_id_query_not_found_content,
+)
+from applications.tests.test_youth_applications_api import get_activation_url
+from applications.vtj import VtjDocument
+from common.tests.factories import InactiveNoNeedAdditionalInfoYouthApplicationFactory
+
+
+def _found_content(**kwargs) -> str:
+    return mock_vtj_person_id_query_found_content(
+        **{
+            "first_name": "Testietunimi",
+            "last_name": "Testisukunimi",
+            "social_security_number": "111111-111C",
+            "is_alive": True,
+            "is_home_municipality_helsinki": True,
+            **kwargs,
+        }
+    )
+
+
+@pytest.mark.parametrize("is_alive", [False, True])
+@pytest.mark.parametrize(
+    "is_home_municipality_helsinki,expected_home_municipality",
+    [(False, "Utsjoki"), (True, "Helsinki")],
+)
+def test_vtj_document_found(
+    is_alive, is_home_municipality_helsinki, expected_home_municipality
+):
+    document = VtjDocument(
+        _found_content(
+            is_alive=is_alive,
+            is_home_municipality_helsinki=is_home_municipality_helsinki,
+        )
+    )
+
+    assert document.social_security_number_values == ["1", "111111-111C"]
+    assert document.is_dead == (not is_alive)
+    assert document.last_name == "Testisukunimi"
+    assert document.home_municipality == expected_home_municipality
+
+
+@pytest.mark.parametrize(
+    "vtj_json",
+    [mock_vtj_person_id_query_not_found_content(), None, "", "{invalid"],
+)
+def test_vtj_document_without_person(vtj_json):
+    document = VtjDocument(vtj_json)
+
+    assert document.social_security_number_values == []
+    assert not document.is_dead
+    assert document.last_name == ""
+    assert document.home_municipality == ""
+
+
+def test_youth_application_vtj_document_parsed_once(settings):
+    settings.NEXT_PUBLIC_DISABLE_VTJ = False
+    app = InactiveNoNeedAdditionalInfoYouthApplicationFactory.build(
+        encrypted_original_vtj_json=_found_content()
+    )
+    app.last_name = "Testisukunimi"
+    app.social_security_number = "111111-111C"
+
+    with mock.patch(
+        "applications.models.VtjDocument", wraps=VtjDocument
+    ) as vtj_document_mock:
+        assert app.is_social_security_number_valid_according_to_vtj
+        assert not app.is_applicant_dead_according_to_vtj
+        assert app.is_last_name_as_in_vtj
+        assert app.is_helsinkian
+        app.need_additional_info
+        assert vtj_document_mock.call_count == 1
+
+        app.encrypted_original_vtj_json = _found_content(
+            last_name="Eri sukunimi", is_home_municipality_helsinki=False
+        )
+        assert not app.is_last_name_as_in_vtj
+        assert app.vtj_home_municipality == "Utsjoki"
+        assert vtj_document_mock.call_count == 2
+
+
+@pytest.mark.django_db
+def test_youth_application_activation_parses_vtj_once(
+    api_client, make_youth_application_activation_link_unexpired, settings
+):
+    settings.NEXT_PUBLIC_DISABLE_VTJ = False
+    app = InactiveNoNeedAdditionalInfoYouthApplicationFactory()
+
+    with mock.patch(
+        "applications.models.VtjDocument", wraps=VtjDocument
+    ) as vtj_document_mock:
+        response = api_client.get(get_activation_url(app.pk))
+
+    assert response.status_code == 302
+    app.refresh_from_db()
+    assert app.status == YouthApplicationStatus.ACCEPTED
+    vtj_document_mock.assert_called_once()
+
@@ -22,8 +22,9 @@ from xlsxwriter.worksheet import Format, Worksheet
 from applications.api.v1.serializers import YouthApplicationExcelExportSerializer
 from applications.enums import EmployerApplicationStatus, ExcelColumns
 from applications.exporters.excel_exporter import (
-    generate_data_rows,
+    DataRowGenerator,
     generate_xlsx_template,
+    get_cached_xlsx_template,
     get_exportable_fields,
     get_xlsx_filename,
 )
@@ -89,15 +90,13 @@ class EmployerApplicationExcelDownloadView(TemplateView):
         """
         Generate a StreamingHttpResponse with an xlsx attachment.
         """
-        serializer = partial(
-            generate_data_rows,
-            fields=get_exportable_fields(columns),
-            request=self.request,
+        serializer = DataRowGenerator(
+            fields=get_exportable_fields(columns), request=self.request
         )
         response = StreamingHttpResponse(
             xlsx_streaming.stream_queryset_as_xlsx(
                 qs=queryset,
-                xlsx_template=generate_xlsx_template(queryset, columns, self.request),
+                xlsx_template=generate_xlsx_template(columns),
                 serializer=serializer,
                 batch_size=settings.EXCEL_DOWNLOAD_BATCH_SIZE,
             ),
@@ -252,7 +251,7 @@ class YouthApplicationExcelExportViewSet(AuditLoggingModelViewSet):
             response = StreamingHttpResponse(
                 xlsx_streaming.stream_queryset_as_xlsx(
                     qs=queryset,
-                    xlsx_template=self.xlsx_template(queryset),
+                    xlsx_template=self.xlsx_template(),
                     serializer=self.serializer,
                     batch_size=settings.EXCEL_DOWNLOAD_BATCH_SIZE,
                 ),
@@ -275,38 +274,46 @@ class YouthApplicationExcelExportViewSet(AuditLoggingModelViewSet):
     def xlsx_filename(self) -> str:
         return f"{self.worksheet_name}-{timezone.localdate()}.xlsx"
 
-    def generate_data_row(self, app: YouthApplication, is_template: bool = False):
+    def generate_data_row(self, app: YouthApplication):
         data = self.serializer_class(app).data
-        return [
-            YouthApplicationExcelExportSerializer.get_placeholder_value(source_field)
-            if is_template and not data.get(source_field)
-            else data.get(source_field)
-            for source_field in self.source_fields()
-        ]
-
-    def write_data_row(
-        self,
-        worksheet: Worksheet,
-        row_number: int,
-        app: YouthApplication,
-        is_template: bool = False,
-    ):
-        data_row = self.generate_data_row(app, is_template)
-        for column_number, cell_value in enumerate(data_row):
-            worksheet.write(row_number, column_number, cell_value)
-
-    def write_header(self, worksheet: Worksheet, header_format: Format):
-        for column_number, column_name in enumerate(self.output_column_names()):
-            worksheet.write(0, column_number, column_name, header_format)
+        return [data.get(source_field) for source_field in self.source_fields()]
+
+    def xlsx_template_definition(self) -> tuple:
+        return (
+            self.worksheet_name,
+            tuple(sorted(self.header_format_properties.items())),
+            tuple(self.output_column_names()),
+            tuple(
+                YouthApplicationExcelExportSerializer.get_placeholder_value(
+                    source_field
+                )
+                for source_field in self.source_fields()
+            ),
+        )
 
-    def xlsx_template(self, queryset: QuerySet[YouthApplication]):
+    @staticmethod
+    def build_xlsx_template(definition: tuple) -> bytes:
+        (
+            worksheet_name,
+            header_format_properties,
+            column_names,
+            placeholders,
+        ) = definition
         result = io.BytesIO()
         workbook: Workbook = Workbook(result)
-        worksheet: Worksheet = workbook.add_worksheet(self.worksheet_name)
-        header_format: Format = workbook.add_format(self.header_format_properties)
-        self.write_header(worksheet, header_format)
-        self.write_data_row(
-            worksheet=worksheet, row_number=1, app=queryset[0], is_template=True
-        )
+        worksheet: Worksheet = workbook.add_worksheet(worksheet_name)
+        header_format: Format = workbook.add_format(dict(header_format_properties))
+        for column_number, column_name in enumerate(column_names):
+            worksheet.write(0, column_number, column_name, header_format)
+        for column_number, placeholder_value in enumerate(placeholders):
+            worksheet.write(1, column_number, placeholder_value)
         workbook.close()
-        return result
+        return result.getvalue()
+
+    def xlsx_template(self) -> io.BytesIO:
+        definition = self.xlsx_template_definition()
+        return get_cached_xlsx_template(
+            "youth_applications",
+            definition,
+            partial(self.build_xlsx_template, definition),
+        )
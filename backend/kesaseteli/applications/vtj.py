@@ -0,0 +1,61 @@
+import json
+from functools import cached_property
+from typing import Optional
+
+import jsonpath_ng
+
+SOCIAL_SECURITY_NUMBER_PATH = jsonpath_ng.parse(
+    "$.Henkilo.Henkilotunnus.['@voimassaolokoodi', '#text']"
+)
+IS_DEAD_PATH = jsonpath_ng.parse("$.Henkilo.Kuolintiedot.Kuollut")
+DATE_OF_DEATH_PATH = jsonpath_ng.parse("$.Henkilo.Kuolintiedot.Kuolinpvm")
+LAST_NAME_PATH = jsonpath_ng.parse("$.Henkilo.NykyinenSukunimi.Sukunimi")
+HOME_MUNICIPALITY_PATH = jsonpath_ng.parse("$.Henkilo.Kotikunta.KuntaS")
+
+
+class VtjDocument:
+    """
+    VTJ JSON of a youth application, parsed once.
+
+    The values are read with the precompiled JSONPath expressions when they are first
+    used. Invalid or missing JSON is treated as an empty document.
+    """
+
+    def __init__(self, vtj_json: Optional[str]):
+        self.vtj_json = vtj_json
+        try:
+            self.data = json.loads(vtj_json)
+        except (json.decoder.JSONDecodeError, TypeError):
+            self.data = None
+
+    def values(self, jsonpath_expression: jsonpath_ng.JSONPath) -> list:
+        if self.data is None:
+            return []
+        return [match.value for match in jsonpath_expression.find(self.data)]
+
+    @cached_property
+    def social_security_number_values(self) -> list:
+        """
+        Validity code ("1" if valid) and value of the social security number, in this order,
+        e.g. ["1", "010203-1230"].
+        """
+        return self.values(SOCIAL_SECURITY_NUMBER_PATH)
+
+    @cached_property
+    def is_dead(self) -> bool:
+        dates_of_death = self.values(DATE_OF_DEATH_PATH)
+        return "1" in self.values(IS_DEAD_PATH) or (
+            len(dates_of_death) > 0 and set(dates_of_death) != {None}
+        )
+
+    @cached_property
+    def last_name(self) -> str:
+        if last_names := self.values(LAST_NAME_PATH):
+            return last_names[0]
+        return ""
+
+    @cached_property
+    def home_municipality(self) -> str:
+        if home_municipalities := self.values(HOME_MUNICIPALITY_PATH):
+            return home_municipalities[0]
+        return ""
@@ -22,6 +22,12 @@ from shared.common.tests.conftest import *  # noqa
 from shared.common.tests.conftest import store_tokens_in_session
 
 
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    # the attachments are written to a temporary directory, not to var/media
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+
+
 @pytest.fixture
 def company():
     company = CompanyFactory()
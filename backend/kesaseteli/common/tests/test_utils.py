@@ -4,10 +4,17 @@ import pytest
 import stdnum.fi.hetu
 from django.core.exceptions import ValidationError
 
+from applications.models import EmployerSummerVoucher
+from common.tests.factories import (
+    EmployerApplicationFactory,
+    EmployerSummerVoucherFactory,
+)
 from common.tests.utils import get_random_social_security_number_for_year
 from common.utils import (
     are_same_text_lists,
     are_same_texts,
+    compile_getattr_nested,
+    getattr_nested,
     has_whitespace,
     is_uppercase,
     normalize_for_string_comparison,
@@ -165,3 +172,26 @@ def test_get_random_social_security_number_for_year(year):
         result = get_random_social_security_number_for_year(year)
         assert stdnum.fi.hetu.validate(result, allow_temporary=False)
         assert social_security_number_birthdate(result).year == year
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "attr_str",
+    [
+        "summer_voucher_serial_number",
+        "target_group",
+        "employment_start_date",
+        "employment_work_hours",
+        "hired_without_voucher_assessment",
+        "application__language",
+        "application__is_separate_invoicer",
+        "application__company__name",
+        "application__company__company_form",
+        "attachments",
+        "non_existing_attribute",
+    ],
+)
+def test_compile_getattr_nested(attr_str):
+    voucher = EmployerSummerVoucherFactory(application=EmployerApplicationFactory())
+    getter = compile_getattr_nested(EmployerSummerVoucher, attr_str.split("__"))
+    assert getter(voucher) == getattr_nested(voucher, attr_str.split("__"))
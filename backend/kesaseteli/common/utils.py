@@ -1,11 +1,12 @@
 import logging
 from datetime import date
 from email.mime.image import MIMEImage
-from typing import List, Optional
+from typing import Any, Callable, List, Optional
 
-from django.core.exceptions import ValidationError
+from django.core.exceptions import FieldDoesNotExist, ValidationError
 from django.core.mail import EmailMultiAlternatives, get_connection
 from django.utils import translation
+from django.utils.hashable import make_hashable
 from django.utils.translation import gettext_lazy as _
 from stdnum.fi.hetu import is_valid as is_valid_finnish_social_security_number
 
@@ -143,3 +144,45 @@ def getattr_nested(obj, attrs: list):
             with translation.override("fi"):
                 value = getattr(obj, f"get_{attr}_display")()
         return value
+
+
+def _get_model_field(model, attrs: list):
+    field = None
+    try:
+        for attr in attrs:
+            if field is not None:
+                model = field.related_model
+            field = model._meta.get_field(attr)
+    except (AttributeError, FieldDoesNotExist):
+        return None
+    return field
+
+
+def compile_getattr_nested(model, attrs: list) -> Callable[[Any], Any]:
+    """
+    Return a function that returns the same value as getattr_nested(obj, attrs) for the
+    instances of the given model. The attribute path and the Finnish labels of the choices
+    are resolved once, so the function is cheap to call for each row of an export.
+    """
+    attrs = list(attrs)
+    field = _get_model_field(model, attrs)
+    choice_labels = None
+    if getattr(field, "choices", None):
+        with translation.override("fi"):
+            choice_labels = {
+                make_hashable(value): str(label) for value, label in field.flatchoices
+            }
+
+    def get_value(obj):
+        value = obj
+        for attr in attrs:
+            value = getattr(value, attr, "")
+            if not value:
+                return ""
+        if isinstance(value, date):
+            return value.strftime("%d.%m.%Y")
+        if choice_labels is not None:
+            return choice_labels.get(make_hashable(value), value)
+        return value
+
+    return get_value
@@ -100,6 +100,7 @@ env = environ.Env(
     ELASTICSEARCH_PASSWORD=(str, ""),
     CLEAR_AUDIT_LOG_ENTRIES=(bool, False),
     ENABLE_SEND_AUDIT_LOG=(bool, False),
+    AUDIT_LOG_BUFFERED=(bool, False),
     ENABLE_ADMIN=(bool, False),
     DB_PREFIX=(str, ""),
     EMAIL_USE_TLS=(bool, False),
@@ -122,6 +123,7 @@ env = environ.Env(
     VTJ_USERNAME=(str, ""),
     VTJ_PASSWORD=(str, ""),
     VTJ_TIMEOUT=(int, 30),
+    VTJ_CACHE_TIMEOUT=(int, 0),
     NEXT_PUBLIC_ENABLE_SUOMIFI=(bool, False),
     SUOMIFI_TEST=(bool, False),
     # base64 encoded public key certificate (e.g. base64 -w 0 public.pem)
@@ -139,6 +141,7 @@ env = environ.Env(
     SUOMIFI_ADMINISTRATIVE_LAST_NAME=(str, None),
     SUOMIFI_ADMINISTRATIVE_EMAIL=(str, None),
     EXCEL_DOWNLOAD_BATCH_SIZE=(int, 50),
+    XLSX_TEMPLATE_CACHE_TIMEOUT=(int, 60 * 60 * 24 * 7),
 )
 if os.path.exists(env_file):
     env.read_env(env_file)
@@ -157,8 +160,13 @@ VTJ_PERSONAL_ID_QUERY_URL = env.str("VTJ_PERSONAL_ID_QUERY_URL")
 VTJ_USERNAME = env.str("VTJ_USERNAME")
 VTJ_PASSWORD = env.str("VTJ_PASSWORD")
 VTJ_TIMEOUT = env.int("VTJ_TIMEOUT")
+# Seconds to cache the VTJ responses, 0 disables the cache
+VTJ_CACHE_TIMEOUT = env.int("VTJ_CACHE_TIMEOUT")
 NEXT_PUBLIC_ENABLE_SUOMIFI = env("NEXT_PUBLIC_ENABLE_SUOMIFI")
 EXCEL_DOWNLOAD_BATCH_SIZE = env.int("EXCEL_DOWNLOAD_BATCH_SIZE")
+# The cache keys of the xlsx templates change with the templates, so the timeout only
+# limits how long the unused templates are kept in the cache
+XLSX_TEMPLATE_CACHE_TIMEOUT = env.int("XLSX_TEMPLATE_CACHE_TIMEOUT")
 
 DB_PREFIX = {
     None: env.str("DB_PREFIX"),
@@ -298,6 +306,7 @@ ELASTICSEARCH_PORT = env("ELASTICSEARCH_PORT")
 ELASTICSEARCH_USERNAME = env("ELASTICSEARCH_USERNAME")
 ELASTICSEARCH_PASSWORD = env("ELASTICSEARCH_PASSWORD")
 ENABLE_SEND_AUDIT_LOG = env("ENABLE_SEND_AUDIT_LOG")
+AUDIT_LOG_BUFFERED = env.bool("AUDIT_LOG_BUFFERED")
 
 LOGGING = {
     "version": 1,
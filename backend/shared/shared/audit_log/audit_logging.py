@@ -1,5 +1,8 @@
+import copy
+import threading
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from typing import Callable, Optional, Union
+from typing import Callable, List, Optional, Union
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
@@ -13,6 +16,8 @@ from shared.audit_log.models import AuditLogEntry
 
 User = get_user_model()
 
+_buffer = threading.local()
+
 
 def _now() -> datetime:
     """Returns the current time in UTC timezone."""
@@ -33,6 +38,7 @@ def log(
     get_time: Callable[[], datetime] = _now,
     ip_address: str = "",
     additional_information: str = "",
+    changes: Optional[List[str]] = None,
 ):
     """
     Write an event to the audit log.
@@ -45,6 +51,12 @@ def log(
     there were no changes to the object iteself but it was (re-)sent
     to another system for example. Thus it will not log the "changes"
     of the object.
+
+    The changes of an UPDATE are read from the history of the target,
+    unless they are given, e.g. computed with get_changes().
+
+    Inside a buffered() block, the event is written at the end of the block,
+    together with the other events of the block.
     """
     current_time = get_time()
     user_id = str(actor.pk) if getattr(actor, "pk", None) else ""
@@ -81,34 +93,102 @@ def log(
         },
     }
 
-    if (
-        operation == Operation.UPDATE
-        and not additional_information
-        and hasattr(target, "history")
-    ):
-        _add_changes(target, message)
+    if operation == Operation.UPDATE and not additional_information:
+        if changes is None and hasattr(target, "history"):
+            changes = _get_history_changes(target)
+        if changes:
+            message["audit_event"]["target"]["changes"] = changes
 
-    AuditLogEntry.objects.create(
-        message=message,
-    )
+    entry = AuditLogEntry(message=message)
+    if is_buffered():
+        _buffer.entries.append(entry)
+    else:
+        entry.save()
 
 
-def _add_changes(target: Union[Model, ModelBase], message: dict) -> None:
-    # Model is using django-simple-history
-    latest_record = target.history.latest()
-    previous_record = latest_record.prev_record
+def is_buffered() -> bool:
+    return getattr(_buffer, "entries", None) is not None
 
-    if previous_record:
-        delta = latest_record.diff_against(previous_record)
 
-        changes_list = []
-        for change in delta.changes:
-            changes_list.append(
-                f"{change.field} changed from {change.old} to {change.new}"
+@contextmanager
+def buffered():
+    """
+    Write the audit log events of the block with a single bulk insert at the end of the block,
+    instead of an insert for each event. Enabled with the AUDIT_LOG_BUFFERED setting.
+
+    The block is meant to be inside the atomic block of the logged action, like in
+    AuditLoggingModelViewSet.record_action(), so that the events are inserted in the transaction of
+    the action before it is committed. If the insert fails, the action is rolled back, as it would
+    be without the buffer. If the block raises an exception, its events are discarded together with
+    the rolled back action. A nested block uses the buffer of the outermost block.
+    """
+    if not getattr(settings, "AUDIT_LOG_BUFFERED", False):
+        yield
+        return
+
+    if is_buffered():
+        start = len(_buffer.entries)
+        try:
+            yield
+        except Exception:
+            del _buffer.entries[start:]
+            raise
+        return
+
+    _buffer.entries = []
+    try:
+        yield
+        entries = _buffer.entries
+    finally:
+        _buffer.entries = None
+    if entries:
+        AuditLogEntry.objects.bulk_create(entries)
+
+
+def get_tracked_values(instance: Model) -> dict:
+    """
+    Return the values of the fields of the instance that are compared in the changes of an UPDATE,
+    i.e. the editable fields tracked by django-simple-history.
+    """
+    if not hasattr(instance, "history"):
+        return {}
+    history_fields = {field.name for field in instance.history.model._meta.fields}
+    values = {}
+    for field in instance._meta.fields:
+        if field.editable and field.name in history_fields:
+            value = field.value_from_object(instance)
+            # e.g. the values of JSONFields may be modified in place
+            values[field.name] = (
+                copy.deepcopy(value) if isinstance(value, (dict, list)) else value
             )
+    return values
+
+
+def get_changes(original_values: dict, instance: Model) -> List[str]:
+    """
+    Return the changes of the instance since get_tracked_values() returned the original values,
+    without querying the history of the instance.
+    """
+    current_values = get_tracked_values(instance)
+    return [
+        f"{name} changed from {value} to {current_values[name]}"
+        for name, value in original_values.items()
+        if name in current_values and current_values[name] != value
+    ]
+
 
-        if changes_list:
-            message["audit_event"]["target"]["changes"] = changes_list
+def _get_history_changes(target: Union[Model, ModelBase]) -> List[str]:
+    # Model is using django-simple-history
+    latest_record = target.history.latest()
+    previous_record = latest_record.prev_record
+    if not previous_record:
+        return []
+
+    delta = latest_record.diff_against(previous_record)
+    return [
+        f"{change.field} changed from {change.old} to {change.new}"
+        for change in delta.changes
+    ]
 
 
 def _get_target_id(target: Union[Model, ModelBase]) -> Optional[str]:
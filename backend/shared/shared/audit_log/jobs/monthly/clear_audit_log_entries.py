@@ -3,18 +3,25 @@ import logging
 from django.conf import settings
 from django_extensions.management.jobs import MonthlyJob
 
-from shared.audit_log.tasks import clear_audit_log_entries
+from shared.audit_log.tasks import clear_audit_log_entries, create_audit_log_partitions
 
 LOGGER = logging.getLogger(__name__)
 
 
 class Job(MonthlyJob):
     help = (
-        "Clear AuditLogEntry which is already sent to Elasticsearch,"
+        "Create the monthly AuditLogEntry partitions of the next months and "
+        "clear AuditLogEntry which is already sent to Elasticsearch,"
         "only clear if settings.CLEAR_AUDIT_LOG_ENTRIES is set to True (default: False)"
     )
 
     def execute(self):
+        created_partitions = create_audit_log_partitions()
+        if created_partitions:
+            LOGGER.info(
+                f"Created audit log partitions {', '.join(created_partitions)}."
+            )
+
         if settings.CLEAR_AUDIT_LOG_ENTRIES:
             LOGGER.info("Removing sent expired audit log entries...")
             deleted_count = clear_audit_log_entries()
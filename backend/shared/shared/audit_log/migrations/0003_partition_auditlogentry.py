@@ -0,0 +1,113 @@
+from datetime import date, datetime, time, timezone
+
+from django.db import migrations, models
+
+TABLE_NAME = "audit_log_auditlogentry"
+OLD_TABLE_NAME = "audit_log_auditlogentry_old"
+MONTHS_AHEAD = 2
+
+
+def _add_months(month, months):
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def _get_start_time(month):
+    return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+
+def partition_table(apps, schema_editor):
+    """
+    Replace the audit log table with a table partitioned by month on created_at. The primary key
+    of a partitioned table must include the partition key, so it is (id, created_at) in the
+    database, while the id is still unique.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE_NAME} RENAME TO {OLD_TABLE_NAME}")
+        cursor.execute(
+            f"ALTER TABLE {OLD_TABLE_NAME}"
+            f" RENAME CONSTRAINT {TABLE_NAME}_pkey TO {OLD_TABLE_NAME}_pkey"
+        )
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE_NAME} (
+                id integer NOT NULL DEFAULT nextval('{TABLE_NAME}_id_seq'),
+                is_sent boolean NOT NULL,
+                message jsonb NOT NULL,
+                created_at timestamp with time zone NOT NULL,
+                PRIMARY KEY (id, created_at)
+            ) PARTITION BY RANGE (created_at)
+            """
+        )
+        cursor.execute(f"ALTER SEQUENCE {TABLE_NAME}_id_seq OWNED BY {TABLE_NAME}.id")
+        cursor.execute(
+            f"CREATE TABLE {TABLE_NAME}_default PARTITION OF {TABLE_NAME} DEFAULT"
+        )
+
+        cursor.execute(f"SELECT min(created_at) FROM {OLD_TABLE_NAME}")
+        first_created_at = cursor.fetchone()[0]
+        now = datetime.now(tz=timezone.utc)
+        month = date((first_created_at or now).year, (first_created_at or now).month, 1)
+        last_month = _add_months(date(now.year, now.month, 1), MONTHS_AHEAD)
+        while month <= last_month:
+            next_month = _add_months(month, 1)
+            cursor.execute(
+                f"CREATE TABLE {TABLE_NAME}_p{month:%Y_%m} PARTITION OF {TABLE_NAME}"
+                " FOR VALUES FROM (%s) TO (%s)",
+                [_get_start_time(month), _get_start_time(next_month)],
+            )
+            month = next_month
+
+        cursor.execute(
+            f"INSERT INTO {TABLE_NAME} (id, is_sent, message, created_at)"
+            f" SELECT id, is_sent, message, created_at FROM {OLD_TABLE_NAME}"
+        )
+        cursor.execute(f"DROP TABLE {OLD_TABLE_NAME}")
+
+
+def unpartition_table(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE {TABLE_NAME} RENAME TO {OLD_TABLE_NAME}")
+        cursor.execute(
+            f"ALTER TABLE {OLD_TABLE_NAME}"
+            f" RENAME CONSTRAINT {TABLE_NAME}_pkey TO {OLD_TABLE_NAME}_pkey"
+        )
+        cursor.execute(
+            f"""
+            CREATE TABLE {TABLE_NAME} (
+                id integer NOT NULL DEFAULT nextval('{TABLE_NAME}_id_seq') PRIMARY KEY,
+                is_sent boolean NOT NULL,
+                message jsonb NOT NULL,
+                created_at timestamp with time zone NOT NULL
+            )
+            """
+        )
+        cursor.execute(f"ALTER SEQUENCE {TABLE_NAME}_id_seq OWNED BY {TABLE_NAME}.id")
+        cursor.execute(
+            f"INSERT INTO {TABLE_NAME} (id, is_sent, message, created_at)"
+            f" SELECT id, is_sent, message, created_at FROM {OLD_TABLE_NAME}"
+        )
+        cursor.execute(f"DROP TABLE {OLD_TABLE_NAME}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit_log", "0002_auditlogentry_created_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_table, unpartition_table),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(
+                condition=models.Q(is_sent=False),
+                fields=["id"],
+                name="audit_log_unsent_id_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("audit_log", "0003_partition_auditlogentry"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="auditlogentry",
+            name="send_failed_at",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="send failed at"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="auditlogentry",
+            name="audit_log_unsent_id_idx",
+        ),
+        migrations.AddIndex(
+            model_name="auditlogentry",
+            index=models.Index(
+                condition=models.Q(is_sent=False, send_failed_at__isnull=True),
+                fields=["id"],
+                name="audit_log_unsent_id_idx",
+            ),
+        ),
+    ]
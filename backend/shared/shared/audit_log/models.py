@@ -6,6 +6,21 @@ class AuditLogEntry(models.Model):
     is_sent = models.BooleanField(default=False, verbose_name=_("is sent"))
     message = models.JSONField(verbose_name=_("message"))
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created at"))
+    # set when Elasticsearch rejects the entry permanently, the entry is not sent again
+    send_failed_at = models.DateTimeField(
+        null=True, blank=True, verbose_name=_("send failed at")
+    )
+
+    class Meta:
+        # The table is partitioned by month on created_at in PostgreSQL, see partitions.py
+        indexes = [
+            # for finding the unsent entries without scanning the sent ones
+            models.Index(
+                fields=["id"],
+                condition=models.Q(is_sent=False, send_failed_at__isnull=True),
+                name="audit_log_unsent_id_idx",
+            ),
+        ]
 
     def __str__(self):
         return " ".join(
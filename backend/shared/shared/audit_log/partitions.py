@@ -0,0 +1,179 @@
+import logging
+import re
+from datetime import date, datetime, time, timezone
+from typing import List, Optional, Tuple
+
+from django.db import connection, transaction
+
+from shared.audit_log.models import AuditLogEntry
+
+# the partitions of the months after the current one are created in advance
+PARTITION_MONTHS_AHEAD = 2
+LOGGER = logging.getLogger(__name__)
+
+TABLE_NAME = AuditLogEntry._meta.db_table
+DEFAULT_PARTITION_NAME = f"{TABLE_NAME}_default"
+_PARTITION_NAME_RE = re.compile(rf"^{TABLE_NAME}_p(\d{{4}})_(\d{{2}})$")
+
+
+def get_partition_name(month: date) -> str:
+    return f"{TABLE_NAME}_p{month:%Y_%m}"
+
+
+def _add_months(month: date, months: int) -> date:
+    year, month_index = divmod(month.year * 12 + month.month - 1 + months, 12)
+    return date(year, month_index + 1, 1)
+
+
+def _get_start_time(month: date) -> datetime:
+    return datetime.combine(month, time.min, tzinfo=timezone.utc)
+
+
+def is_partitioned() -> bool:
+    """Return True if the audit log entries are stored in a partitioned table."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table"
+            " WHERE partrelid = to_regclass(%s))",
+            [TABLE_NAME],
+        )
+        return cursor.fetchone()[0]
+
+
+def get_month_partitions() -> List[Tuple[date, str]]:
+    """Return the months and the names of the monthly partitions, ordered by month."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits"
+            " JOIN pg_class child ON child.oid = pg_inherits.inhrelid"
+            " WHERE pg_inherits.inhparent = to_regclass(%s)",
+            [TABLE_NAME],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        if match := _PARTITION_NAME_RE.match(name):
+            partitions.append((date(int(match[1]), int(match[2]), 1), name))
+    return sorted(partitions)
+
+
+def create_partition(month: date) -> bool:
+    """
+    Create the partition of the month, unless it exists. The entries of the month that were
+    stored in the default partition, because the partition was missing, are moved to it.
+
+    :return: True if the partition was created.
+    """
+    name = get_partition_name(month)
+    if name in {partition_name for _, partition_name in get_month_partitions()}:
+        return False
+
+    table = connection.ops.quote_name(TABLE_NAME)
+    partition = connection.ops.quote_name(name)
+    default_partition = connection.ops.quote_name(DEFAULT_PARTITION_NAME)
+    bounds = [_get_start_time(month), _get_start_time(_add_months(month, 1))]
+    with transaction.atomic(), connection.cursor() as cursor:
+        # a partition can't be added if the default partition has rows that belong to it
+        cursor.execute(
+            f"CREATE TABLE {partition}"
+            f" (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {default_partition}"
+            " WHERE created_at >= %s AND created_at < %s RETURNING *)"
+            f" INSERT INTO {partition} SELECT * FROM moved",
+            bounds,
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {partition}"
+            " FOR VALUES FROM (%s) TO (%s)",
+            bounds,
+        )
+    return True
+
+
+def create_partitions(
+    months_ahead: int = PARTITION_MONTHS_AHEAD, now: Optional[datetime] = None
+) -> List[str]:
+    """
+    Create the partitions of the current month and the next months_ahead months.
+
+    :return: The names of the created partitions.
+    """
+    if not is_partitioned():
+        return []
+    now = now or datetime.now(tz=timezone.utc)
+    current_month = date(now.year, now.month, 1)
+    created = []
+    for months in range(months_ahead + 1):
+        month = _add_months(current_month, months)
+        if create_partition(month):
+            created.append(get_partition_name(month))
+    return created
+
+
+def drop_expired_partitions(before: datetime) -> int:
+    """
+    Drop the monthly partitions of the entries created before the given time, if all of their
+    entries have been sent. A partition with unsent entries is kept until they have been sent,
+    and only its sent entries are deleted.
+
+    The entries that Elasticsearch rejected permanently are never sent, so they don't keep
+    the partition from being dropped. They are moved to the default partition instead, where
+    they are kept like the other unsent entries.
+
+    :return: The number of dropped and deleted entries.
+    """
+    table = connection.ops.quote_name(TABLE_NAME)
+    deleted_count = 0
+    for month, name in get_month_partitions():
+        if _get_start_time(_add_months(month, 1)) > before:
+            break
+        partition = connection.ops.quote_name(name)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {partition}"
+                " WHERE NOT is_sent AND send_failed_at IS NULL)"
+            )
+            if cursor.fetchone()[0]:
+                LOGGER.info(
+                    f"Audit log partition {name} has unsent entries, not dropped,"
+                    " deleting its sent entries"
+                )
+                deleted_count += _delete_sent_entries(partition, before)
+                continue
+            cursor.execute(
+                f"SELECT count(*) FROM {partition} WHERE send_failed_at IS NULL"
+            )
+            deleted_count += cursor.fetchone()[0]
+            # without the monthly partition, the rejected entries are inserted to the default one
+            cursor.execute(f"ALTER TABLE {table} DETACH PARTITION {partition}")
+            cursor.execute(
+                f"INSERT INTO {table}"
+                f" SELECT * FROM {partition} WHERE send_failed_at IS NOT NULL"
+            )
+            cursor.execute(f"DROP TABLE {partition}")
+    return deleted_count
+
+
+def _delete_sent_entries(table: str, before: datetime) -> int:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {table} WHERE is_sent AND created_at <= %s", [before]
+        )
+        return cursor.rowcount
+
+
+def clear_default_partition(before: datetime) -> int:
+    """
+    Delete the sent entries created before the given time from the default partition, which has
+    only the entries that were created when their monthly partition was missing.
+
+    :return: The number of deleted entries.
+    """
+    return _delete_sent_entries(
+        connection.ops.quote_name(DEFAULT_PARTITION_NAME), before
+    )
@@ -1,13 +1,22 @@
 import logging
+import time
 from datetime import timedelta
+from typing import Dict, Iterable, List, Tuple
 
 from django.conf import settings
 from django.utils import timezone
-from elasticsearch import Elasticsearch
+from elasticsearch import Elasticsearch, TransportError
 
+from shared.audit_log import partitions
 from shared.audit_log.models import AuditLogEntry
 
 ES_STATUS_CREATED = "created"
+ES_STATUS_CONFLICT = 409
+# the statuses of the failed requests and items that are worth retrying
+ES_RETRYABLE_STATUSES = (429, 502, 503, 504)
+BULK_CHUNK_SIZE = 500
+BULK_MAX_RETRIES = 3
+BULK_RETRY_BACKOFF_SECONDS = 1
 LOGGER = logging.getLogger(__name__)
 
 
@@ -38,38 +47,155 @@ def send_audit_log_to_elastic_search() -> int:
         ],
         http_auth=(settings.ELASTICSEARCH_USERNAME, settings.ELASTICSEARCH_PASSWORD),
     )
-    entries = AuditLogEntry.objects.filter(is_sent=False).order_by("created_at")
-    sent_entries_count = 0
+    return send_audit_log_entries(es, settings.ELASTICSEARCH_APP_AUDIT_LOG_INDEX)
 
-    for entry in entries:
-        message_body = entry.message.copy()
-        message_body["@timestamp"] = entry.message["audit_event"][
-            "date_time"
-        ]  # required by ES
-        rs = es.index(
-            index=settings.ELASTICSEARCH_APP_AUDIT_LOG_INDEX,
-            id=entry.id,
-            body=message_body,
-            op_type="create",
+
+def send_audit_log_entries(
+    es: Elasticsearch, index: str, chunk_size: int = BULK_CHUNK_SIZE
+) -> int:
+    """
+    Send the unsent AuditLogEntry objects to the Elasticsearch index with the bulk API, in
+    chunks ordered by id, and mark the sent entries with one update per chunk. The entries
+    that could not be sent are left unsent, to be sent on the next run, except the entries
+    that Elasticsearch rejected permanently. Their send_failed_at is set, and they are not
+    sent again.
+
+    :return: The number of AuditLogEntry objects sent to Elasticsearch.
+    """
+    sent_entries_count = 0
+    last_id = 0
+    while True:
+        entries = list(
+            AuditLogEntry.objects.filter(
+                is_sent=False, send_failed_at__isnull=True, id__gt=last_id
+            ).order_by("id")[:chunk_size]
         )
-        if rs.get("result") == ES_STATUS_CREATED:
-            entry.is_sent = True
-            entry.save()
-            sent_entries_count += 1
+        if not entries:
+            break
+        last_id = entries[-1].id
+
+        sent_ids, rejected_ids = _send_chunk(es, index, entries)
+        if sent_ids:
+            AuditLogEntry.objects.filter(id__in=sent_ids).update(is_sent=True)
+            sent_entries_count += len(sent_ids)
+        if rejected_ids:
+            AuditLogEntry.objects.filter(id__in=rejected_ids).update(
+                send_failed_at=timezone.now()
+            )
 
     return sent_entries_count
 
 
+def _get_document(entry: AuditLogEntry) -> dict:
+    document = entry.message.copy()
+    document["@timestamp"] = entry.message["audit_event"]["date_time"]  # required by ES
+    return document
+
+
+def _get_bulk_body(index: str, entries: Iterable[AuditLogEntry]) -> list:
+    body = []
+    for entry in entries:
+        body.append({"create": {"_index": index, "_id": entry.id}})
+        body.append(_get_document(entry))
+    return body
+
+
+def _handle_bulk_response(
+    response: dict, pending: Dict[int, AuditLogEntry]
+) -> Tuple[list, list]:
+    """
+    Remove the sent entries and the entries that can't be sent from pending.
+
+    :return: The ids of the sent entries and the ids of the rejected entries.
+    """
+    sent_ids = []
+    rejected_ids = []
+    for item in response["items"]:
+        result = item["create"]
+        entry_id = int(result["_id"])
+        status = result.get("status")
+        if result.get("result") == ES_STATUS_CREATED or status == ES_STATUS_CONFLICT:
+            sent_ids.append(entry_id)
+            del pending[entry_id]
+        elif not _is_retryable(status):
+            LOGGER.error(
+                f"Audit log entry {entry_id} was rejected by Elasticsearch: {result}"
+            )
+            rejected_ids.append(entry_id)
+            del pending[entry_id]
+    return sent_ids, rejected_ids
+
+
+def _is_retryable(status) -> bool:
+    # connection errors have no status code
+    return not isinstance(status, int) or status in ES_RETRYABLE_STATUSES
+
+
+def _send_chunk(
+    es: Elasticsearch, index: str, entries: List[AuditLogEntry]
+) -> Tuple[list, list]:
+    """
+    Send the entries with one bulk request, retrying the failed items with exponential
+    backoff. An entry that already exists in the index was sent before, e.g. by a run that
+    failed to mark it sent, so it is considered sent. If the request itself still fails
+    after the retries, the error is raised and the rest of the entries are not sent.
+
+    :return: The ids of the entries that are in Elasticsearch and the ids of the entries
+        that Elasticsearch rejected.
+    """
+    pending = {entry.id: entry for entry in entries}
+    sent_ids = []
+    rejected_ids = []
+    for attempt in range(BULK_MAX_RETRIES + 1):
+        if attempt:
+            time.sleep(BULK_RETRY_BACKOFF_SECONDS * 2 ** (attempt - 1))
+
+        try:
+            response = es.bulk(body=_get_bulk_body(index, pending.values()))
+        except TransportError as e:
+            if not _is_retryable(e.status_code) or attempt == BULK_MAX_RETRIES:
+                raise
+            LOGGER.warning(f"Sending audit log entries to Elasticsearch failed: {e}")
+            continue
+
+        chunk_sent_ids, chunk_rejected_ids = _handle_bulk_response(response, pending)
+        sent_ids += chunk_sent_ids
+        rejected_ids += chunk_rejected_ids
+        if not pending:
+            break
+    return sent_ids, rejected_ids
+
+
 def clear_audit_log_entries(days_to_keep=30) -> int:
     """
     Delete AuditLogEntry entries that have been sent to Elasticsearch and are older than
     `days_to_keep` days.
 
+    If the entries are stored in monthly partitions, the partitions are dropped as a whole
+    instead of deleting the entries, when all of their entries are expired and sent. The
+    entries are thus kept up to a month longer than `days_to_keep` days.
+
     :return: The number of deleted AuditLogEntry objects
     """
     # Only remove entries older than `X` days
+    expiry_time = timezone.now() - timedelta(days=days_to_keep)
+    if partitions.is_partitioned():
+        return partitions.drop_expired_partitions(
+            expiry_time
+        ) + partitions.clear_default_partition(expiry_time)
+
     sent_entries = AuditLogEntry.objects.filter(
-        is_sent=True, created_at__lte=(timezone.now() - timedelta(days=days_to_keep))
+        is_sent=True, created_at__lte=expiry_time
     )
     deleted_count, _ = sent_entries.delete()
     return deleted_count
+
+
+def create_audit_log_partitions() -> List[str]:
+    """
+    Create the monthly partitions of the AuditLogEntry table for the current and the next
+    months, if the table is partitioned.
+
+    :return: The names of the created partitions.
+    """
+    return partitions.create_partitions()
@@ -1,16 +1,25 @@
+import collections
+import copy
+import json
+import threading
 from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest import mock
 
 import pytest
 from django.contrib.auth.models import AnonymousUser
+from django.db import DatabaseError, transaction
 from django.test import override_settings
 from django.utils import timezone
+from elasticsearch import ConnectionError, Elasticsearch
 
 from shared.audit_log import audit_logging
 from shared.audit_log.enums import Operation, Status
 from shared.audit_log.models import AuditLogEntry
 from shared.audit_log.tasks import (
+    BULK_CHUNK_SIZE,
     clear_audit_log_entries,
+    send_audit_log_entries,
     send_audit_log_to_elastic_search,
 )
 
@@ -300,6 +309,101 @@ def test_log_user_with_backend(user, fixed_datetime):
     }
 
 
+@pytest.mark.django_db
+def test_log_changes(user):
+    changes = ["first_name changed from a to b"]
+    audit_logging.log(user, "", Operation.UPDATE, user, changes=changes)
+    audit_logging.log(user, "", Operation.UPDATE, user, changes=[])
+    audit_logging.log(
+        user, "", Operation.UPDATE, user, additional_information="sent", changes=changes
+    )
+
+    targets = [
+        entry.message["audit_event"]["target"]
+        for entry in AuditLogEntry.objects.order_by("id")
+    ]
+    assert targets[0]["changes"] == changes
+    assert "changes" not in targets[1]
+    assert "changes" not in targets[2]
+
+
+@pytest.mark.django_db
+def test_get_changes_without_history(user):
+    assert audit_logging.get_tracked_values(user) == {}
+    assert audit_logging.get_changes({}, user) == []
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(AUDIT_LOG_BUFFERED=True)
+def test_log_buffered(user):
+    bulk_create = mock.patch.object(
+        AuditLogEntry.objects, "bulk_create", wraps=AuditLogEntry.objects.bulk_create
+    )
+    with bulk_create as bulk_create_mock, transaction.atomic():
+        with audit_logging.buffered():
+            audit_logging.log(
+                user, "", Operation.READ, user, additional_information="1"
+            )
+            with pytest.raises(ValueError), audit_logging.buffered():
+                audit_logging.log(
+                    user, "", Operation.READ, user, additional_information="2"
+                )
+                raise ValueError()
+            with audit_logging.buffered():
+                audit_logging.log(
+                    user, "", Operation.READ, user, additional_information="3"
+                )
+            assert AuditLogEntry.objects.count() == 0
+
+        # written in the transaction, before it is committed
+        assert [
+            entry.message["audit_event"]["additional_information"]
+            for entry in AuditLogEntry.objects.order_by("id")
+        ] == ["1", "3"]
+        bulk_create_mock.assert_called_once()
+
+    assert all(entry.created_at for entry in AuditLogEntry.objects.all())
+    assert not audit_logging.is_buffered()
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(AUDIT_LOG_BUFFERED=True)
+def test_log_buffered_discarded_on_exception(user):
+    with pytest.raises(ValueError), transaction.atomic(), audit_logging.buffered():
+        audit_logging.log(user, "", Operation.READ, user)
+        raise ValueError()
+
+    assert AuditLogEntry.objects.count() == 0
+    assert not audit_logging.is_buffered()
+
+
+@pytest.mark.django_db(transaction=True)
+@override_settings(AUDIT_LOG_BUFFERED=True)
+def test_log_buffered_insert_fails(user):
+    with mock.patch.object(
+        AuditLogEntry.objects, "bulk_create", side_effect=DatabaseError()
+    ), pytest.raises(DatabaseError):
+        with transaction.atomic(), audit_logging.buffered():
+            user.first_name = "Changed"
+            user.save()
+            audit_logging.log(user, "", Operation.UPDATE, user)
+
+    # the action is rolled back like it would be without the buffer
+    user.refresh_from_db()
+    assert user.first_name != "Changed"
+    assert AuditLogEntry.objects.count() == 0
+    assert not audit_logging.is_buffered()
+
+
+@pytest.mark.django_db
+@override_settings(AUDIT_LOG_BUFFERED=False)
+def test_log_buffered_disabled(user):
+    with audit_logging.buffered():
+        assert not audit_logging.is_buffered()
+        audit_logging.log(user, "", Operation.READ, user)
+        assert AuditLogEntry.objects.count() == 1
+
+
 @pytest.mark.django_db
 @override_settings(
     ENABLE_SEND_AUDIT_LOG=True,
@@ -345,13 +449,222 @@ def test_send_audit_log_success(user, fixed_datetime, result_value, expected_sta
     assert AuditLogEntry.objects.count() == 1
     assert AuditLogEntry.objects.first().is_sent is False
 
-    with mock.patch("elasticsearch.Elasticsearch.index") as elasticsearch_index_mock:
-        elasticsearch_index_mock.return_value = {"result": result_value}
+    with mock.patch("elasticsearch.Elasticsearch.bulk") as elasticsearch_bulk_mock:
+        elasticsearch_bulk_mock.side_effect = _get_bulk_response(
+            lambda _: {
+                "result": result_value,
+                "status": 201 if expected_status else 400,
+            }
+        )
         sent_entries_count = send_audit_log_to_elastic_search()
         assert AuditLogEntry.objects.first().is_sent == expected_status
         assert sent_entries_count == (1 if expected_status else 0)
 
 
+def _get_bulk_response(get_item_result):
+    """
+    Return a fake Elasticsearch.bulk that returns get_item_result(entry_id) as the result of
+    each entry in the request.
+    """
+
+    def bulk(body):
+        return {
+            "errors": False,
+            "items": [
+                {
+                    "create": {
+                        "_id": str(action["create"]["_id"]),
+                        **get_item_result(action["create"]["_id"]),
+                    }
+                }
+                for action in body[::2]
+            ],
+        }
+
+    return bulk
+
+
+def _create_entries(count):
+    for _ in range(count):
+        audit_logging.log(None, "", Operation.READ, AuditLogEntry)
+    return list(AuditLogEntry.objects.order_by("id").values_list("id", flat=True))
+
+
+@pytest.mark.django_db
+def test_send_audit_log_entries_in_chunks():
+    entry_ids = _create_entries(5)
+    es = mock.Mock()
+    es.bulk.side_effect = _get_bulk_response(
+        lambda _: {"result": "created", "status": 201}
+    )
+
+    assert send_audit_log_entries(es, "audit_log", chunk_size=2) == 5
+
+    assert es.bulk.call_count == 3
+    sent_ids = [
+        action["create"]["_id"]
+        for call in es.bulk.call_args_list
+        for action in call.kwargs["body"][::2]
+    ]
+    assert sent_ids == entry_ids
+    document = es.bulk.call_args_list[0].kwargs["body"][1]
+    assert document["@timestamp"] == document["audit_event"]["date_time"]
+    assert not AuditLogEntry.objects.filter(is_sent=False).exists()
+    # nothing left to send
+    assert send_audit_log_entries(es, "audit_log") == 0
+    assert es.bulk.call_count == 3
+
+
+@pytest.mark.django_db
+@mock.patch("shared.audit_log.tasks.time.sleep")
+def test_send_audit_log_entries_retry(sleep_mock):
+    first_id, rejected_id, conflict_id, retried_id = _create_entries(4)
+    attempts = collections.Counter()
+
+    def get_item_result(entry_id):
+        attempts[entry_id] += 1
+        if entry_id == rejected_id:
+            return {"status": 400, "error": {"type": "mapper_parsing_exception"}}
+        if entry_id == conflict_id:
+            # already sent
+            return {
+                "status": 409,
+                "error": {"type": "version_conflict_engine_exception"},
+            }
+        if entry_id == retried_id and attempts[entry_id] < 3:
+            return {"status": 429, "error": {"type": "es_rejected_execution_exception"}}
+        return {"result": "created", "status": 201}
+
+    es = mock.Mock()
+    es.bulk.side_effect = _get_bulk_response(get_item_result)
+
+    assert send_audit_log_entries(es, "audit_log") == 3
+
+    assert attempts == {first_id: 1, rejected_id: 1, conflict_id: 1, retried_id: 3}
+    assert [call.args[0] for call in sleep_mock.call_args_list] == [1, 2]
+    assert list(
+        AuditLogEntry.objects.filter(is_sent=False).values_list("id", flat=True)
+    ) == [rejected_id]
+    assert list(
+        AuditLogEntry.objects.filter(send_failed_at__isnull=False).values_list(
+            "id", flat=True
+        )
+    ) == [rejected_id]
+
+
+@pytest.mark.django_db
+def test_send_audit_log_entries_rejected_not_resent():
+    rejected_id, sent_id = _create_entries(2)
+    es = mock.Mock()
+    es.bulk.side_effect = _get_bulk_response(
+        lambda entry_id: {"status": 400, "error": {"type": "mapper_parsing_exception"}}
+        if entry_id == rejected_id
+        else {"result": "created", "status": 201}
+    )
+    assert send_audit_log_entries(es, "audit_log") == 1
+
+    new_id = _create_entries(1)[-1]
+    es.bulk.reset_mock()
+    assert send_audit_log_entries(es, "audit_log") == 1
+
+    assert es.bulk.call_count == 1
+    assert [
+        action["create"]["_id"] for action in es.bulk.call_args.kwargs["body"][::2]
+    ] == [new_id]
+    rejected = AuditLogEntry.objects.get(id=rejected_id)
+    assert rejected.is_sent is False
+    assert rejected.send_failed_at is not None
+
+
+@pytest.mark.django_db
+@mock.patch("shared.audit_log.tasks.time.sleep")
+def test_send_audit_log_entries_connection_error(sleep_mock):
+    _create_entries(3)
+    es = mock.Mock()
+    es.bulk.side_effect = ConnectionError("N/A", "Connection refused", OSError())
+
+    with pytest.raises(ConnectionError):
+        send_audit_log_entries(es, "audit_log", chunk_size=2)
+
+    # the first chunk is retried and the rest are not tried
+    assert es.bulk.call_count == 4
+    assert AuditLogEntry.objects.filter(is_sent=False).count() == 3
+
+
+class _ElasticsearchStandIn(BaseHTTPRequestHandler):
+    """
+    A local HTTP server that answers like Elasticsearch to the requests of the client, and
+    counts the bulk requests.
+    """
+
+    bulk_request_count = 0
+
+    def _respond(self, body: dict):
+        content = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.send_header("X-Elastic-Product", "Elasticsearch")
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_GET(self):
+        self._respond(
+            {
+                "version": {"number": "7.17.0", "build_flavor": "default"},
+                "tagline": "You Know, for Search",
+            }
+        )
+
+    def do_POST(self):
+        type(self).bulk_request_count += 1
+        lines = self.rfile.read(int(self.headers["Content-Length"])).splitlines()
+        actions = [json.loads(line) for line in lines[::2]]
+        self._respond(
+            {
+                "errors": False,
+                "items": [
+                    {
+                        "create": {
+                            "_id": action["create"]["_id"],
+                            "result": "created",
+                            "status": 201,
+                        }
+                    }
+                    for action in actions
+                ],
+            }
+        )
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def elasticsearch_stand_in():
+    _ElasticsearchStandIn.bulk_request_count = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _ElasticsearchStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield Elasticsearch([{"host": "127.0.0.1", "port": server.server_port}])
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.django_db
+def test_send_audit_log_entries_with_client(elasticsearch_stand_in):
+    entry_count = 2 * BULK_CHUNK_SIZE + 1
+    AuditLogEntry.objects.bulk_create(
+        AuditLogEntry(message=copy.deepcopy(_common_fields)) for _ in range(entry_count)
+    )
+
+    assert send_audit_log_entries(elasticsearch_stand_in, "audit_log") == entry_count
+
+    # one bulk request per chunk
+    assert _ElasticsearchStandIn.bulk_request_count == 3
+    assert not AuditLogEntry.objects.filter(is_sent=False).exists()
+
+
 @pytest.mark.django_db
 @override_settings(CLEAR_AUDIT_LOG_ENTRIES=True)
 def test_clear_audit_log(user, fixed_datetime):
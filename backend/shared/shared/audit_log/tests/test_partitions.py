@@ -0,0 +1,147 @@
+from datetime import date, datetime, timezone
+from typing import Optional
+
+import pytest
+from django.db import connection
+
+from shared.audit_log import partitions
+from shared.audit_log.enums import Operation
+from shared.audit_log.models import AuditLogEntry
+from shared.audit_log.tasks import clear_audit_log_entries
+
+
+def _create_entry(
+    created_at: datetime,
+    is_sent: bool = True,
+    send_failed_at: Optional[datetime] = None,
+) -> AuditLogEntry:
+    entry = AuditLogEntry.objects.create(
+        message={"audit_event": {"operation": Operation.READ.value}}
+    )
+    AuditLogEntry.objects.filter(id=entry.id).update(
+        created_at=created_at, is_sent=is_sent, send_failed_at=send_failed_at
+    )
+    return entry
+
+
+def _get_partition(entry: AuditLogEntry) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT tableoid::regclass::text FROM audit_log_auditlogentry WHERE id = %s",
+            [entry.id],
+        )
+        return cursor.fetchone()[0]
+
+
+def _get_partition_months() -> list:
+    return [month for month, _ in partitions.get_month_partitions()]
+
+
+@pytest.mark.django_db
+def test_audit_log_table_is_partitioned():
+    assert partitions.is_partitioned()
+    entry = _create_entry(datetime(2020, 5, 15, tzinfo=timezone.utc))
+    # no partition for the month
+    assert _get_partition(entry) == partitions.DEFAULT_PARTITION_NAME
+
+    assert partitions.create_partition(date(2020, 5, 1))
+    assert not partitions.create_partition(date(2020, 5, 1))
+
+    assert _get_partition(entry) == "audit_log_auditlogentry_p2020_05"
+    assert AuditLogEntry.objects.filter(id=entry.id).exists()
+
+
+@pytest.mark.django_db
+def test_create_partitions():
+    now = datetime(2030, 11, 20, tzinfo=timezone.utc)
+
+    assert partitions.create_partitions(now=now) == [
+        "audit_log_auditlogentry_p2030_11",
+        "audit_log_auditlogentry_p2030_12",
+        "audit_log_auditlogentry_p2031_01",
+    ]
+    assert partitions.create_partitions(now=now) == []
+
+    entry = _create_entry(datetime(2031, 1, 31, 23, 59, tzinfo=timezone.utc))
+    assert _get_partition(entry) == "audit_log_auditlogentry_p2031_01"
+
+
+@pytest.mark.django_db
+def test_clear_audit_log_drops_partitions():
+    for month in [date(2020, 3, 1), date(2020, 4, 1), date(2020, 5, 1)]:
+        partitions.create_partition(month)
+    expired_sent = [
+        _create_entry(datetime(2020, 3, day, tzinfo=timezone.utc)) for day in (1, 31)
+    ]
+    expired_unsent = _create_entry(
+        datetime(2020, 4, 10, tzinfo=timezone.utc), is_sent=False
+    )
+    expired_sent_with_unsent = _create_entry(datetime(2020, 4, 11, tzinfo=timezone.utc))
+    # the partition is not expired as a whole
+    partially_expired = _create_entry(datetime(2020, 5, 1, tzinfo=timezone.utc))
+
+    deleted_count = partitions.drop_expired_partitions(
+        datetime(2020, 5, 20, tzinfo=timezone.utc)
+    )
+
+    # the sent entry of the partition with an unsent entry is deleted
+    assert deleted_count == len(expired_sent) + 1
+    assert AuditLogEntry.objects.filter(id=expired_sent_with_unsent.id).count() == 0
+    assert date(2020, 3, 1) not in _get_partition_months()
+    assert {date(2020, 4, 1), date(2020, 5, 1)} <= set(_get_partition_months())
+    assert set(AuditLogEntry.objects.values_list("id", flat=True)) == {
+        expired_unsent.id,
+        partially_expired.id,
+    }
+
+
+@pytest.mark.django_db
+def test_clear_audit_log_entries_of_partition_with_unsent_entry():
+    partitions.create_partition(date(2020, 3, 1))
+    for day in range(1, 11):
+        _create_entry(datetime(2020, 3, day, tzinfo=timezone.utc))
+    # e.g. an entry that couldn't be sent because Elasticsearch was unavailable
+    unsent = _create_entry(datetime(2020, 3, 15, tzinfo=timezone.utc), is_sent=False)
+
+    assert clear_audit_log_entries() == 10
+    assert list(AuditLogEntry.objects.values_list("id", flat=True)) == [unsent.id]
+    assert date(2020, 3, 1) in _get_partition_months()
+
+
+@pytest.mark.django_db
+def test_clear_audit_log_entries_of_partition_with_rejected_entry():
+    partitions.create_partition(date(2020, 3, 1))
+    for day in range(1, 11):
+        _create_entry(datetime(2020, 3, day, tzinfo=timezone.utc))
+    rejected = _create_entry(
+        datetime(2020, 3, 15, tzinfo=timezone.utc),
+        is_sent=False,
+        send_failed_at=datetime(2020, 3, 15, tzinfo=timezone.utc),
+    )
+
+    assert clear_audit_log_entries() == 10
+    # the partition is dropped, but the entry rejected by Elasticsearch is kept
+    assert date(2020, 3, 1) not in _get_partition_months()
+    assert list(AuditLogEntry.objects.values_list("id", flat=True)) == [rejected.id]
+    assert _get_partition(rejected) == partitions.DEFAULT_PARTITION_NAME
+    assert AuditLogEntry.objects.get(id=rejected.id).send_failed_at is not None
+
+    # and it's not deleted from the default partition either
+    assert clear_audit_log_entries() == 0
+    assert AuditLogEntry.objects.filter(id=rejected.id).exists()
+
+
+@pytest.mark.django_db
+def test_clear_audit_log_entries_with_partitions():
+    partitions.create_partition(date(2020, 3, 1))
+    _create_entry(datetime(2020, 3, 1, tzinfo=timezone.utc))
+    # in the default partition
+    _create_entry(datetime(2020, 1, 1, tzinfo=timezone.utc))
+    unsent = _create_entry(datetime(2020, 1, 1, tzinfo=timezone.utc), is_sent=False)
+    new = AuditLogEntry.objects.create(message={})
+
+    assert clear_audit_log_entries() == 2
+    assert set(AuditLogEntry.objects.values_list("id", flat=True)) == {
+        unsent.id,
+        new.id,
+    }
@@ -71,7 +71,15 @@ class AuditLoggingModelViewSet(ModelViewSet):
 
     @transaction.atomic
     def perform_update(self, serializer):
-        with self.record_action():
+        instance = serializer.instance
+        if not isinstance(instance, Model):
+            # e.g. the list serializers
+            instance = None
+        # the changes are compared to the instance as it was loaded, not to its history
+        original_values = (
+            audit_logging.get_tracked_values(instance) if instance else None
+        )
+        with self.record_action(target=instance, original_values=original_values):
             super().perform_update(serializer)
 
     @transaction.atomic
@@ -82,27 +90,40 @@ class AuditLoggingModelViewSet(ModelViewSet):
 
     @contextmanager
     def record_action(
-        self, target: Optional[Model] = None, additional_information: str = ""
+        self,
+        target: Optional[Model] = None,
+        additional_information: str = "",
+        original_values: Optional[dict] = None,
     ):
         """
         This context manager will run the managed code in a transaction and writes
         a new audit log entry in the same transaction. If an exception is raised,
         the transaction will be rolled back. If the user has no permission to perform
         the given action, a "FORBIDDEN" audit log event will be recorded.
+
+        With AUDIT_LOG_BUFFERED, the events logged in the transaction are written
+        with a single bulk insert before the transaction is committed.
+
+        If the original values of the target are given, the changes are logged by
+        comparing them to the target instead of its history.
         """
         actor = copy(self._get_actor())  # May be destroyed if actor is also the target
         actor_backend = self._get_actor_backend()
         operation = self._get_operation()
         try:
-            with transaction.atomic():
+            with transaction.atomic(), audit_logging.buffered():
                 yield
+                log_target = target or self._get_target()
                 audit_logging.log(
                     actor,
                     actor_backend,
                     operation,
-                    target or self._get_target(),
+                    log_target,
                     ip_address=self._get_ip_address(),
                     additional_information=additional_information,
+                    changes=audit_logging.get_changes(original_values, log_target)
+                    if original_values is not None
+                    else None,
                 )
         except (NotAuthenticated, PermissionDenied):
             audit_logging.log(
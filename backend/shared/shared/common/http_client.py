@@ -0,0 +1,221 @@
+import logging
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+LOGGER = logging.getLogger(__name__)
+
+# Upper bounds of the latency histogram buckets in seconds, the last bucket is unbounded
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+IDEMPOTENT_METHODS = frozenset(["GET", "HEAD", "OPTIONS", "PUT", "DELETE"])
+RETRY_STATUS_CODES = frozenset([429, 502, 503, 504])
+
+
+class LatencyHistogram:
+    """Counts of the request durations of an integration in the LATENCY_BUCKETS."""
+
+    def __init__(self):
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.errors = 0
+        self.retries = 0
+
+    def observe(self, seconds: float, error: bool = False):
+        self.bucket_counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if error:
+            self.errors += 1
+
+    def as_dict(self) -> dict:
+        """
+        The counts of the buckets are keyed by their upper bound, e.g.
+        {"buckets": {"0.05": 3, "0.1": 1, ..., "+Inf": 0}, "count": 4, ...}
+        """
+        bounds = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        return {
+            "buckets": dict(zip(bounds, self.bucket_counts)),
+            "count": self.count,
+            "sum": self.sum,
+            "errors": self.errors,
+            "retries": self.retries,
+        }
+
+
+def _get_timeout(
+    timeout: Optional[float], deadline: Optional[float]
+) -> Optional[float]:
+    if deadline is None:
+        return timeout
+    time_left = deadline - time.monotonic()
+    if time_left <= 0:
+        raise requests.Timeout("The deadline of the request has passed")
+    return time_left if timeout is None else min(timeout, time_left)
+
+
+class HttpClient:
+    """
+    Base class for the clients of the external integrations.
+
+    The requests of an integration are sent with a requests.Session that is shared by the
+    threads of the process, so the connections are kept alive and reused instead of opening
+    a new TCP and TLS connection for each request. At most pool_maxsize connections per host
+    are kept open. The session doesn't store cookies, because it's shared between the users.
+
+    A request without a timeout gets the timeout of the client. An idempotent request is
+    retried at most max_retries times after a connection error, including a connect timeout,
+    or a response with a status in RETRY_STATUS_CODES. Before the first retry it waits a
+    random time of up to retry_backoff seconds, and the maximum is doubled for each retry
+    after it. The requests with other methods than IDEMPOTENT_METHODS, like the read-only
+    queries sent with POST, can be marked idempotent with idempotent=True.
+
+    A request can be given a deadline as a time.monotonic() value. The timeout of each attempt
+    is then bounded by the time left, and the request isn't retried if the wait before the
+    retry would reach the deadline.
+
+    The latency histograms of the requests of each integration in the process are available
+    with get_latency_histograms().
+    """
+
+    integration = "default"
+    pool_maxsize = 10
+    max_retries = 2
+    retry_backoff = 0.5
+    default_timeout = 10
+
+    _sessions: Dict[str, requests.Session] = {}
+    _sessions_pid: Optional[int] = None
+    _sessions_lock = threading.Lock()
+
+    _histograms: Dict[str, LatencyHistogram] = {}
+    _histograms_lock = threading.Lock()
+
+    @property
+    def timeout(self) -> float:
+        return self.default_timeout
+
+    @property
+    def session(self) -> requests.Session:
+        with HttpClient._sessions_lock:
+            if HttpClient._sessions_pid != os.getpid():
+                # The connections can't be shared with the parent of a forked process
+                HttpClient._sessions = {}
+                HttpClient._sessions_pid = os.getpid()
+            session = HttpClient._sessions.get(self.integration)
+            if session is None:
+                session = HttpClient._sessions[self.integration] = self.create_session()
+        return session
+
+    def create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        adapter = HTTPAdapter(pool_maxsize=self.pool_maxsize)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        idempotent: Optional[bool] = None,
+        deadline: Optional[float] = None,
+        **kwargs,
+    ) -> requests.Response:
+        method = method.upper()
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        timeout = kwargs.pop("timeout", self.timeout)
+        retries = self.max_retries if idempotent else 0
+
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                response = self.session.request(
+                    method, url, timeout=_get_timeout(timeout, deadline), **kwargs
+                )
+            except requests.RequestException as e:
+                self._observe(time.perf_counter() - start, error=True)
+                # a read timeout isn't retried, so the timeout bounds the waiting time
+                if (
+                    attempt == retries
+                    or not isinstance(e, requests.ConnectionError)
+                    or (delay := self._get_retry_delay(attempt, deadline)) is None
+                ):
+                    raise
+                LOGGER.warning(f"{self.integration} request failed, retrying: {e}")
+            else:
+                self._observe(
+                    time.perf_counter() - start, error=response.status_code >= 500
+                )
+                if (
+                    attempt == retries
+                    or response.status_code not in RETRY_STATUS_CODES
+                    or (delay := self._get_retry_delay(attempt, deadline)) is None
+                ):
+                    return response
+                LOGGER.warning(
+                    f"{self.integration} request failed with status"
+                    f" {response.status_code}, retrying"
+                )
+            self._count_retry()
+            time.sleep(delay)
+
+    def _get_retry_delay(
+        self, attempt: int, deadline: Optional[float]
+    ) -> Optional[float]:
+        """
+        Return a random wait time before retrying the failed attempt, or None if the request
+        can't be retried before the deadline.
+        """
+        delay = random.uniform(0, self.retry_backoff * 2**attempt)
+        if deadline is not None and time.monotonic() + delay >= deadline:
+            return None
+        return delay
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request("DELETE", url, **kwargs)
+
+    def _get_histogram(self) -> LatencyHistogram:
+        histogram = HttpClient._histograms.get(self.integration)
+        if histogram is None:
+            histogram = HttpClient._histograms[self.integration] = LatencyHistogram()
+        return histogram
+
+    def _observe(self, seconds: float, error: bool):
+        with HttpClient._histograms_lock:
+            self._get_histogram().observe(seconds, error)
+
+    def _count_retry(self):
+        with HttpClient._histograms_lock:
+            self._get_histogram().retries += 1
+
+    @staticmethod
+    def get_latency_histograms() -> Dict[str, dict]:
+        with HttpClient._histograms_lock:
+            return {
+                integration: histogram.as_dict()
+                for integration, histogram in HttpClient._histograms.items()
+            }
+
+    @staticmethod
+    def reset_latency_histograms():
+        with HttpClient._histograms_lock:
+            HttpClient._histograms = {}
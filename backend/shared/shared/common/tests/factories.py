@@ -15,8 +15,9 @@ class UserFactory(factory.django.DjangoModelFactory):
     username_suffix = factory.Faker(
         "password", length=6, special_chars=False, upper_case=False
     )
-    username = factory.LazyAttribute(
-        lambda p: "{}_{}".format(p.username_base, p.username_suffix)
+    # the sequence keeps the username unique also when the random generator is reseeded
+    username = factory.LazyAttributeSequence(
+        lambda p, n: "{}_{}_{}".format(p.username_base, p.username_suffix, n)
     )
 
     class Meta:
@@ -0,0 +1,247 @@
+from unittest import mock
+
+import pytest
+import requests
+
+from shared.common.http_client import HttpClient, LatencyHistogram
+
+URL = "https://integration.example.com/api"
+
+
+class ExampleClient(HttpClient):
+    integration = "example"
+    pool_maxsize = 3
+    default_timeout = 5
+
+
+class OtherClient(HttpClient):
+    integration = "other"
+
+
+@pytest.fixture(autouse=True)
+def reset_latency_histograms():
+    HttpClient.reset_latency_histograms()
+    yield
+    HttpClient.reset_latency_histograms()
+
+
+@pytest.fixture
+def sleep():
+    with mock.patch("shared.common.http_client.time.sleep") as sleep_mock:
+        yield sleep_mock
+
+
+def test_session_is_shared_by_integration():
+    session = ExampleClient().session
+
+    assert ExampleClient().session is session
+    assert OtherClient().session is not session
+    assert session.get_adapter(URL)._pool_maxsize == 3
+
+    with mock.patch("shared.common.http_client.os.getpid", return_value=-1):
+        assert ExampleClient().session is not session
+
+
+def test_session_does_not_store_cookies(requests_mock):
+    requests_mock.get(URL, headers={"Set-Cookie": "session=secret; Path=/"})
+    client = ExampleClient()
+
+    client.get(URL)
+    client.get(URL)
+
+    assert len(client.session.cookies) == 0
+    assert "Cookie" not in requests_mock.last_request.headers
+
+
+def test_request_timeout(requests_mock):
+    requests_mock.get(URL)
+
+    ExampleClient().get(URL)
+    assert requests_mock.last_request.timeout == 5
+
+    ExampleClient().get(URL, timeout=1)
+    assert requests_mock.last_request.timeout == 1
+
+
+@pytest.mark.parametrize(
+    "method,idempotent", [("get", None), ("put", None), ("post", True)]
+)
+def test_idempotent_request_is_retried(requests_mock, sleep, method, idempotent):
+    requests_mock.register_uri(
+        method.upper(),
+        URL,
+        [
+            {"exc": requests.ConnectionError},
+            {"status_code": 503},
+            {"json": {"ok": True}},
+        ],
+    )
+
+    response = getattr(ExampleClient(), method)(URL, idempotent=idempotent)
+
+    assert response.json() == {"ok": True}
+    assert requests_mock.call_count == 3
+    assert sleep.call_count == 2
+    (first_delay,), _ = sleep.call_args_list[0]
+    (second_delay,), _ = sleep.call_args_list[1]
+    assert 0 <= first_delay <= 0.5
+    assert 0 <= second_delay <= 1
+    histogram = HttpClient.get_latency_histograms()["example"]
+    assert histogram["count"] == 3
+    assert histogram["errors"] == 2
+    assert histogram["retries"] == 2
+
+
+def test_retries_are_bounded(requests_mock, sleep):
+    requests_mock.get(URL, status_code=503)
+
+    response = ExampleClient().get(URL)
+
+    assert response.status_code == 503
+    assert requests_mock.call_count == 1 + ExampleClient.max_retries
+
+
+@pytest.mark.parametrize(
+    "method,idempotent", [("post", None), ("get", False), ("delete", False)]
+)
+def test_non_idempotent_request_is_not_retried(
+    requests_mock, sleep, method, idempotent
+):
+    requests_mock.register_uri(method.upper(), URL, status_code=503)
+
+    response = getattr(ExampleClient(), method)(URL, idempotent=idempotent)
+
+    assert response.status_code == 503
+    assert requests_mock.call_count == 1
+    sleep.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error", [requests.ReadTimeout, requests.HTTPError, requests.TooManyRedirects]
+)
+def test_request_error_is_not_retried(requests_mock, sleep, error):
+    requests_mock.get(URL, exc=error)
+
+    with pytest.raises(error):
+        ExampleClient().get(URL)
+
+    assert requests_mock.call_count == 1
+    assert HttpClient.get_latency_histograms()["example"]["errors"] == 1
+
+
+def test_connection_error_is_raised_after_retries(requests_mock, sleep):
+    requests_mock.get(URL, exc=requests.ConnectionError)
+
+    with pytest.raises(requests.ConnectionError):
+        ExampleClient().get(URL)
+
+    assert requests_mock.call_count == 1 + ExampleClient.max_retries
+
+
+@pytest.fixture
+def monotonic():
+    with mock.patch(
+        "shared.common.http_client.time.monotonic", return_value=100.0
+    ) as monotonic_mock:
+        yield monotonic_mock
+
+
+def test_request_timeout_is_bounded_by_deadline(requests_mock, monotonic):
+    requests_mock.get(URL)
+
+    ExampleClient().get(URL, deadline=101.5)
+    assert requests_mock.last_request.timeout == 1.5
+
+    ExampleClient().get(URL, deadline=110)
+    assert requests_mock.last_request.timeout == 5
+
+
+@pytest.fixture
+def max_retry_delay():
+    # the wait before the retry reaches the deadline
+    with mock.patch("shared.common.http_client.random.uniform", side_effect=max):
+        yield
+
+
+def test_request_is_not_retried_after_deadline(
+    requests_mock, sleep, monotonic, max_retry_delay
+):
+    requests_mock.get(URL, status_code=503)
+
+    response = ExampleClient().get(URL, deadline=100.25)
+
+    assert response.status_code == 503
+    assert requests_mock.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_connection_error_is_not_retried_after_deadline(
+    requests_mock, sleep, monotonic, max_retry_delay
+):
+    requests_mock.get(URL, exc=requests.ConnectionError)
+
+    with pytest.raises(requests.ConnectionError):
+        ExampleClient().get(URL, deadline=100.25)
+
+    assert requests_mock.call_count == 1
+    sleep.assert_not_called()
+
+
+def test_request_is_retried_before_deadline(
+    requests_mock, sleep, monotonic, max_retry_delay
+):
+    requests_mock.get(URL, [{"status_code": 503}, {"json": {"ok": True}}])
+
+    response = ExampleClient().get(URL, deadline=101)
+
+    assert response.json() == {"ok": True}
+    sleep.assert_called_once_with(0.5)
+
+
+def test_request_after_deadline(requests_mock, monotonic):
+    requests_mock.get(URL)
+
+    with pytest.raises(requests.Timeout):
+        ExampleClient().get(URL, deadline=99)
+
+    assert requests_mock.call_count == 0
+
+
+def test_latency_histograms_by_integration(requests_mock):
+    requests_mock.get(URL)
+
+    ExampleClient().get(URL)
+    OtherClient().get(URL)
+    OtherClient().get(URL)
+
+    histograms = HttpClient.get_latency_histograms()
+    assert histograms["example"]["count"] == 1
+    assert histograms["other"]["count"] == 2
+    assert sum(histograms["other"]["buckets"].values()) == 2
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram()
+
+    for seconds in [0.01, 0.05, 0.3, 60]:
+        histogram.observe(seconds)
+    histogram.observe(2, error=True)
+
+    assert histogram.as_dict() == {
+        "buckets": {
+            "0.05": 2,
+            "0.1": 0,
+            "0.25": 0,
+            "0.5": 1,
+            "1": 0,
+            "2.5": 1,
+            "5": 0,
+            "10": 0,
+            "30": 0,
+            "+Inf": 1,
+        },
+        "count": 5,
+        "sum": pytest.approx(62.36),
+        "errors": 1,
+        "retries": 0,
+    }
@@ -1,11 +1,11 @@
-import requests
 from django.conf import settings
 from requests import RequestException
 
+from shared.common.http_client import HttpClient
 from shared.helsinki_profile.exceptions import HelsinkiProfileException
 
 
-class HelsinkiProfileClient:
+class HelsinkiProfileClient(HttpClient):
     """
     Client for reading data from the Helsinki Profile GraphQL API
 
@@ -15,6 +15,8 @@ class HelsinkiProfileClient:
     https://helsinkisolutionoffice.atlassian.net/wiki/spaces/KAN/pages/6172606574/Full+Helsinki-profile+with+citizen+profile+and+API+authorization+support+features
     """
 
+    integration = "helsinki_profile"
+
     def __init__(self):
         if not all(
             [
@@ -53,10 +55,11 @@ class HelsinkiProfileClient:
         api_access_token = self.get_api_access_token(oidc_access_token)
 
         try:
-            response = requests.post(
+            # the GraphQL query doesn't change anything, so it can be retried
+            response = self.post(
                 settings.HELSINKI_PROFILE_API_URL,
                 json=payload,
-                timeout=10,
+                idempotent=True,
                 verify=True,
                 headers={"Authorization": "Bearer " + api_access_token},
             )
@@ -85,10 +88,9 @@ class HelsinkiProfileClient:
         Exchanges OIDC access token for API access token
         """
         try:
-            response = requests.get(
+            response = self.get(
                 settings.TUNNISTAMO_API_TOKENS_ENDPOINT,
                 headers={"Authorization": f"Bearer {oidc_access_token}"},
-                timeout=10,
             )
             response.raise_for_status()
             data = response.json()
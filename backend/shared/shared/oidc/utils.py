@@ -4,12 +4,17 @@ import hmac
 from datetime import timedelta
 from uuid import uuid4
 
-import requests
 from dateutil.parser import isoparse
 from django.conf import settings
 from django.http import HttpRequest
 from django.utils import timezone
 
+from shared.common.http_client import HttpClient
+
+
+class EauthorizationsClient(HttpClient):
+    integration = "eauthorizations"
+
 
 def get_userinfo(request: HttpRequest) -> dict:
     from shared.oidc.auth import HelsinkiOIDCAuthenticationBackend
@@ -53,7 +58,7 @@ def request_organization_roles(request: HttpRequest) -> dict:
     checksum_header = get_checksum_header(path)
 
     eauth_access_token = request.session.get("eauth_access_token")
-    response = requests.get(
+    response = EauthorizationsClient().get(
         organization_roles_endpoint,
         headers={
             "Authorization": f"Bearer {eauth_access_token}",
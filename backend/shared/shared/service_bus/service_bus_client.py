@@ -3,8 +3,11 @@ from typing import Optional
 import requests
 from django.conf import settings
 
+from shared.common.http_client import HttpClient
 
-class ServiceBusClient:
+
+class ServiceBusClient(HttpClient):
+    integration = "service_bus"
     UNKNOWN_INDUSTRY = "n/a"
 
     def __init__(self):
@@ -25,6 +28,10 @@ class ServiceBusClient:
         )
         self.search_limit = settings.SERVICE_BUS_SEARCH_LIMIT or 10
 
+    @property
+    def timeout(self) -> int:
+        return settings.SERVICE_BUS_TIMEOUT
+
     def get_organisation_info_with_business_id(self, business_id: str) -> dict:
         query = {"BusinessId": business_id}
         service_bus_data = self._post(url=self.get_company_url, data=query)
@@ -35,9 +42,13 @@ class ServiceBusClient:
         except (KeyError, TypeError, requests.HTTPError):
             return {}
 
-    def search_companies(self, company_name: str) -> list:
+    def search_companies(
+        self, company_name: str, deadline: Optional[float] = None
+    ) -> list:
         query = {"SearchExpression": company_name, "FindAll": False}
-        service_bus_data = self._post(url=self.search_company_url, data=query)
+        service_bus_data = self._post(
+            url=self.search_company_url, data=query, deadline=deadline
+        )
         try:
             search_results = service_bus_data["SearchCompanyResult"]["SearchResults"][
                 "NameSearchQueryResult"
@@ -50,12 +61,14 @@ class ServiceBusClient:
             return self._format_search_results(search_results)
         return []
 
-    def _post(self, url: str, data: dict) -> dict:
-        response = requests.post(
+    def _post(self, url: str, data: dict, deadline: Optional[float] = None) -> dict:
+        # the queries don't change anything, so they can be retried
+        response = self.post(
             url,
             auth=self.credentials,
-            timeout=settings.SERVICE_BUS_TIMEOUT,
             json=data,
+            idempotent=True,
+            deadline=deadline,
         )
         response.raise_for_status()
         return response.json()
@@ -0,0 +1,65 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from django.core.cache import cache
+
+from shared.common.tests.conftest import *  # noqa
+from shared.vtj.vtj_client import VTJClient
+
+
+class VtjStub:
+    """
+    Local stand-in for the VTJ personal info query. The responses are held until release
+    is set, and answered with the given status.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.status = 200
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        body = json.loads(handler.rfile.read(int(handler.headers["Content-Length"])))
+        with self._lock:
+            self.requests.append(body)
+        self.release.wait(timeout=10)
+        content = json.dumps(
+            {"Henkilo": {"Henkilotunnus": {"#text": body["Henkilotunnus"]}}}
+        ).encode()
+        handler.send_response(self.status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
+
+
+@pytest.fixture
+def vtj_stub(settings):
+    stub = VtjStub()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            stub.handle(self)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    settings.VTJ_PERSONAL_ID_QUERY_URL = f"http://127.0.0.1:{server.server_port}/"
+    settings.VTJ_USERNAME = "vtj_user"
+    settings.VTJ_PASSWORD = "vtj_password"
+    settings.VTJ_TIMEOUT = 10
+    settings.VTJ_CACHE_TIMEOUT = 0
+    cache.clear()
+    VTJClient.reset_stats()
+    yield stub
+    stub.release.set()
+    server.shutdown()
+    server.server_close()
+    cache.clear()
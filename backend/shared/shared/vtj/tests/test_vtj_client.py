@@ -0,0 +1,123 @@
+import threading
+import time
+
+import pytest
+import requests
+from django.core.cache import cache
+
+from shared.vtj.vtj_client import VTJClient
+
+SOCIAL_SECURITY_NUMBER = "010203-1230"
+
+
+def test_get_personal_info_without_cache(vtj_stub):
+    client = VTJClient()
+
+    for _ in range(2):
+        assert client.get_personal_info(SOCIAL_SECURITY_NUMBER, "handler") == {
+            "Henkilo": {"Henkilotunnus": {"#text": SOCIAL_SECURITY_NUMBER}}
+        }
+
+    assert vtj_stub.requests == 2 * [
+        {
+            "Henkilotunnus": SOCIAL_SECURITY_NUMBER,
+            "SoSoNimi": "PERUSSANOMA 1",
+            "Loppukayttaja": "handler",
+        }
+    ]
+    assert VTJClient.get_stats() == {"hits": 0, "misses": 2, "coalesced": 0}
+
+
+def test_get_personal_info_with_cache(vtj_stub, settings):
+    settings.VTJ_CACHE_TIMEOUT = 60
+    client = VTJClient()
+
+    personal_info = client.get_personal_info(SOCIAL_SECURITY_NUMBER, "handler")
+    personal_info["Henkilo"] = {}
+    assert client.get_personal_info(SOCIAL_SECURITY_NUMBER, "handler") == {
+        "Henkilo": {"Henkilotunnus": {"#text": SOCIAL_SECURITY_NUMBER}}
+    }
+    assert len(vtj_stub.requests) == 1
+    assert VTJClient.get_stats() == {"hits": 1, "misses": 1, "coalesced": 0}
+
+    # VTJ logs the end user of each query, so the responses aren't shared between users
+    client.get_personal_info(SOCIAL_SECURITY_NUMBER, "other handler")
+    assert [request["Loppukayttaja"] for request in vtj_stub.requests] == [
+        "handler",
+        "other handler",
+    ]
+
+    cache_key = VTJClient.get_cache_key(SOCIAL_SECURITY_NUMBER, "handler")
+    assert SOCIAL_SECURITY_NUMBER not in cache_key
+    assert SOCIAL_SECURITY_NUMBER.encode() not in cache.get(cache_key)
+
+
+def test_get_personal_info_with_cache_encrypted_with_old_key(vtj_stub, settings):
+    settings.VTJ_CACHE_TIMEOUT = 60
+    VTJClient().get_personal_info(SOCIAL_SECURITY_NUMBER, "handler")
+    settings.FIELD_ENCRYPTION_KEYS = [32 * "ab"]
+
+    VTJClient().get_personal_info(SOCIAL_SECURITY_NUMBER, "handler")
+
+    assert len(vtj_stub.requests) == 2
+    assert VTJClient.get_stats() == {"hits": 0, "misses": 2, "coalesced": 0}
+
+
+def _get_personal_info_concurrently(count: int, vtj_stub) -> list:
+    vtj_stub.release.clear()
+    results = [None] * count
+
+    def get_personal_info(index):
+        try:
+            results[index] = VTJClient().get_personal_info(
+                SOCIAL_SECURITY_NUMBER, "handler"
+            )
+        except Exception as e:
+            results[index] = e
+
+    threads = [
+        threading.Thread(target=get_personal_info, args=(index,))
+        for index in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 10
+    while VTJClient.get_stats()["coalesced"] < count - 1:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    vtj_stub.release.set()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_get_personal_info_concurrent_lookups_share_query(vtj_stub):
+    results = _get_personal_info_concurrently(5, vtj_stub)
+
+    assert len(vtj_stub.requests) == 1
+    assert results == 5 * [
+        {"Henkilo": {"Henkilotunnus": {"#text": SOCIAL_SECURITY_NUMBER}}}
+    ]
+    assert len({id(result) for result in results}) == 5
+    assert VTJClient.get_stats() == {"hits": 0, "misses": 1, "coalesced": 4}
+
+
+def test_get_personal_info_concurrent_lookups_share_error(vtj_stub, settings):
+    settings.VTJ_CACHE_TIMEOUT = 60
+    vtj_stub.status = 500
+
+    results = _get_personal_info_concurrently(3, vtj_stub)
+
+    assert len(vtj_stub.requests) == 1
+    assert all(isinstance(result, requests.HTTPError) for result in results)
+
+    vtj_stub.status = 200
+    VTJClient().get_personal_info(SOCIAL_SECURITY_NUMBER, "handler")
+    assert len(vtj_stub.requests) == 2
+
+
+def test_vtj_client_not_configured(settings):
+    settings.VTJ_PERSONAL_ID_QUERY_URL = ""
+
+    with pytest.raises(ValueError):
+        VTJClient()
@@ -1,20 +1,58 @@
+import copy
+import json
+import threading
 import uuid
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
-import requests
 from django.conf import settings
+from django.core.cache import cache
 from django.http import HttpRequest
+from django.utils.crypto import salted_hmac
 
+from shared.common.http_client import HttpClient
 
-class VTJClient:
+VTJ_CACHE_KEY_PREFIX = "vtj_personal_info"
+
+
+class _InFlightLookup:
+    """A VTJ query in progress, shared by the concurrent lookups of the same person."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[dict] = None
+        self.error: Optional[Exception] = None
+
+
+class VTJClient(HttpClient):
     """
     Client for VTJ / Väestötietojärjestelmä i.e. Finnish Population Information System.
 
     https://dvv.fi/en/population-information-system
+
+    The responses are cached for VTJ_CACHE_TIMEOUT seconds, if it's set. The cache key is a
+    keyed hash of the social security number and the end user, because VTJ logs the end user
+    of every query, so a response is only reused for the same end user. The cached responses
+    are encrypted with the first key of FIELD_ENCRYPTION_KEYS, like the VTJ data stored in
+    the database.
+
+    Concurrent lookups of the same person in the process share one VTJ query. The hit, miss
+    and coalesced lookup counts of the process are available with get_stats().
     """
 
+    integration = "vtj"
+    # the lookups are made by the handlers and the youth applying
+    pool_maxsize = 20
+
+    _in_flight: Dict[str, _InFlightLookup] = {}
+    _in_flight_lock = threading.Lock()
+
+    _stats_lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _coalesced = 0
+
     def __init__(self):
-        if not all([*self._auth, self._timeout, self._url]):
+        if not all([*self._auth, self.timeout, self._url]):
             raise ValueError("VTJ client settings not configured.")
 
     @staticmethod
@@ -53,18 +91,115 @@ class VTJClient:
         return settings.VTJ_PERSONAL_ID_QUERY_URL
 
     @property
-    def _timeout(self) -> int:
+    def timeout(self) -> int:
         return settings.VTJ_TIMEOUT
 
+    @property
+    def _cache_timeout(self) -> int:
+        return getattr(settings, "VTJ_CACHE_TIMEOUT", 0)
+
+    @staticmethod
+    def get_cache_key(social_security_number, end_user: str) -> str:
+        digest = salted_hmac(
+            VTJ_CACHE_KEY_PREFIX,
+            f"{end_user}:{social_security_number}",
+            algorithm="sha256",
+        ).hexdigest()
+        return f"{VTJ_CACHE_KEY_PREFIX}:{digest}"
+
+    @staticmethod
+    def _get_cipher():
+        # django-searchable-encrypted-fields is only required if the cache is used
+        from encrypted_fields.fields import EncryptedTextField
+
+        return EncryptedTextField()
+
+    def _get_cached(self, cache_key: str) -> Optional[dict]:
+        encrypted = cache.get(cache_key)
+        if encrypted is None:
+            return None
+        try:
+            return json.loads(self._get_cipher().decrypt(encrypted))
+        except ValueError:
+            # encrypted with a key that is no longer in use
+            return None
+
+    def _set_cached(self, cache_key: str, personal_info: dict):
+        cache.set(
+            cache_key,
+            self._get_cipher().encrypt(json.dumps(personal_info)),
+            timeout=self._cache_timeout,
+        )
+
     def get_personal_info(
         self, social_security_number, end_user: str, **kwargs
     ) -> dict:
-        response = requests.post(
+        """
+        Get the personal info of the person from VTJ, or from the cache if it's enabled.
+        """
+        cache_key = self.get_cache_key(social_security_number, end_user)
+        if self._cache_timeout > 0:
+            personal_info = self._get_cached(cache_key)
+            if personal_info is not None:
+                self._count("_hits")
+                return personal_info
+
+        with self._in_flight_lock:
+            lookup = self._in_flight.get(cache_key)
+            is_leader = lookup is None
+            if is_leader:
+                lookup = self._in_flight[cache_key] = _InFlightLookup()
+
+        if not is_leader:
+            self._count("_coalesced")
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return copy.deepcopy(lookup.result)
+
+        self._count("_misses")
+        try:
+            lookup.result = self._query(social_security_number, end_user, **kwargs)
+            if self._cache_timeout > 0:
+                self._set_cached(cache_key, lookup.result)
+            return copy.deepcopy(lookup.result)
+        except Exception as e:
+            lookup.error = e
+            raise
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[cache_key]
+            lookup.done.set()
+
+    def _query(self, social_security_number, end_user: str, **kwargs) -> dict:
+        # the query doesn't change anything, so it can be retried
+        response = self.post(
             self._url,
             auth=self._auth,
             json=self._json(social_security_number, end_user),
-            timeout=self._timeout,
-            **kwargs
+            idempotent=True,
+            **kwargs,
         )
         response.raise_for_status()
         return response.json()
+
+    @classmethod
+    def _count(cls, counter: str):
+        with cls._stats_lock:
+            setattr(cls, counter, getattr(cls, counter) + 1)
+
+    @classmethod
+    def get_stats(cls) -> dict:
+        with cls._stats_lock:
+            return {
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "coalesced": cls._coalesced,
+            }
+
+    @classmethod
+    def reset_stats(cls):
+        with cls._stats_lock:
+            cls._hits = 0
+            cls._misses = 0
+            cls._coalesced = 0
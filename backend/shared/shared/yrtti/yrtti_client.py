@@ -1,6 +1,9 @@
+from typing import Optional
+
 import requests
 from django.conf import settings
 
+from shared.common.http_client import HttpClient
 from shared.service_bus.enums import YtjOrganizationCode
 
 from .enums import (
@@ -10,7 +13,8 @@ from .enums import (
 )
 
 
-class YRTTIClient:
+class YRTTIClient(HttpClient):
+    integration = "yrtti"
     target_association_status = AssociationStatusMap.REGISTERED.value
     target_association_name_status = AssociationStatusMap.REGISTERED.value
     target_association_name_type = AssociationNameTypeMap.NAME.value
@@ -31,6 +35,10 @@ class YRTTIClient:
         self.credentials = (settings.YRTTI_AUTH_USERNAME, settings.YRTTI_AUTH_PASSWORD)
         self.search_limit = settings.YRTTI_SEARCH_LIMIT or 10
 
+    @property
+    def timeout(self) -> int:
+        return settings.YRTTI_TIMEOUT
+
     def get_association_info_with_business_id(self, business_id: str) -> dict:
         query = {"BusinessId": business_id}
         yrtti_data = self._post(
@@ -44,7 +52,7 @@ class YRTTIClient:
         except (KeyError, TypeError, requests.HTTPError):
             return {}
 
-    def search_associations(self, name: str) -> list:
+    def search_associations(self, name: str, deadline: Optional[float] = None) -> list:
         query = {
             "Name": name,
             "AssociationStatus": [self.target_association_status],
@@ -54,6 +62,7 @@ class YRTTIClient:
         yrtti_data = self._post(
             self.search_association_url,
             data=query,
+            deadline=deadline,
         )
         try:
             search_results = yrtti_data["AdvancedSearchResponse"]["MatchedAssociation"]
@@ -65,12 +74,14 @@ class YRTTIClient:
             return self._format_search_results(search_results)
         return []
 
-    def _post(self, url: str, data: dict) -> dict:
-        response = requests.post(
+    def _post(self, url: str, data: dict, deadline: Optional[float] = None) -> dict:
+        # the queries don't change anything, so they can be retried
+        response = self.post(
             url,
             auth=self.credentials,
-            timeout=settings.YRTTI_TIMEOUT,
             json=data,
+            idempotent=True,
+            deadline=deadline,
         )
         response.raise_for_status()
         return response.json()
@@ -1,18 +1,25 @@
-import requests
 from django.conf import settings
 
+from shared.common.http_client import HttpClient
 
-class YTJClient:
+
+class YTJClient(HttpClient):
     """
     https://avoindata.prh.fi/
     """
 
+    integration = "ytj"
+
     def __init__(self):
         if not all([settings.YTJ_BASE_URL, settings.YTJ_TIMEOUT]):
             raise ValueError("YTJ client settings not configured.")
 
+    @property
+    def timeout(self) -> int:
+        return settings.YTJ_TIMEOUT
+
     def _get(self, url: str, **kwargs) -> dict:
-        response = requests.get(url, timeout=settings.YTJ_TIMEOUT, **kwargs)
+        response = self.get(url, **kwargs)
         response.raise_for_status()
         return response.json()
 
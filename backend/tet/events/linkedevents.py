@@ -1,17 +1,19 @@
 import logging
 from urllib.parse import urljoin
 
-import requests
 from django.conf import settings
 from requests.exceptions import ConnectionError, HTTPError, RequestException, Timeout
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from events.exceptions import LinkedEventsException
+from shared.common.http_client import HttpClient
 
 LOGGER = logging.getLogger(__name__)
 
 
-class LinkedEventsClient:
+class LinkedEventsClient(HttpClient):
+    integration = "linkedevents"
+
     def __init__(self):
         if not all(
             [
@@ -22,6 +24,10 @@ class LinkedEventsClient:
         ):
             raise ValueError("LinkedEvents client settings not configured.")
 
+    @property
+    def timeout(self) -> int:
+        return settings.LINKEDEVENTS_TIMEOUT
+
     def _headers(self):
         return {
             "content-type": "application/json",
@@ -29,9 +35,7 @@ class LinkedEventsClient:
             "apikey": settings.LINKEDEVENTS_API_KEY,
         }
 
-    def _api_call(
-        self, requests_method, resource, resource_id=None, params=None, json=None
-    ):
+    def _api_call(self, method, resource, resource_id=None, params=None, json=None):
         url = (
             settings.LINKEDEVENTS_URL
             if settings.LINKEDEVENTS_URL.endswith("/")
@@ -42,12 +46,12 @@ class LinkedEventsClient:
             url += resource_id + "/"
 
         try:
-            r = requests_method(
+            r = self.request(
+                method,
                 url,
                 json=json,
                 params=params,
                 headers=self._headers(),
-                timeout=settings.LINKEDEVENTS_TIMEOUT,
             )
             r.raise_for_status()
         # TODO add logging for errors
@@ -88,7 +92,7 @@ class LinkedEventsClient:
         nexturl = None
         while True:
             if nexturl:
-                r = requests.get(nexturl, headers=self._headers())
+                r = self.get(nexturl, headers=self._headers())
             else:
                 params = {
                     "data_source": "tet",
@@ -101,7 +105,7 @@ class LinkedEventsClient:
                 if text:
                     params["text"] = text
 
-                r = requests.get(
+                r = self.get(
                     urljoin(settings.LINKEDEVENTS_URL, "event/"),
                     headers=self._headers(),
                     params=params,
@@ -125,7 +129,7 @@ class LinkedEventsClient:
             "include": "location,keywords",
         }
         return self._api_call(
-            requests_method=requests.get,
+            method="GET",
             resource="event",
             resource_id=event_id,
             params=params,
@@ -133,7 +137,7 @@ class LinkedEventsClient:
 
     def create_event(self, event):
         return self._api_call(
-            requests_method=requests.post,
+            method="POST",
             resource="event",
             json=event,
         )
@@ -144,7 +148,7 @@ class LinkedEventsClient:
             "data_source": "tet",
             "nocache": True,
         }
-        r = requests.delete(
+        r = self.delete(
             urljoin(settings.LINKEDEVENTS_URL, "event/" + id),
             headers=self._headers(),
             params=params,
@@ -153,7 +157,7 @@ class LinkedEventsClient:
 
     def update_event(self, eventid, event):
         return self._api_call(
-            requests_method=requests.put,
+            method="PUT",
             resource="event",
             resource_id=eventid,
             json=event,
@@ -161,13 +165,13 @@ class LinkedEventsClient:
 
     def get_url(self, url):
         # TODO check that url.startswith(settings.LINKEDEVENTS_URL)
-        r = requests.get(url, headers=self._headers())
+        r = self.get(url, headers=self._headers())
         # TODO better error handling
         r.raise_for_status()
         return r.json()
 
     def upload_image(self, body, files):
-        r = requests.post(
+        r = self.post(
             urljoin(settings.LINKEDEVENTS_URL, "image/"),
             headers={"apikey": settings.LINKEDEVENTS_API_KEY},
             data=body,
@@ -186,7 +190,7 @@ class LinkedEventsClient:
 
     def update_image(self, image_id, image):
         return self._api_call(
-            requests_method=requests.put,
+            method="PUT",
             resource="image",
             resource_id=image_id,
             json=image,
@@ -197,11 +201,10 @@ class LinkedEventsClient:
             "data_source": "tet",
             "nocache": True,
         }
-        r = requests.delete(
+        r = self.delete(
             urljoin(settings.LINKEDEVENTS_URL, f"image/{id}"),
             headers=self._headers(),
             params=params,
-            timeout=settings.LINKEDEVENTS_TIMEOUT,
         )
         return r.status_code
 
@@ -211,22 +214,19 @@ class LinkedEventsClient:
 
         Returns a generator that yields one page of images at a time.
         """
-        r = requests.get(
+        r = self.get(
             urljoin(settings.LINKEDEVENTS_URL, "image/"),
             params={
                 "data_source": "tet",
                 "nocache": True,
             },
-            timeout=settings.LINKEDEVENTS_TIMEOUT,
         )
         r.raise_for_status()
         data = r.json()
         yield data["data"]
 
         while data["meta"]["next"] is not None:
-            r = requests.get(
-                data["meta"]["next"], timeout=settings.LINKEDEVENTS_TIMEOUT
-            )
+            r = self.get(data["meta"]["next"])
             r.raise_for_status()
             data = r.json()
             yield data["data"]